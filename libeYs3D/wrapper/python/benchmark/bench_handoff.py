@@ -0,0 +1,72 @@
+"""Benchmark of multi-threaded consumers with and without FrameHandoff.
+
+It measures the depth frame throughput of consumer threads and how often the interpreter is available
+to another Python thread (the ticker) while the consumers are waiting for frames.
+  * direct: Each consumer calls the blocking `Pipeline.wait_depth_frame`.
+  * handoff: A FrameHandoff reader waits for the pipeline and consumers call `FrameHandoff.get`.
+
+The binding does not release the GIL while waiting, so the ticker shows how long the
+interpreter is held by the waits in either case.
+The pipeline runs on the simulator unless --backend is given.
+
+Ex: python benchmark/bench_handoff.py --pid 0x162 --index 1 --threads 4 --duration 10
+"""
+import argparse
+import threading
+import time
+
+from eys3d import Pipeline, Config, FrameHandoff
+
+
+def run(wait_frame, threads, duration):
+    stop = threading.Event()
+    frames = [0] * threads
+    ticks = [0]
+
+    def consume(i):
+        while not stop.is_set():
+            ret, _ = wait_frame()
+            if ret:
+                frames[i] += 1
+
+    def tick():
+        while not stop.is_set():
+            ticks[0] += 1
+            time.sleep(0)
+
+    workers = [threading.Thread(target=consume, args=(i, )) for i in range(threads)]
+    workers.append(threading.Thread(target=tick))
+    for t in workers:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in workers:
+        t.join()
+    return sum(frames) / duration, ticks[0] / duration
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pid", default="0x162", type=str, help="product id of module. Default is 0x162 (8062).")
+    parser.add_argument("--index", "-i", default=1, type=int, help="mode index for config setting. Default is 1.")
+    parser.add_argument("--threads", default=4, type=int, help="number of consumer threads. Default is 4.")
+    parser.add_argument("--backend", default="sim", type=str, help="backend of pipeline, sim or native. Default is sim.")
+    parser.add_argument("--duration", default=10.0, type=float, help="seconds for each case. Default is 10.")
+    args = parser.parse_args()
+
+    pipe = Pipeline(backend=args.backend)
+    conf = Config(backend=args.backend)
+    conf.set_preset_mode_config(int(args.pid, 16), args.index, pipe.get_device().get_usb_type())
+    pipe.start(conf)
+
+    fps, ticks = run(lambda: pipe.wait_depth_frame(1600), args.threads, args.duration)
+    print("[direct]  consumer fps: {:8.2f}, ticker: {:10.0f} /s".format(fps, ticks))
+
+    handoff = FrameHandoff(pipe.wait_depth_frame)
+    handoff.start()
+    fps, ticks = run(lambda: handoff.get(1.6), args.threads, args.duration)
+    handoff.stop()
+    print("[handoff] consumer fps: {:8.2f}, ticker: {:10.0f} /s".format(fps, ticks))
+    print("[handoff] {}".format(handoff.get_statistics()))
+
+    pipe.stop()
@@ -0,0 +1,358 @@
+"""Benchmark suite of the hot paths of Python wrapper against the simulated device.
+
+Each case reports one number and is compared with the baseline stored in `benchmark/baseline.json`.
+It fails if a case is worse than its baseline by more than the tolerance, so the regressions are caught.
+The change of a case is also ignored if it is less than the minimum of the case, e.g. the noise of sub-microsecond cases.
+The baseline is machine dependent, so it is not committed. The first run on a machine stores its results
+as the baseline, and the cases missing in the baseline are added when they are run.
+Please store it again with `--save` after an intended change of performance.
+
+  * retrieval_fps: The frames per second got by `Pipeline.wait_*_frame` with the simulator producing at full speed.
+  * frame_view_us, frame_copy_us: The time to get the rgb image of frame as view, and as copy.
+  * latency_ms: The median latency from `tsUs` to Python of `Pipeline` and `FrameSetPipeline`.
+  * callback_us: The time on the producer thread per frame of the direct callback and `CallbackDispatcher`.
+  * roi_stats_us, box_stats_us: The depth ROI statistics of `depth.roi_stats` and `DepthIntegral.box_stats`.
+  * depth_integral_ms: The integral images of 1280x720 depth for `DepthIntegral`.
+  * raw_to_z_ms: The z value of 1280x720 raw depth by ZD table.
+  * depth_to_points_ms: The point cloud of 1280x720 depth with color.
+  * software_filter_ms: The 1280x720 depth by the chain of `SoftwareDepthFilter` with all stages enabled.
+  * record_mbps: The write speed of `FrameSetRecorder`.
+  * import_ms: The time of `import eys3d` in a new process, and of the first access of `eys3d.Pipeline`.
+
+Ex: python benchmark/bench_suite.py                 # Run and compare with baseline, or store it at the first run
+    python benchmark/bench_suite.py --save          # Run and store the results as baseline
+    python benchmark/bench_suite.py -k latency      # Run the cases whose name contains latency
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# The suite is run as a script, so the package in the parent directory is imported without installing.
+PACKAGE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_PATH)
+os.environ.setdefault("EYS3D_BACKEND", "sim")
+
+from eys3d import (CallbackDispatcher, Config, Device, FrameSetPipeline,
+                   FrameSetRecorder, FrameView, Pipeline)
+from eys3d import simulator
+from eys3d.depth import DepthIntegral, get_raw_depth, raw_to_z, roi_stats
+from eys3d.pointcloud import depth_to_points
+from eys3d.software_filter import (EdgePreServingFilter, HoleFill, RemoveCurve,
+                                   SoftwareDepthFilter, Subsample,
+                                   TemporalFilter)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "baseline.json")
+
+CASES = []
+
+
+def case(name, unit, higher_is_better=False, min_change=0):
+    # min_change is the minimum absolute change in unit to be a regression.
+    def register(function):
+        CASES.append((name, unit, higher_is_better, min_change, function))
+        return function
+
+    return register
+
+
+def per_call(function, number, repeat=5):
+    # The median of seconds per call of several rounds.
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        rounds.append((time.perf_counter() - start) / number)
+    return float(np.median(rounds))
+
+
+def get_config(mode, usb_type=3):
+    conf = Config()
+    conf.set_preset_mode_config(0x162, mode, usb_type)
+    return conf
+
+
+class Frames:
+    """The frames of simulator shared by the cases of single frame."""
+    __frames = None
+
+    @classmethod
+    def get(cls):
+        if cls.__frames is None:
+            pipe = FrameSetPipeline(backend="sim")
+            pipe.start(get_config(1))
+            ret, frameset = pipe.wait_frameset()
+            pipe.stop()
+            if not ret:
+                raise Exception("No frameset from simulator.")
+            cls.__frames = frameset
+        return cls.__frames
+
+
+def retrieval_fps(mode, usb_type, duration=1.0):
+    simulator.configure(realtime=False)
+    try:
+        pipe = Pipeline(backend="sim")
+        pipe.start(get_config(mode, usb_type))
+        count = 0
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            count += pipe.wait_color_frame()[0]
+            count += pipe.wait_depth_frame()[0]
+        pipe.stop()
+    finally:
+        simulator.configure(realtime=True)
+    return count / duration
+
+
+@case("retrieval_fps[1280x720]", "frames/s", higher_is_better=True)
+def bench_retrieval_720p():
+    return retrieval_fps(1, 3)
+
+
+@case("retrieval_fps[640x360]", "frames/s", higher_is_better=True)
+def bench_retrieval_360p():
+    return retrieval_fps(6, 2)
+
+
+@case("frame_view_us[1280x720]", "us")
+def bench_frame_view():
+    frame = Frames.get().color_frame
+    return per_call(lambda: FrameView(frame).get_rgb_image(), 2000) * 1e6
+
+
+@case("frame_copy_us[1280x720]", "us")
+def bench_frame_copy():
+    frame = Frames.get().color_frame
+    return per_call(lambda: np.array(FrameView(frame).get_rgb_image()),
+                    200) * 1e6
+
+
+def median_latency(wait_frames, count=30):
+    latencies = []
+    while len(latencies) < count:
+        for frame in wait_frames():
+            latencies.append(time.time() * 1000000 - frame.tsUs)
+    return float(np.median(latencies)) / 1000.0
+
+
+@case("latency_ms[Pipeline]", "ms")
+def bench_pipeline_latency():
+    pipe = Pipeline(backend="sim")
+    pipe.start(get_config(3))
+
+    def wait_frames():
+        frames = []
+        for ret, frame in (pipe.wait_color_frame(), pipe.wait_depth_frame()):
+            if ret:
+                frames.append(frame)
+        return frames
+
+    latency = median_latency(wait_frames)
+    pipe.stop()
+    return latency
+
+
+@case("latency_ms[FrameSetPipeline]", "ms")
+def bench_frameset_pipeline_latency():
+    pipe = FrameSetPipeline(backend="sim")
+    pipe.start(get_config(3))
+
+    def wait_frames():
+        ret, frameset = pipe.wait_frameset()
+        return [frameset.color_frame, frameset.depth_frame] if ret else []
+
+    latency = median_latency(wait_frames)
+    pipe.stop()
+    return latency
+
+
+@case("callback_us[direct]", "us", min_change=0.5)
+def bench_callback_direct():
+    frame = Frames.get().depth_frame
+    total = [0]
+
+    def callback(frame):
+        total[0] += frame.get_width()
+
+    return per_call(lambda: callback(frame), 20000) * 1e6
+
+
+@case("callback_us[dispatcher]", "us", min_change=1)
+def bench_callback_dispatcher():
+    frames = Frames.get()
+    total = [0]
+
+    def callback(frame):
+        total[0] += frame.get_width()
+
+    # The serial number increases, so no frame is dropped as stale.
+    items = [simulator.Frame() for _ in range(20000)]
+    for serial_number, item in enumerate(items, 1):
+        item.clone(frames.depth_frame)
+        item.serialNumber = serial_number
+    with CallbackDispatcher(workers=2, capacity=64) as dispatcher:
+        dispatch = dispatcher.wrap(callback, "depth")
+        iterator = iter(items)
+        seconds = per_call(lambda: dispatch(next(iterator)), 4000)
+    return seconds * 1e6
+
+
+@case("roi_stats_us[21x21]", "us")
+def bench_roi_stats():
+    z_map = FrameView(Frames.get().depth_frame).get_depth_ZD_image()
+    return per_call(lambda: roi_stats(z_map, (640, 360), 21), 2000) * 1e6
+
+
+@case("box_stats_us[100 boxes]", "us")
+def bench_box_stats():
+    z_map = FrameView(Frames.get().depth_frame).get_depth_ZD_image()
+    rng = np.random.RandomState(0)
+    corners = rng.randint(0, 600, size=(100, 2))
+    boxes = np.hstack([corners, corners + 40])
+    integral = DepthIntegral(z_map)
+    integral.box_stats(boxes)  # The integral images are built at the first call.
+    return per_call(lambda: integral.box_stats(boxes), 2000) * 1e6
+
+
+@case("depth_integral_ms[1280x720]", "ms")
+def bench_depth_integral():
+    z_map = FrameView(Frames.get().depth_frame).get_depth_ZD_image()
+    box = np.array([[0, 0, 1, 1]])
+    return per_call(lambda: DepthIntegral(z_map).box_stats(box), 20) * 1e3
+
+
+@case("raw_to_z_ms[1280x720]", "ms")
+def bench_raw_to_z():
+    pipe = FrameSetPipeline(backend="sim")
+    pipe.start(get_config(1))
+    ret, frameset = pipe.wait_frameset()
+    zd_table = pipe.get_device().get_zd_table()
+    pipe.stop()
+    raw = get_raw_depth(frameset.depth_frame)
+    out = np.empty(raw.shape, dtype=np.uint16)
+    return per_call(lambda: raw_to_z(raw, zd_table, 4, out=out), 50) * 1e3
+
+
+@case("depth_to_points_ms[1280x720]", "ms")
+def bench_depth_to_points():
+    frameset = Frames.get()
+    table = Device(backend="sim").get_ray_table(1280, 720)
+    return per_call(
+        lambda: depth_to_points(frameset.depth_frame,
+                                table,
+                                color=FrameView(frameset.color_frame)), 20) * 1e3
+
+
+@case("software_filter_ms[1280x720]", "ms")
+def bench_software_filter():
+    z_map = FrameView(Frames.get().depth_frame).get_depth_ZD_image()
+    software_filter = SoftwareDepthFilter(Subsample(1), EdgePreServingFilter(),
+                                          HoleFill(), TemporalFilter(),
+                                          RemoveCurve())
+    return per_call(lambda: software_filter.apply(z_map), 20) * 1e3
+
+
+@case("record_mbps[1280x720]", "MB/s", higher_is_better=True)
+def bench_record():
+    frameset = Frames.get()
+    count = 60
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.eys3d")
+        start = time.perf_counter()
+        with FrameSetRecorder(path) as recorder:
+            for _ in range(count):
+                recorder.write_frameset(frameset)
+            size = recorder.get_size()
+        seconds = time.perf_counter() - start
+    return size / seconds / 1e6
+
+
+def import_time(statement, repeat=5):
+    # The median of time to run the statement in new processes. The interpreter startup is not counted.
+    script = ("import time; start = time.perf_counter(); {}; "
+              "print(time.perf_counter() - start)".format(statement))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [PACKAGE_PATH, os.environ.get("PYTHONPATH", "")]), EYS3D_LOG_FILE="0")
+    seconds = [
+        float(subprocess.check_output([sys.executable, "-c", script],
+                                      env=env)) for _ in range(repeat)
+    ]
+    return float(np.median(seconds)) * 1e3
+
+
+@case("import_ms[eys3d]", "ms")
+def bench_import():
+    return import_time("import eys3d")
+
+
+@case("import_ms[eys3d.Pipeline]", "ms")
+def bench_import_pipeline():
+    return import_time("import eys3d; eys3d.Pipeline")
+
+
+def get_machine():
+    return "{} {} Python {}".format(platform.system(), platform.machine(),
+                                    platform.python_version())
+
+
+def compare(name, value, higher_is_better, baseline, tolerance, min_change=0):
+    # Return the ratio of change (positive is worse) and True if it is a regression.
+    if not baseline:
+        return None, False
+    change = (baseline - value) / baseline if higher_is_better else (
+        value - baseline) / baseline
+    return change, change > tolerance and abs(value - baseline) > min_change
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", default="", type=str, help="run the cases whose name contains it.")
+    parser.add_argument("--save", action="store_true", help="store the results as baseline.")
+    parser.add_argument("--tolerance", default=0.3, type=float,
+                        help="the ratio worse than baseline to fail. Default is 0.3.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, type=str,
+                        help="the path of baseline. Default is benchmark/baseline.json.")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if baseline and baseline.get("machine") != get_machine() and not args.save:
+        print("[warning] The baseline is stored on {}.".format(baseline.get("machine")))
+
+    results = {}
+    regressions = []
+    for name, unit, higher_is_better, min_change, function in CASES:
+        if args.k not in name:
+            continue
+        value = function()
+        results[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+        change, regressed = compare(name, value, higher_is_better,
+                                    baseline.get("cases", {}).get(name, {}).get("value"),
+                                    args.tolerance, min_change)
+        text = "" if change is None else "{:+7.1%} {}".format(-change, "REGRESSION" if regressed else "")
+        print("{:32s} {:12.2f} {:8s} {}".format(name, value, unit, text))
+        if regressed:
+            regressions.append(name)
+
+    cases = dict(baseline.get("cases", {}))
+    # The results are stored if asked, and the new cases are stored at their first run.
+    stored = results if args.save else {name: result for name, result in results.items() if name not in cases}
+    if stored:
+        cases.update(stored)
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": get_machine(), "cases": cases}, f, indent=2, sort_keys=True)
+        print("The baseline of {} cases is stored in {}".format(len(stored), args.baseline))
+    if regressions and not args.save:
+        print("Regressions: {}".format(", ".join(regressions)))
+        sys.exit(1)
@@ -36,12 +36,11 @@ class ModeConfigUI(UINode):
 
     def refresh(self):
         self._children = set([])
-        max_index = self.mode_config.get_mode_count()
-        base_index = self.mode_config.get_current_index()
-        for i in range(max_index):
-            self.mode_config.select_current_index(base_index + i)
+        # The modes are from the shared catalog, so it does not query modeConfig.db per mode.
+        for mode_info in self.mode_config.get_modes():
+            self.mode_config.select_current_index(mode_info.iMode)
             config = Config()
-            config.set_preset_mode_config(self.pid, (base_index + i),
+            config.set_preset_mode_config(self.pid, mode_info.iMode,
                                           self.usb_type)
             Mode(self.camera_device, config, self.mode_config, self)
 
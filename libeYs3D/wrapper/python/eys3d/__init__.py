@@ -1,29 +1,109 @@
+import importlib
 import os
-from loguru import logger
+import threading
 
 # Set environment variable before initialize eys3d system
 cfg_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                         "../../../..")  # The path of python_wrapper
 os.environ['EYS3D_SDK_HOME'] = cfg_path
 
-from eys3dPy import LIGHT_SOURCE_VALUE, COLOR_RAW_DATA_TYPE, DEPTH_RAW_DATA_TYPE, SENSORMODE_INFO, DEPTH_TRANSFER_CTRL, PIPELINE_RESULT, USB_PORT_TYPE, DECODE_TYPE
-from .pipeline import Pipeline
-from .frameset_pipeline import FrameSetPipeline
-from .config import Config, ModeConfig
-from .device import Device, EYS3DSystem
-from .depthFilter import DepthFilterOptions
-from .depthAccuracy import DepthAccuracy
-from .cameraProperty import CameraProperty
 from .utils import *
 
 __all__ = [
     "Pipeline", "Config", "ModeConfig", "Device", "DepthFilterOptions",
-    "DepthAccuracy", "CameraProperty", "FrameSetPipeline"
+    "DepthAccuracy", "CameraProperty", "FrameSetPipeline", "FrameView",
+    "MultiCameraPipeline", "FrameSetRecorder", "FrameSetReader", "DumpService",
+    "LatestValueBuffer", "CallbackDispatcher", "FrameSynchronizer",
+    "PipelineMetrics", "MetricsExporter", "ModeCatalog",
+    "BandwidthController", "SoftwareDepthFilter", "FrameHandoff"
 ]
 
 __version__ = "1.0.1"
 
-# loguru config setting. The the max count of backup files is 100 and each file is not exceed than 10MB.
-logger.add(os.path.join(get_EYS3D_HOME(), "logs", "python-eYs3d-{time}.log"),
-           rotation="10MB",
-           retention=100)
+# The attributes are imported at the first access (PEP 562), so `import eys3d` does not load
+# the backend, NumPy and loguru until they are used. The key is the name of attribute and
+# the value is (module, name in module). The name is None for the module itself.
+_LAZY_ATTRIBUTES = {
+    "Pipeline": (".pipeline", "Pipeline"),
+    "FrameSetPipeline": (".frameset_pipeline", "FrameSetPipeline"),
+    "MultiCameraPipeline": (".multi_camera_pipeline", "MultiCameraPipeline"),
+    "Config": (".config", "Config"),
+    "ModeConfig": (".config", "ModeConfig"),
+    "ModeCatalog": (".mode_catalog", "ModeCatalog"),
+    "get_mode_catalog": (".mode_catalog", "get_mode_catalog"),
+    "Device": (".device", "Device"),
+    "EYS3DSystem": (".device", "EYS3DSystem"),
+    "DepthFilterOptions": (".depthFilter", "DepthFilterOptions"),
+    "SoftwareDepthFilter": (".software_filter", "SoftwareDepthFilter"),
+    "DepthAccuracy": (".depthAccuracy", "DepthAccuracy"),
+    "CameraProperty": (".cameraProperty", "CameraProperty"),
+    "FrameView": (".frame", "FrameView"),
+    "FrameSetRecorder": (".recorder", "FrameSetRecorder"),
+    "FrameSetReader": (".recorder", "FrameSetReader"),
+    "DumpService": (".dump_service", "DumpService"),
+    "get_dump_service": (".dump_service", "get_dump_service"),
+    "LatestValueBuffer": (".latest_value", "LatestValueBuffer"),
+    "CallbackDispatcher": (".callback_dispatcher", "CallbackDispatcher"),
+    "FrameHandoff": (".handoff", "FrameHandoff"),
+    "FrameSynchronizer": (".synchronizer", "FrameSynchronizer"),
+    "PipelineMetrics": (".metrics", "PipelineMetrics"),
+    "MetricsExporter": (".metrics", "MetricsExporter"),
+    "BandwidthController": (".bandwidth", "BandwidthController"),
+    "load_backend": (".backend", "load_backend"),
+    "depth": (".depth", None),
+    "bandwidth": (".bandwidth", None),
+    "pointcloud": (".pointcloud", None),
+    "software_filter": (".software_filter", None),
+    "pc_writer": (".pc_writer", None),
+}
+
+# The backend is eys3dPy in C/C++, or the simulator if EYS3D_BACKEND=sim
+_BACKEND_ATTRIBUTES = ("LIGHT_SOURCE_VALUE", "COLOR_RAW_DATA_TYPE",
+                       "DEPTH_RAW_DATA_TYPE", "SENSORMODE_INFO",
+                       "DEPTH_TRANSFER_CTRL", "PIPELINE_RESULT",
+                       "USB_PORT_TYPE", "DECODE_TYPE")
+
+
+def _get_logger():
+    from loguru import logger
+    # loguru config setting. The the max count of backup files is 100 and each file is not exceed than 10MB.
+    # The file is created at the first message. Set EYS3D_LOG_FILE=0 to disable it, e.g. in worker processes.
+    if os.environ.get("EYS3D_LOG_FILE", "1") != "0":
+        logger.add(os.path.join(get_EYS3D_HOME(), "logs",
+                                "python-eYs3d-{time}.log"),
+                   rotation="10MB",
+                   retention=100,
+                   delay=True)
+    return logger
+
+
+# The imports are serialized by importlib, so the other attributes need no lock. A lock around them
+# deadlocks with a thread importing a submodule, which gets `logger` from here while holding the import lock.
+# `logger` is locked by itself because the log file should be added once. It does not import the submodules.
+_logger_lock = threading.Lock()
+
+
+def __getattr__(name):
+    if name == "logger":
+        with _logger_lock:
+            if name not in globals():
+                globals()[name] = _get_logger()
+        return globals()[name]
+    if name in _BACKEND_ATTRIBUTES:
+        value = getattr(
+            importlib.import_module(".backend", __name__).load_backend(), name)
+    elif name in _LAZY_ATTRIBUTES:
+        (module_name, attribute) = _LAZY_ATTRIBUTES[name]
+        module = importlib.import_module(module_name, __name__)
+        value = module if attribute is None else getattr(module, attribute)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(
+        set(globals()) | set(_LAZY_ATTRIBUTES) | set(_BACKEND_ATTRIBUTES)
+        | {"logger"})
@@ -0,0 +1,124 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = [
+    "set_worker_count", "add_streams", "remove_streams", "get_executor",
+    "run_in_worker", "run_wait_in_worker"
+]
+
+DEFAULT_WORKER_COUNT = 8
+
+_executor = None
+_executor_workers = 0
+_worker_count = DEFAULT_WORKER_COUNT
+_stream_count = 0
+_lock = threading.Lock()
+
+
+def set_worker_count(count):
+    """Set the minimum number of workers shared by the asyncio API.
+
+    The blocking waits of all pipelines are run on one shared thread pool instead of one thread per stream.
+    The thread pool has at least one worker per started stream, so the waits of streams are not serialized.
+    The count is the minimum for the waits which are not of started streams.
+    It takes effect when the thread pool is created or grown.
+
+    Args:
+        count (int): The minimum number of workers. Default is 8.
+    """
+    global _worker_count
+    if count <= 0:
+        raise ValueError("The count of workers should be positive.")
+    _worker_count = count
+
+
+def add_streams(count):
+    """Reserve the workers for the streams started by pipeline.
+
+    Args:
+        count (int): The number of streams, e.g. 2 for color and depth.
+    """
+    global _stream_count
+    with _lock:
+        _stream_count += count
+
+
+def remove_streams(count):
+    """Release the workers of the streams stopped by pipeline.
+
+    The thread pool is not shrunk, and its idle workers exit with it.
+
+    Args:
+        count (int): The number of streams.
+    """
+    global _stream_count
+    with _lock:
+        _stream_count = max(_stream_count - count, 0)
+
+
+def get_executor():
+    """Get the thread pool shared by the asyncio API.
+
+    It is replaced by a larger one if there are more started streams than workers.
+    The waits submitted to the previous one still run, and its workers exit after them.
+
+    Returns:
+        obj: The ThreadPoolExecutor.
+    """
+    global _executor, _executor_workers
+    with _lock:
+        workers = max(_worker_count, _stream_count)
+        if _executor is None or _executor_workers < workers:
+            previous = _executor
+            _executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix="eys3d-aio")
+            _executor_workers = workers
+            if previous is not None:
+                previous.shutdown(wait=False)
+        return _executor
+
+
+async def run_in_worker(func, *args):
+    """Run the blocking function on the shared thread pool.
+
+    To run the blocking function, e.g. `wait_frameset`, on the shared thread pool
+    and suspend the coroutine until it returns. The event loop keeps running the other coroutines.
+
+    Notice:
+        The GIL is not released by the waits of binding, so the waiting is only moved from
+        the event loop to the thread pool. The other Python threads still wait for the GIL
+        while a worker is blocked in C/C++.
+
+    Args:
+        func (function): The blocking function.
+        *args: The arguments of func.
+
+    Returns:
+        The return value of func.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(),
+                                      functools.partial(func, *args))
+
+
+async def run_wait_in_worker(wait, *args):
+    """Run the wait of pipeline on the shared thread pool.
+
+    It is `run_in_worker` for the waits which return (ret, frame).
+    The waits are decorated by `logger.catch`, so they return None after the exception is logged.
+    None is mapped to (False, None) to be unpacked like a failed wait.
+
+    Args:
+        wait (function): The wait of pipeline, e.g. `wait_color_frame`.
+        *args: The arguments of wait.
+
+    Returns:
+        bool : The return value is to mean the frame is ready or not.
+        obj : The frame, or None if it is not ready.
+    """
+    result = await run_in_worker(wait, *args)
+    if result is None:
+        return False, None
+    return result
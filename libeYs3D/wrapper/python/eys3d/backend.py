@@ -0,0 +1,60 @@
+import importlib
+import os
+
+__all__ = ["load_backend", "get_default_backend_name"]
+
+BACKENDS = {
+    "native": "eys3dPy",
+    "sim": "eys3d.simulator",
+    "simulator": "eys3d.simulator",
+}
+
+
+def get_default_backend_name():
+    """Get the name of default backend.
+
+    The default backend is decided by the environment variable `EYS3D_BACKEND`.
+    It is `native` if the variable is not set.
+
+    Returns:
+        str: The name of default backend.
+    """
+    return os.environ.get("EYS3D_BACKEND", "native").lower()
+
+
+def load_backend(backend=None):
+    """Load the backend of eys3d.
+
+    The backend is the module implementing the interface of `eys3dPy`.
+    * native: The module `eys3dPy` in C/C++. It needs the camera module.
+    * sim: The module `eys3d.simulator`. It produces the synthetic or recorded frames without camera module.
+
+    Args:
+        backend (str or module): The name of backend, or the backend module itself.
+            The default backend is used if None.
+
+    Returns:
+        module: The backend module.
+
+    Raises:
+        ValueError: The name of backend is unknown.
+    """
+    if backend is None:
+        backend = get_default_backend_name()
+    if not isinstance(backend, str):
+        return backend
+    try:
+        name = BACKENDS[backend.lower()]
+    except KeyError:
+        raise ValueError("Unknown backend: {}. It is available for {}.".format(
+            backend, ", ".join(BACKENDS)))
+    return importlib.import_module(name)
+
+
+def __getattr__(name):
+    # `eys3dPy` is the default backend of process. It is loaded at the first access instead of import,
+    # so the modules of eys3d could be imported and used with another backend without the default one.
+    if name == "eys3dPy":
+        return load_backend()
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
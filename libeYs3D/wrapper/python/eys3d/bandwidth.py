@@ -0,0 +1,381 @@
+import collections
+import copy
+import threading
+
+from eys3d import logger
+from .depth import get_depth_data_type
+from .mode_catalog import get_mode_catalog
+
+__all__ = [
+    "USB_CAPACITY", "BandwidthController", "get_usb_capacity",
+    "estimate_bandwidth", "estimate_mode_bandwidth",
+    "estimate_config_bandwidth", "rank_modes"
+]
+
+# The practical payload in bytes per second of a port, not the signaling rate.
+# USB 2.0 is 480 Mbit/s and USB 3.0 is 5 Gbit/s, but the protocol and the host controller take a part of them.
+USB_CAPACITY = {2: 40 * 1000000, 3: 400 * 1000000}
+
+# YUY2 has 2 bytes per pixel. MJPG is estimated with the usual 5:1 compression of YUY2.
+YUY2_BYTES_PER_PIXEL = 2.0
+MJPG_BYTES_PER_PIXEL = 0.4
+
+
+def get_usb_capacity(usb_type):
+    """Get the practical bandwidth of USB port.
+
+    Args:
+        usb_type (int): The USB type. 3 for USB 3, otherwise USB 2.
+
+    Returns:
+        int: The bytes per second.
+    """
+    return USB_CAPACITY[3 if usb_type == 3 else 2]
+
+
+def get_depth_bytes_per_pixel(depth_bits):
+    # The 8 bits depth is transferred in 1 byte. The 11 and 14 bits depth take 2 bytes, as YUY2.
+    return 1.0 if depth_bits == 8 else 2.0
+
+
+def estimate_bandwidth(color_resolution,
+                       depth_resolution,
+                       fps,
+                       color_mjpg=False,
+                       depth_bits=11,
+                       interleave=False):
+    """Estimate the USB bandwidth of streams.
+
+    In interleave mode, the color and depth frames take turns at fps, so each stream runs at half of fps.
+
+    Args:
+        color_resolution (tuple): The (width, height) of color stream. (0, 0) if it is disabled.
+        depth_resolution (tuple): The (width, height) of depth stream. (0, 0) if it is disabled.
+        fps (int): The fps of camera module.
+        color_mjpg (bool): True if the color stream is MJPG, otherwise YUY2.
+        depth_bits (int): The depth bits, e.g. 8, 11 or 14.
+        interleave (bool): True if in interleave mode.
+
+    Returns:
+        dict: The estimation. The key is following:
+            * color: The bytes per second of color stream.
+            * depth: The bytes per second of depth stream.
+            * total: The bytes per second of both.
+            * fps: The fps of each stream.
+    """
+    stream_fps = fps / 2.0 if interleave else float(fps)
+    color_bytes = MJPG_BYTES_PER_PIXEL if color_mjpg else YUY2_BYTES_PER_PIXEL
+    color = color_resolution[0] * color_resolution[1] * color_bytes * stream_fps
+    depth = depth_resolution[0] * depth_resolution[1] * get_depth_bytes_per_pixel(
+        depth_bits) * stream_fps
+    return {
+        'color': color,
+        'depth': depth,
+        'total': color + depth,
+        'fps': stream_fps
+    }
+
+
+def get_mode_fps_values(mode_info):
+    # The fps of mode are listed in vecColorFps if it has color, as `Config` takes them.
+    return mode_info.vecColorFps if mode_info.vecColorFps else mode_info.vecDepthFps
+
+
+def estimate_mode_bandwidth(mode_info, fps=None, depth_bits=None):
+    """Estimate the USB bandwidth of mode.
+
+    Args:
+        mode_info (obj): The ModeInfo or MODE_CONFIG.
+        fps (int): The fps. Default is the first fps of mode.
+        depth_bits (int): The depth bits. Default is the first depth type of mode.
+
+    Returns:
+        dict: Please refer `estimate_bandwidth`. The `interleave` is True if fps is the interleave fps of mode.
+    """
+    fps_values = get_mode_fps_values(mode_info)
+    if fps is None:
+        fps = fps_values[0] if fps_values else 0
+    if depth_bits is None:
+        depth_bits = mode_info.vecDepthType[0] if len(
+            mode_info.vecDepthType) else 0
+    interleave = bool(fps) and fps == mode_info.iInterLeaveModeFPS
+    estimation = estimate_bandwidth(
+        (mode_info.L_Resolution.Width, mode_info.L_Resolution.Height),
+        (mode_info.D_Resolution.Width, mode_info.D_Resolution.Height),
+        fps,
+        color_mjpg=int(mode_info.eDecodeType_L) != 0,
+        depth_bits=depth_bits,
+        interleave=interleave)
+    estimation['interleave'] = interleave
+    return estimation
+
+
+def rank_modes(pid,
+               usb_type,
+               min_fps=0,
+               min_depth_res=None,
+               depth_bits=None,
+               need_color=False,
+               bandwidth_budget=None,
+               backend=None):
+    """Rank the modes of camera module which meet the requirements.
+
+    Each fps of each mode is a candidate. The candidates are sorted by the estimated bandwidth
+    from the highest, so the first one has the highest throughput which fits the budget.
+
+    Args:
+        pid (int): The product id of camera module.
+        usb_type (int): The USB type. 3 for USB 3, otherwise USB 2.
+        min_fps (int): The minimum fps of each stream. The interleave mode gives half of fps to each stream.
+        min_depth_res (tuple): The minimum (width, height) of depth. The depth is not required if None.
+        depth_bits (int): The required depth bits. The first depth type of mode is taken if None.
+        need_color (bool): True if the color stream is required.
+        bandwidth_budget (float): The maximum bytes per second. Default is the capacity of USB port.
+        backend (str or module): The backend to read `modeConfig.db`. The default backend is used if None.
+
+    Returns:
+        list: The candidates. Each is a dictionary:
+            * index: The mode index.
+            * fps: The fps of camera module.
+            * depth_bits: The depth bits. It is 0 if the mode has no depth.
+            * interleave: True if in interleave mode.
+            * bandwidth: Please refer `estimate_bandwidth`.
+            * mode_info: The ModeInfo.
+    """
+    if bandwidth_budget is None:
+        bandwidth_budget = get_usb_capacity(usb_type)
+    candidates = []
+    for mode_info in get_mode_catalog(pid, usb_type, backend):
+        if need_color and not mode_info.L_Resolution.Width:
+            continue
+        if min_depth_res is not None and (
+                mode_info.D_Resolution.Width < min_depth_res[0]
+                or mode_info.D_Resolution.Height < min_depth_res[1]
+                or not mode_info.D_Resolution.Width):
+            continue
+        if depth_bits is None:
+            bits = mode_info.vecDepthType[0] if len(
+                mode_info.vecDepthType) else 0
+        elif depth_bits in mode_info.vecDepthType:
+            bits = depth_bits
+        else:
+            continue
+        for fps in get_mode_fps_values(mode_info):
+            bandwidth = estimate_mode_bandwidth(mode_info, fps, bits)
+            if bandwidth['fps'] < min_fps or bandwidth[
+                    'total'] > bandwidth_budget:
+                continue
+            candidates.append({
+                'index': mode_info.iMode,
+                'fps': fps,
+                'depth_bits': bits,
+                'interleave': bandwidth['interleave'],
+                'bandwidth': bandwidth,
+                'mode_info': mode_info
+            })
+    candidates.sort(key=lambda c: (-c['bandwidth']['total'], -c['bandwidth'][
+        'fps'], c['interleave']))
+    return candidates
+
+
+def estimate_config_bandwidth(config):
+    """Estimate the USB bandwidth of config.
+
+    Args:
+        config (obj): The class Config.
+
+    Returns:
+        dict: Please refer `estimate_bandwidth`. The `interleave` is True if the fps is the interleave fps.
+    """
+    conf = config.get_config()
+    fps = conf['actualFps']
+    interleave = bool(fps) and conf['ILM'] == fps
+    estimation = estimate_bandwidth(
+        (conf['colorWidth'], conf['colorHeight']),
+        (conf['depthWidth'], conf['depthHeight']),
+        fps,
+        color_mjpg=int(conf['colorFormat']) != 0,  # 0 is COLOR_RAW_DATA_YUY2
+        depth_bits=get_depth_data_type(conf['depthFormat']).bits,
+        interleave=interleave)
+    estimation['interleave'] = interleave
+    return estimation
+
+
+def get_host_controller(bus_info):
+    """Get the host controller from the bus information of device.
+
+    The port is removed from the bus information, e.g. `usb-0000:00:14.0-2` is on `usb-0000:00:14.0`.
+
+    Args:
+        bus_info (str): The `bus_info` of `Device.get_device_info`.
+
+    Returns:
+        str: The host controller.
+    """
+    for separator in ("-", ":"):
+        if separator in bus_info:
+            return bus_info.rsplit(separator, 1)[0]
+    return bus_info
+
+
+class BandwidthController:
+    """This class estimates the USB bandwidth of devices and controls the admission of streams.
+
+    The devices on one host controller share its bandwidth. USB 2.0 and USB 3.0 devices are counted apart,
+    because they have their own links in the controller. When the streams of a device would oversubscribe
+    the bus, they are handled by policy:
+        * REFUSE: The stream is not started.
+        * DOWNGRADE: The config is changed to the mode of highest throughput which fits, with the same streams.
+          It is refused if no mode fits.
+        * WARN: The stream is started and a warning is logged. Default.
+    The report contains the sustainable fps, which is the fps scaled to the bandwidth available.
+
+    Example:
+        controller = BandwidthController(policy=BandwidthController.DOWNGRADE)
+        pipes = [Pipeline(device=dev, bandwidth_controller=controller) for dev in devices]
+        for pipe in pipes:
+            pipe.start(conf)
+        logger.info(controller.get_usage())
+
+    Args:
+        policy (str): The policy when the bus is oversubscribed. Default is WARN.
+        capacity (dict): The bytes per second of bus by USB type. Default is `USB_CAPACITY`.
+    """
+    REFUSE = "refuse"
+    DOWNGRADE = "downgrade"
+    WARN = "warn"
+
+    def __init__(self, policy=WARN, capacity=None):
+        if policy not in (self.REFUSE, self.DOWNGRADE, self.WARN):
+            raise ValueError("The policy {} is not supported.".format(policy))
+        self.__policy = policy
+        self.__capacity = dict(USB_CAPACITY if capacity is None else capacity)
+        self.__reservations = collections.OrderedDict()
+        self.__lock = threading.Lock()
+        self.__refused_count = 0
+        self.__downgraded_count = 0
+
+    def admit(self, device, config):
+        """Admit the streams of device on its bus.
+
+        The bandwidth is reserved for device until `release`. The config is not changed.
+        If downgraded, the device should be opened with the downgraded copy in the report.
+
+        Args:
+            device (obj): The class Device.
+            config (obj): The class Config.
+
+        Returns:
+            bool: True if admitted.
+            dict: The report. The key is following:
+                * bus: The host controller and the USB type.
+                * bandwidth: The estimation of config. Please refer `estimate_bandwidth`.
+                * available: The bytes per second left on bus by the other devices.
+                * fps: The fps of config.
+                * sustainable_fps: The fps which the bus could sustain for the config.
+                * downgraded: The mode index if the config is downgraded, otherwise None.
+                * config: The class Config to open the device. It is the downgraded copy if downgraded,
+                    otherwise the given config.
+        """
+        info = device.get_device_info()
+        key = info['bus_info']
+        usb_type = device.get_usb_type()
+        bus = (get_host_controller(key), usb_type)
+        with self.__lock:
+            used = sum(reservation['bandwidth']['total']
+                       for device_key, reservation in self.__reservations.items()
+                       if reservation['bus'] == bus and device_key != key)
+            available = max(self.__get_capacity(usb_type) - used, 0)
+            report = self.__get_report(bus, config, available)
+            admitted = report['bandwidth']['total'] <= available
+            if not admitted and self.__policy == self.DOWNGRADE:
+                conf = config.get_config()
+                # The config could be shared by the devices, e.g. in MultiCameraPipeline.
+                downgraded = copy.copy(config)
+                ret, best = downgraded.best_mode(
+                    int(info['dev_info']['PID']),
+                    usb_type,
+                    min_depth_res=(1, 1) if conf['depthWidth'] else None,
+                    need_color=bool(conf['colorWidth']),
+                    bandwidth_budget=available)
+                if ret:
+                    admitted = True
+                    report = self.__get_report(bus, downgraded, available)
+                    report['downgraded'] = best['index']
+                    self.__downgraded_count += 1
+                    logger.warning(
+                        "The bus {} is oversubscribed. The device {} is downgraded to mode {} at {} fps."
+                        .format(bus, key, best['index'], best['fps']))
+            if not admitted and self.__policy == self.WARN:
+                admitted = True
+                logger.warning(
+                    "The bus {} is oversubscribed. The device {} could sustain {:.1f} fps."
+                    .format(bus, key, report['sustainable_fps']))
+            if admitted:
+                self.__reservations[key] = report
+            else:
+                self.__refused_count += 1
+                logger.error(
+                    "The bus {} is oversubscribed. The device {} is refused, which could sustain {:.1f} fps."
+                    .format(bus, key, report['sustainable_fps']))
+        return admitted, report
+
+    def release(self, device):
+        """Release the bandwidth reserved for device.
+
+        Args:
+            device (obj): The class Device.
+        """
+        with self.__lock:
+            self.__reservations.pop(device.get_device_info()['bus_info'], None)
+
+    def get_usage(self):
+        """Get the bandwidth reserved on each bus.
+
+        Returns:
+            dict: The usage with (host controller, USB type) as key. The value is a dictionary:
+                * capacity: The bytes per second of bus.
+                * used: The bytes per second reserved.
+                * devices: The bytes per second reserved by the `bus_info` of device.
+        """
+        with self.__lock:
+            usage = {}
+            for device_key, reservation in self.__reservations.items():
+                bus = reservation['bus']
+                bus_usage = usage.setdefault(
+                    bus, {
+                        'capacity': self.__get_capacity(bus[1]),
+                        'used': 0,
+                        'devices': {}
+                    })
+                bus_usage['used'] += reservation['bandwidth']['total']
+                bus_usage['devices'][device_key] = reservation['bandwidth'][
+                    'total']
+            return usage
+
+    def get_statistics(self):
+        with self.__lock:
+            return {
+                'devices': len(self.__reservations),
+                'refused': self.__refused_count,
+                'downgraded': self.__downgraded_count,
+            }
+
+    def __get_capacity(self, usb_type):
+        return self.__capacity[3 if usb_type == 3 else 2]
+
+    @staticmethod
+    def __get_report(bus, config, available):
+        bandwidth = estimate_config_bandwidth(config)
+        fps = config.get_config()['actualFps']
+        total = bandwidth['total']
+        return {
+            'bus': bus,
+            'bandwidth': bandwidth,
+            'available': available,
+            'fps': fps,
+            'sustainable_fps':
+            fps if total <= available else fps * available / total,
+            'downgraded': None,
+            'config': config,
+        }
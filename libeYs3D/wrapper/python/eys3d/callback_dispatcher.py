@@ -0,0 +1,305 @@
+import collections
+import concurrent.futures
+import copy
+import threading
+import time
+
+from eys3d import logger
+from .histogram import LatencyHistogram
+
+__all__ = ["CallbackDispatcher"]
+
+
+class _Stream:
+    # The queue and counters of one callback. They are guarded by the lock.
+    def __init__(self, name, callback):
+        self.name = name
+        self.callback = callback
+        self.queue = collections.deque()
+        self.scheduled = False
+        self.last_serial_number = None
+        self.lock = threading.Lock()
+        self.not_full = threading.Condition(self.lock)
+
+        self.received_count = 0
+        self.completed_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+        self.stale_count = 0
+        self.latency = LatencyHistogram()
+        self.run_time = LatencyHistogram()
+
+
+class CallbackDispatcher:
+    """This class runs the frame callbacks on a pool of worker threads.
+
+    The callbacks of `Device.open_device` are called on the producer threads of device,
+    so the slow Python work in a callback stalls the producers. The callback wrapped by this class
+    only puts the frame into the bounded queue of its stream and returns.
+    The workers call the callbacks from the queues.
+
+    The frames of one stream are called in order of `serialNumber` and never concurrently,
+    so a callback does not need a lock for its own state. The different streams run in parallel.
+    The stale frames are dropped: a frame whose serial number is not after the previous one
+    is late, so it is dropped and counted as stale instead of being reordered.
+    When the queue of a stream is full, the frame is handled by policy:
+        * DROP_OLDEST: The oldest frame in queue is dropped. It keeps the latency low. Default.
+        * DROP_NEWEST: The incoming frame is dropped.
+        * BLOCK: The producer waits for a free slot, so no frame is dropped.
+
+    The frame is copied before it is queued, because the backend may reuse its buffers after
+    the callback of device returns. The frame is queued by reference if `copy` is False,
+    e.g. the producer never reuses the frames.
+
+    Example:
+        dispatcher = CallbackDispatcher(workers=2)
+        device.open_device(conf, colorFrameCallback=on_color, depthFrameCallback=on_depth, dispatcher=dispatcher)
+        device.enable_stream()
+        ...
+        device.close_stream()
+        dispatcher.shutdown()
+        logger.info(dispatcher.get_statistics()['depth']['latency'])
+
+    Args:
+        workers (int): The number of worker threads. Default is 2.
+        capacity (int): The maximum number of frames waiting in each stream. Default is 4.
+        policy (str): The policy when the queue is full. Default is DROP_OLDEST.
+        batch (int): The number of frames a worker calls for one stream before serving the others. Default is 8.
+        copy (bool): True to copy the frame before it is queued. Default is True.
+    """
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+
+    def __init__(self,
+                 workers=2,
+                 capacity=4,
+                 policy=DROP_OLDEST,
+                 batch=8,
+                 copy=True):
+        if workers <= 0 or capacity <= 0 or batch <= 0:
+            raise ValueError(
+                "The workers, capacity and batch should be positive.")
+        if policy not in (self.DROP_OLDEST, self.DROP_NEWEST, self.BLOCK):
+            raise ValueError("The policy {} is not supported.".format(policy))
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="eys3d-callback")
+        self.__capacity = capacity
+        self.__policy = policy
+        self.__batch = batch
+        self.__copy = copy
+        self.__streams = collections.OrderedDict()
+        self.__idle = threading.Condition()
+        self.__closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def wrap(self, callback, name):
+        """Wrap the callback to run on workers.
+
+        The stream of same name is reused, so its statistics are kept when the device is opened again.
+
+        Args:
+            callback (function): The callback function. It takes the frame or data.
+            name (str): The name of stream, e.g. `color`.
+
+        Returns:
+            function: The callback to register to device. It is None if callback is None.
+        """
+        if callback is None:
+            return None
+        with self.__idle:
+            stream = self.__streams.get(name)
+            if stream is None:
+                stream = self.__streams[name] = _Stream(name, callback)
+        with stream.lock:
+            stream.callback = callback
+            # The serial number restarts when the stream is opened again.
+            stream.last_serial_number = None
+
+        def dispatch(frame):
+            self.__dispatch(stream, frame)
+
+        return dispatch
+
+    def wrap_callbacks(self,
+                       colorFrameCallback=None,
+                       depthFrameCallback=None,
+                       PCFrameCallback=None,
+                       IMUDataCallback=None):
+        """Wrap the callbacks of `Device.open_device`.
+
+        The names of streams are `color`, `depth`, `pc` and `imu`.
+
+        Returns:
+            tuple: The wrapped (colorFrameCallback, depthFrameCallback, PCFrameCallback, IMUDataCallback).
+        """
+        return (self.wrap(colorFrameCallback, "color"),
+                self.wrap(depthFrameCallback, "depth"),
+                self.wrap(PCFrameCallback, "pc"),
+                self.wrap(IMUDataCallback, "imu"))
+
+    def join(self, timeout=None):
+        """Wait for the frames in queues to be called.
+
+        Args:
+            timeout (float): The maximun of time in seconds to wait. It waits forever if None.
+
+        Returns:
+            bool: True if all of the queues are empty.
+        """
+        with self.__idle:
+            return self.__idle.wait_for(self.__is_idle, timeout)
+
+    def get_statistics(self):
+        """Get the statistics of streams.
+
+        Returns:
+            dict: The statistics of each stream by name. The key of statistics is following:
+                * received: The number of frames from device.
+                * completed: The number of callbacks returned, including failed.
+                * dropped: The number of frames dropped because the queue is full or the dispatcher is shut down.
+                * failed: The number of callbacks raised exception.
+                * stale: The number of frames dropped because their serial number is not after the previous one.
+                * queued: The number of frames waiting in queue.
+                * latency: The histogram snapshot of time from device to callback returned.
+                    Please refer `LatencyHistogram.get_snapshot`.
+                * run_time: The histogram snapshot of time in callback.
+        """
+        with self.__idle:
+            streams = list(self.__streams.values())
+        statistics = {}
+        for stream in streams:
+            with stream.lock:
+                statistics[stream.name] = {
+                    'received': stream.received_count,
+                    'completed': stream.completed_count,
+                    'dropped': stream.dropped_count,
+                    'failed': stream.failed_count,
+                    'stale': stream.stale_count,
+                    'queued': len(stream.queue),
+                }
+            statistics[stream.name].update({
+                'latency': stream.latency.get_snapshot(),
+                'run_time': stream.run_time.get_snapshot(),
+            })
+        return statistics
+
+    def shutdown(self, wait=True):
+        """Shutdown the dispatcher.
+
+        The frames received later are dropped.
+
+        Args:
+            wait (bool): True to call the frames in queues before return. Default is True.
+        """
+        if wait:
+            self.join()
+        with self.__idle:
+            self.__closed = True
+            streams = list(self.__streams.values())
+        for stream in streams:
+            with stream.lock:
+                stream.dropped_count += len(stream.queue)
+                stream.queue.clear()
+                stream.not_full.notify_all()
+        self.__executor.shutdown(wait=wait)
+
+    def __is_idle(self):
+        return not any(stream.scheduled for stream in self.__streams.values())
+
+    def __dispatch(self, stream, frame):
+        received_time = time.monotonic()
+        serial_number = _get_serial_number(frame)
+        if self.__copy:
+            frame = _copy_frame(frame)
+        with stream.lock:
+            stream.received_count += 1
+            if self.__closed:
+                stream.dropped_count += 1
+                return
+            if (serial_number is not None
+                    and stream.last_serial_number is not None
+                    and serial_number <= stream.last_serial_number):
+                stream.stale_count += 1
+                return
+            if len(stream.queue) >= self.__capacity:
+                if self.__policy == self.DROP_NEWEST:
+                    stream.dropped_count += 1
+                    return
+                if self.__policy == self.DROP_OLDEST:
+                    stream.queue.popleft()
+                    stream.dropped_count += 1
+                else:
+                    stream.not_full.wait_for(lambda: len(
+                        stream.queue) < self.__capacity or self.__closed)
+                    if self.__closed:
+                        stream.dropped_count += 1
+                        return
+            stream.queue.append((frame, received_time))
+            if serial_number is not None:
+                stream.last_serial_number = serial_number
+            if stream.scheduled:
+                return
+            stream.scheduled = True
+        try:
+            self.__executor.submit(self.__run, stream)
+        except RuntimeError:  # Shut down without waiting after the check of closed.
+            with stream.lock:
+                stream.scheduled = False
+                stream.dropped_count += len(stream.queue)
+                stream.queue.clear()
+                stream.not_full.notify_all()
+            with self.__idle:
+                self.__idle.notify_all()
+
+    def __run(self, stream):
+        for _ in range(self.__batch):
+            with stream.lock:
+                if not stream.queue:
+                    stream.scheduled = False
+                    break
+                (frame, received_time) = stream.queue.popleft()
+                stream.not_full.notify()
+            start = time.monotonic()
+            failed = False
+            try:
+                stream.callback(frame)
+            except Exception:
+                failed = True
+                logger.exception("The {} callback is failed.".format(
+                    stream.name))
+            end = time.monotonic()
+            stream.run_time.record(end - start)
+            stream.latency.record(end - received_time)
+            with stream.lock:
+                stream.completed_count += 1
+                stream.failed_count += failed
+        else:
+            # Give the worker to the other streams, and continue later.
+            try:
+                self.__executor.submit(self.__run, stream)
+                return
+            except RuntimeError:  # Shut down without waiting.
+                with stream.lock:
+                    stream.scheduled = False
+        with self.__idle:
+            self.__idle.notify_all()
+
+
+def _get_serial_number(frame):
+    get_serial_number = getattr(frame, "get_serial_number", None)
+    return get_serial_number() if get_serial_number is not None else None
+
+
+def _copy_frame(frame):
+    # The frames of backend are copied by `clone` like the items of pipeline in C/C++.
+    if not hasattr(frame, "clone"):
+        return copy.deepcopy(frame)
+    item = type(frame)()
+    item.clone(frame)
+    return item
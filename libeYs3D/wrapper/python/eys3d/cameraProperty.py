@@ -1,4 +1,4 @@
-import eys3dPy
+from .backend import load_backend
 
 
 class CameraProperty:
@@ -11,10 +11,12 @@ class CameraProperty:
 
     Args:
         camera_device (obj): CameraDevice.
+        backend (str or module): The backend of camera_device. The default backend is used if None.
 
     """
-    def __init__(self, camera_device):
+    def __init__(self, camera_device, backend=None):
         self.__camera_device = camera_device
+        self.__backend = backend
 
     def enable_AE(self, ):
         """Enable auto exposure mode.
@@ -236,7 +238,7 @@ class CameraProperty:
         Returns:
             LIGHT_SOURCE_VALUE: VALUE_50HZ is 50 Hz, VALUE_60HZ is 60 Hz.
         """
-        return eys3dPy.LIGHT_SOURCE_VALUE(
+        return load_backend(self.__backend).LIGHT_SOURCE_VALUE(
             self.__camera_device.get_light_source_status())
 
     def set_light_source(self, value):
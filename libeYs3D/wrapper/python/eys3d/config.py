@@ -2,9 +2,11 @@ import os
 import numpy as np
 import json
 
-import eys3dPy
-from eys3d import logger, COLOR_RAW_DATA_TYPE, DEPTH_TRANSFER_CTRL, DEPTH_RAW_DATA_TYPE, USB_PORT_TYPE
+from .backend import load_backend
+from eys3d import logger
 from .utils import get_EYS3D_HOME
+from .mode_catalog import get_mode_catalog
+from .bandwidth import rank_modes
 
 
 class Config():
@@ -12,11 +14,17 @@ class Config():
 
     This class is to set the configuration of streaming.
     It could set the resolution and format of color and depth frame.
+
+    Args:
+        backend (str or module): The backend of the formats and modeConfig.db, e.g. "sim".
+            It is loaded at the first use. The default backend is used if None.
     """
-    def __init__(self, ):
+    def __init__(self, backend=None):
 
-        self.colorStreamFormat = COLOR_RAW_DATA_TYPE.COLOR_RAW_DATA_YUY2
-        self.depthStreamFormat = DEPTH_TRANSFER_CTRL.DEPTH_IMG_COLORFUL_TRANSFER
+        self.__backend = backend
+        eys3dPy = load_backend(backend)
+        self.colorStreamFormat = eys3dPy.COLOR_RAW_DATA_TYPE.COLOR_RAW_DATA_YUY2
+        self.depthStreamFormat = eys3dPy.DEPTH_TRANSFER_CTRL.DEPTH_IMG_COLORFUL_TRANSFER
         self.depthDataType = 0
         self.ep0Width = 0
         self.ep0Height = 0
@@ -176,10 +184,57 @@ class Config():
             pid (int): The product id of camera module. Please refer the PIF. It is availabel for integer or heximal.
             index (int): The mode index in modeConfig.db. 
         """
-        modeConfig = ModeConfig(pid, index, usb_type)
+        modeConfig = ModeConfig(pid, index, usb_type, self.__backend)
         mode_info = modeConfig.get_current_mode_info()
         self.__update_config(mode_info, pid)
 
+    def best_mode(self,
+                  pid,
+                  usb_type,
+                  min_fps=0,
+                  min_depth_res=None,
+                  depth_bits=None,
+                  need_color=False,
+                  bandwidth_budget=None):
+        """Set the mode config of the highest throughput which meets the requirements.
+
+        To select the mode without knowing the mode index.
+        It searches the modes in modeConfig.db and ranks them by the estimated USB bandwidth,
+        from the resolution, color format, fps and interleave mode. Please refer `bandwidth.rank_modes`.
+        The config is not changed if no mode meets the requirements.
+
+        Ex: conf.best_mode(pid, device.get_usb_type(), min_fps=30, need_color=True)
+
+        Args:
+            pid (int): The product id of camera module.
+            usb_type (int): The USB type. Please refer `Device.get_usb_type`.
+            min_fps (int): The minimum fps of each stream. Default is 0.
+            min_depth_res (tuple): The minimum (width, height) of depth. The depth is not required if None.
+            depth_bits (int): The required depth bits, 8, 11 or 14. The default of mode is taken if None.
+            need_color (bool): True if the color stream is required. Default is False.
+            bandwidth_budget (float): The maximum bytes per second. Default is the capacity of USB port.
+
+        Returns:
+            bool: True if a mode is selected.
+            dict: The selected candidate. Please refer `bandwidth.rank_modes`. It is None if not selected.
+        """
+        candidates = rank_modes(pid,
+                                usb_type,
+                                min_fps=min_fps,
+                                min_depth_res=min_depth_res,
+                                depth_bits=depth_bits,
+                                need_color=need_color,
+                                bandwidth_budget=bandwidth_budget,
+                                backend=self.__backend)
+        if not candidates:
+            logger.warning("No mode meets the requirements.")
+            return False, None
+        best = candidates[0]
+        self.__update_config(best['mode_info'], pid)
+        self.set_fps(best['fps'])
+        self.set_depth_data_type(best['depth_bits'])
+        return True, best
+
     def enable_rectify(self):
         self.rectify = True
 
@@ -187,6 +242,7 @@ class Config():
         self.rectify = False
 
     def __update_config(self, mode_info, pid):
+        COLOR_RAW_DATA_TYPE = load_backend(self.__backend).COLOR_RAW_DATA_TYPE
         self.pid = pid
         self.colorStreamFormat = COLOR_RAW_DATA_TYPE.COLOR_RAW_DATA_YUY2 if mode_info.eDecodeType_L == 0 else COLOR_RAW_DATA_TYPE.COLOR_RAW_DATA_MJPG
         self.ep0Height = mode_info.L_Resolution.Height
@@ -210,6 +266,7 @@ class Config():
         self,
         DepthData,
     ):
+        DEPTH_RAW_DATA_TYPE = load_backend(self.__backend).DEPTH_RAW_DATA_TYPE
         DEPTH_RAW_DATA_INTERLEAVE_MODE_OFFSET = 16  # refer video.h:28
         DEPTH_RAW_DATA_SCALE_DOWN_MODE_OFFSET = 32  # refer video.h:28
         if DepthData == 8:
@@ -225,10 +282,10 @@ class Config():
 
         if (self.pid == 0x120 or self.pid == 0x137) and 360 == self.ep1Height:  # This block for 8036/8052 scale down mode
             depth_data_bit = int(depth_data_bit) + DEPTH_RAW_DATA_SCALE_DOWN_MODE_OFFSET
-            depth_data_bit = eys3dPy.DEPTH_RAW_DATA_TYPE(depth_data_bit)
+            depth_data_bit = DEPTH_RAW_DATA_TYPE(depth_data_bit)
         if self.pid == 0x173 and 460 == self.ep1Height:  # This block for Hypatia2 scale down mode
             depth_data_bit = int(depth_data_bit) + DEPTH_RAW_DATA_SCALE_DOWN_MODE_OFFSET
-            depth_data_bit = eys3dPy.DEPTH_RAW_DATA_TYPE(depth_data_bit)
+            depth_data_bit = DEPTH_RAW_DATA_TYPE(depth_data_bit)
         if self.interleavefps == (self.ep0fps if self.ep0fps else self.ep1fps):  # ILM
             depth_data_bit = int(depth_data_bit) + DEPTH_RAW_DATA_INTERLEAVE_MODE_OFFSET
             depth_data_bit = DEPTH_RAW_DATA_TYPE(depth_data_bit)
@@ -240,32 +297,25 @@ class ModeConfig():
     """This class is to link database `modeConfig.db`.
 
     This class is to link database `modeConfig.db`.
+    The modes are got from the shared `ModeCatalog`, so the database is queried once per product id and USB type.
 
     Args:
         pid (hex): The product id of camera module. Please refer the PIF.
         index (int): The mode index in modeConfig.db. 
-        
+        usb_type (int): The USB type. 3 for USB 3, otherwise USB 2.
+        backend (str or module): The backend to read modeConfig.db. The default backend is used if None.
     """
-    def __init__(self, pid, index, usb_type):
-        # it's no meaning but just pass a argument.
-        self.__usb_type = USB_PORT_TYPE.USB_PORT_TYPE_3_0 if usb_type == 3 else USB_PORT_TYPE.USB_PORT_TYPE_2_0
+    def __init__(self, pid, index, usb_type, backend=None):
         self.__pid = pid
-        self.__maxIndex = 0
+        self.__catalog = get_mode_catalog(pid, usb_type, backend)
+        self.__maxIndex = self.__catalog.get_mode_count()
         self.__index = index
-
-        try:
-            self.__modeConfig = eys3dPy.ModeConfigOptions(self.__usb_type, pid)
-            self.__maxIndex = self.__modeConfig.get_mode_count()
-        except Exception as e:
-            logger.exception(e)
-            raise e
-        if self.__modeConfig.select_current_index(
-                self.__index) != 0:  # 0 is APC_OK in eSPDI_def.h
-            self.__index = self.__modeConfig.get_current_index()
+        if index not in self.__catalog:
+            self.__index = self.__catalog.get_first_index()
             logger.warning(
                 "Alert!!Index is not in database. Default is the first config setting."
             )
-        self.__mode_info = self.__modeConfig.get_current_mode_info()
+        self.__mode_info = self.__catalog.get_mode(self.__index)
 
     def get_current_index(self):
         """Get the index of current mode.
@@ -275,18 +325,16 @@ class ModeConfig():
         Returns:
             int: The index of current mode.
         """
-        current_index = self.__modeConfig.get_current_index()
-        self.__index = current_index
         return self.__index
 
     def get_current_mode_info(self):
         """Get the information of current mode.
 
         To get the information of current mode.
-        It return a object of `MODE_CONFIG`.
+        It return a immutable `ModeInfo` which has the attributes of `MODE_CONFIG`.
 
         Returns:
-            obj: The MODE_CONFIG. It contains 
+            obj: The ModeInfo. It contains 
                 * iMode
                 * iUSB_Type
                 * iInterLeaveModeFPS
@@ -313,13 +361,20 @@ class ModeConfig():
     def get_modes(self):
         """Get the modes.
 
-        To Get the modes.
-        It is not to be implemented.
+        To Get the modes of camera module in modeConfig.db.
 
-        Raise:
-            NotImplementedError:
+        Returns:
+            tuple: The ModeInfo of modes in the order of modeConfig.db.
         """
-        raise NotImplementedError
+        return self.__catalog.get_modes()
+
+    def get_catalog(self):
+        """Get the mode catalog.
+
+        Returns:
+            obj: The class ModeCatalog. Please refer `ModeCatalog.find` to look up the modes.
+        """
+        return self.__catalog
 
     @logger.catch()
     def select_current_index(self, index):
@@ -334,13 +389,11 @@ class ModeConfig():
         Raises:
             IndexError: If no index in modeConfig.db.
         """
-        if self.__modeConfig.select_current_index(
-                index) != 0:  # 0 is APC_OK in eSPDI_def.h
+        mode_info = self.__catalog.get_mode(index)
+        if mode_info is None:
             raise IndexError
-        self.__mode_info = self.__update_mode_info()
-
-    def __update_mode_info(self):
-        return self.__modeConfig.get_current_mode_info()
+        self.__index = index
+        self.__mode_info = mode_info
 
 
 class RectLogData:
@@ -0,0 +1,480 @@
+import collections
+import threading
+
+import numpy as np
+
+__all__ = [
+    "roi_stats", "get_roi_bounds", "as_z_map", "DepthIntegral",
+    "IntegralImageCache", "DepthDataType", "get_depth_data_type",
+    "get_raw_depth", "zd_table_from_bytes", "zd_table_from_frame", "raw_to_z"
+]
+
+# The offsets of DEPTH_RAW_DATA_TYPE. Please refer video.h.
+DEPTH_RAW_DATA_INTERLEAVE_MODE_OFFSET = 16
+DEPTH_RAW_DATA_SCALE_DOWN_MODE_OFFSET = 32
+
+# The (bits, bytes per pixel, rectify) of DEPTH_RAW_DATA_TYPE without offsets. Please refer video.h.
+_DEPTH_DATA_TYPES = {
+    0: (0, 0, False),  # DEPTH_RAW_DATA_OFF_RAW
+    1: (8, 1, True),  # DEPTH_RAW_DATA_8_BITS
+    2: (14, 2, True),  # DEPTH_RAW_DATA_14_BITS
+    3: (8, 2, True),  # DEPTH_RAW_DATA_8_BITS_x80, 2 bytes per pixel but using 1 byte only
+    4: (11, 2, True),  # DEPTH_RAW_DATA_11_BITS
+    5: (0, 0, True),  # DEPTH_RAW_DATA_OFF_RECTIFY
+    6: (8, 1, False),  # DEPTH_RAW_DATA_8_BITS_RAW
+    7: (14, 2, False),  # DEPTH_RAW_DATA_14_BITS_RAW
+    8: (8, 2, False),  # DEPTH_RAW_DATA_8_BITS_x80_RAW
+    9: (11, 2, False),  # DEPTH_RAW_DATA_11_BITS_RAW
+    11: (14, 2, True),  # DEPTH_RAW_DATA_14_BITS_COMBINED_RECTIFY
+    13: (11, 2, True),  # DEPTH_RAW_DATA_11_BITS_COMBINED_RECTIFY
+}
+
+DepthDataType = collections.namedtuple(
+    "DepthDataType",
+    ["bits", "bytes_per_pixel", "rectify", "interleave", "scale_down"])
+
+
+def as_z_map(frame_or_zmap, shape=None):
+    """Get the z value of depth frame as an image without copying.
+
+    Args:
+        frame_or_zmap (obj): The depth frame (eys3dPy.Frame or FrameView), the z value image of shape (H, W),
+            or the flat ZD buffer from `get_depth_ZD_value()`.
+        shape (tuple): The (H, W) of flat ZD buffer. It is not needed for frame or image.
+
+    Returns:
+        np.array: The z value image. The shape is (H, W). It refers to the buffer of frame.
+
+    Raises:
+        ValueError: The shape of flat ZD buffer is unknown.
+    """
+    if hasattr(frame_or_zmap, "get_depth_ZD_image"):  # FrameView
+        return frame_or_zmap.get_depth_ZD_image()
+    if hasattr(frame_or_zmap, "get_depth_ZD_value"):
+        shape = (frame_or_zmap.get_height(), frame_or_zmap.get_width())
+        frame_or_zmap = frame_or_zmap.get_depth_ZD_value()
+    z_map = np.asarray(frame_or_zmap)
+    if z_map.ndim == 2:
+        return z_map
+    if shape is None:
+        raise ValueError("The shape is needed for the flat ZD buffer.")
+    # Slicing and reshaping the contiguous buffer do not copy.
+    return z_map.reshape(-1)[:shape[0] * shape[1]].reshape(shape)
+
+
+def get_roi_bounds(center, size, shape):
+    """Get the bounds of ROI in image.
+
+    The ROI is centered at `center`. It is shifted into the image if it crosses the border,
+    the same as the depth ROI of `cv_demo`.
+
+    Args:
+        center (tuple): The (x, y) of center.
+        size (int or tuple): The size of square ROI, or the (width, height) of ROI.
+        shape (tuple): The (H, W) of image.
+
+    Returns:
+        tuple: The (x1, y1, x2, y2) of ROI. x2 and y2 are exclusive.
+    """
+    (height, width) = shape[:2]
+    (roi_width, roi_height) = (size, size) if np.isscalar(size) else size
+    roi_width = int(min(max(roi_width, 1), width))
+    roi_height = int(min(max(roi_height, 1), height))
+    x1 = int(min(max(center[0] - roi_width // 2, 0), width - roi_width))
+    y1 = int(min(max(center[1] - roi_height // 2, 0), height - roi_height))
+    return (x1, y1, x1 + roi_width, y1 + roi_height)
+
+
+def roi_stats(frame_or_zmap, center, size, shape=None):
+    """Get the statistics of z value in ROI.
+
+    The pixel without depth (z value is 0) is not counted.
+    The statistics are computed by NumPy on the ROI view of the ZD buffer, so the frame is not copied.
+
+    Args:
+        frame_or_zmap (obj): The depth frame, the z value image or the flat ZD buffer. Please refer `as_z_map`.
+        center (tuple): The (x, y) of center of ROI.
+        size (int or tuple): The size of square ROI, or the (width, height) of ROI.
+        shape (tuple): The (H, W) of flat ZD buffer. It is not needed for frame or image.
+
+    Returns:
+        dict: The statistics in millimeters. The key is following:
+            * mean: The mean of z value.
+            * median: The median of z value.
+            * min: The minimum of z value.
+            * max: The maximum of z value.
+            * stddev: The standard deviation of z value.
+            * valid_count: The number of pixels with depth.
+            * count: The number of pixels in ROI.
+            * bounds: The (x1, y1, x2, y2) of ROI. Please refer `get_roi_bounds`.
+        All of the values of z are 0 if no pixel has depth.
+    """
+    z_map = as_z_map(frame_or_zmap, shape)
+    bounds = get_roi_bounds(center, size, z_map.shape)
+    (x1, y1, x2, y2) = bounds
+    roi = z_map[y1:y2, x1:x2]
+    valid = roi[roi > 0]
+    stats = {
+        'mean': 0.0,
+        'median': 0.0,
+        'min': 0,
+        'max': 0,
+        'stddev': 0.0,
+        'valid_count': int(valid.size),
+        'count': int(roi.size),
+        'bounds': bounds,
+    }
+    if valid.size:
+        values = valid.astype(np.float64)
+        stats.update({
+            'mean': float(values.mean()),
+            'median': float(np.median(values)),
+            'min': int(valid.min()),
+            'max': int(valid.max()),
+            'stddev': float(values.std()),
+        })
+    return stats
+
+
+class DepthIntegral:
+    """This class provides the statistics of many ROIs of one depth frame in O(1) each.
+
+    It keeps the summed-area tables of z value, square of z value and count of pixels with depth.
+    The sum over any box is looked up by 4 corners of table, so the mean and variance of each ROI
+    do not depend on the size of ROI. The tables are built at the first query,
+    so the frame should not be reused, e.g. returned to pool, before it.
+
+    The pixel without depth (z value is 0) is not counted.
+    The median, minimum and maximum are not provided. Please use `roi_stats` for them.
+
+    Args:
+        frame_or_zmap (obj): The depth frame, the z value image or the flat ZD buffer. Please refer `as_z_map`.
+        shape (tuple): The (H, W) of flat ZD buffer. It is not needed for frame or image.
+        serial_number (int): The serial number of frame. It is got from frame if None.
+    """
+    def __init__(self, frame_or_zmap, shape=None, serial_number=None):
+        if serial_number is None and hasattr(frame_or_zmap,
+                                             "get_serial_number"):
+            serial_number = frame_or_zmap.get_serial_number()
+        self.__serial_number = serial_number
+        self.__z_map = as_z_map(frame_or_zmap, shape)
+        self.__tables = None
+        self.__lock = threading.Lock()
+
+    def get_serial_number(self):
+        return self.__serial_number
+
+    def get_shape(self):
+        return self.__z_map.shape
+
+    def box_stats(self, boxes):
+        """Get the statistics of z value in boxes.
+
+        Args:
+            boxes (np.array): The boxes of shape (N, 4). Each box is (x1, y1, x2, y2) and x2, y2 are exclusive.
+                The box is clipped by the image.
+
+        Returns:
+            dict: The arrays of statistics of shape (N,). The key is following:
+                * mean: The mean of z value in millimeters.
+                * stddev: The standard deviation of z value in millimeters.
+                * variance: The variance of z value.
+                * sum: The sum of z value.
+                * valid_count: The number of pixels with depth.
+                * count: The number of pixels in box.
+            The mean and variance are 0 if no pixel has depth.
+        """
+        (z_sum, z_square_sum, valid_count) = self.__get_tables()
+        (height, width) = self.__z_map.shape
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        x1 = np.clip(boxes[:, 0], 0, width)
+        y1 = np.clip(boxes[:, 1], 0, height)
+        x2 = np.clip(boxes[:, 2], x1, width)
+        y2 = np.clip(boxes[:, 3], y1, height)
+
+        def lookup(table):
+            return table[y2, x2] - table[y1, x2] - table[y2, x1] + table[y1,
+                                                                         x1]
+
+        total = lookup(z_sum)
+        square_total = lookup(z_square_sum)
+        valid = lookup(valid_count)
+        divisor = np.maximum(valid, 1)
+        mean = np.where(valid > 0, total / divisor, 0.0)
+        variance = np.where(valid > 0,
+                            np.maximum(square_total / divisor - mean**2, 0.0),
+                            0.0)
+        return {
+            'mean': mean,
+            'stddev': np.sqrt(variance),
+            'variance': variance,
+            'sum': total,
+            'valid_count': valid,
+            'count': (x2 - x1) * (y2 - y1),
+        }
+
+    def roi_stats(self, center, size):
+        """Get the statistics of z value in ROI.
+
+        Args:
+            center (tuple): The (x, y) of center of ROI.
+            size (int or tuple): The size of square ROI, or the (width, height) of ROI.
+
+        Returns:
+            dict: The statistics. The key is `mean`, `stddev`, `variance`, `sum`, `valid_count`, `count`
+                and `bounds`. Please refer `box_stats` and `get_roi_bounds`.
+        """
+        bounds = get_roi_bounds(center, size, self.__z_map.shape)
+        stats = dict((key, value[0].item())
+                     for key, value in self.box_stats([bounds]).items())
+        stats['bounds'] = bounds
+        return stats
+
+    def __get_tables(self):
+        with self.__lock:
+            if self.__tables is None:
+                self.__tables = self.__build_tables()
+            return self.__tables
+
+    def __build_tables(self):
+        # The tables are padded with a row and a column of 0, so the box from 0 needs no special case.
+        # The sum of square fits in float64 exactly for the image up to 2 mega pixels.
+        z = self.__z_map.astype(np.float64)
+        tables = []
+        for values, dtype in ((z, np.float64), (z * z, np.float64),
+                              (self.__z_map > 0, np.int64)):
+            table = np.zeros((z.shape[0] + 1, z.shape[1] + 1), dtype=dtype)
+            np.cumsum(values, axis=0, dtype=dtype, out=table[1:, 1:])
+            np.cumsum(table[1:, 1:], axis=1, dtype=dtype, out=table[1:, 1:])
+            tables.append(table)
+        return tuple(tables)
+
+
+class IntegralImageCache:
+    """This class caches the DepthIntegral of recent depth frames by serial number.
+
+    The frame from pipeline could be reused for the next frame, e.g. in pool mode,
+    so the cache is keyed by the `serialNumber` of frame instead of the frame object.
+    When a frame of new serial number is queried, the oldest entry is evicted.
+
+    Example:
+        cache = IntegralImageCache()
+        stats = cache.get(dframe).box_stats(boxes)
+
+    Args:
+        capacity (int): The number of frames kept. Default is 2.
+    """
+    def __init__(self, capacity=2):
+        if capacity <= 0:
+            raise ValueError("The capacity should be positive.")
+        self.__capacity = capacity
+        self.__entries = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, frame, shape=None, serial_number=None):
+        """Get the DepthIntegral of depth frame.
+
+        Args:
+            frame (obj): The depth frame, the z value image or the flat ZD buffer. Please refer `as_z_map`.
+            shape (tuple): The (H, W) of flat ZD buffer. It is not needed for frame or image.
+            serial_number (int): The serial number of frame. It is needed if frame is an image or buffer.
+
+        Returns:
+            obj: The class DepthIntegral.
+        """
+        if serial_number is None:
+            serial_number = frame.get_serial_number()
+        with self.__lock:
+            integral = self.__entries.get(serial_number)
+            if integral is not None:
+                self.__entries.move_to_end(serial_number)
+                return integral
+            integral = DepthIntegral(frame, shape, serial_number)
+            self.__entries[serial_number] = integral
+            while len(self.__entries) > self.__capacity:
+                self.__entries.popitem(last=False)
+            return integral
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+
+def get_depth_data_type(depth_format):
+    """Get the depth bits and the modes of depth data type.
+
+    It is the reverse of `Config.__DepthDataToFormatType`, including the interleave and scale down offsets.
+
+    Args:
+        depth_format (int): The DEPTH_RAW_DATA_TYPE, e.g. `dataFormat` of depth frame or `depthFormat` of config.
+
+    Returns:
+        obj: The DepthDataType. It contains
+            * bits: 8, 11 or 14. It is 0 if the depth is off.
+            * bytes_per_pixel: The bytes of each pixel in raw data.
+            * rectify: True if rectified.
+            * interleave: True if in interleave mode.
+            * scale_down: True if in scale down mode.
+
+    Raises:
+        ValueError: The depth data type is unknown.
+    """
+    value = int(depth_format)
+    scale_down = value >= DEPTH_RAW_DATA_SCALE_DOWN_MODE_OFFSET
+    value %= DEPTH_RAW_DATA_SCALE_DOWN_MODE_OFFSET
+    interleave = value >= DEPTH_RAW_DATA_INTERLEAVE_MODE_OFFSET
+    value %= DEPTH_RAW_DATA_INTERLEAVE_MODE_OFFSET
+    if value not in _DEPTH_DATA_TYPES:
+        raise ValueError(
+            "The depth data type {} is unknown.".format(depth_format))
+    (bits, bytes_per_pixel, rectify) = _DEPTH_DATA_TYPES[value]
+    return DepthDataType(bits, bytes_per_pixel, rectify, interleave,
+                         scale_down)
+
+
+def get_raw_depth(frame_or_data, depth_format=None, shape=None):
+    """Get the raw depth of frame as an image without copying.
+
+    The raw depth is the disparity of 8 and 11 bits, or the z value of 14 bits, before the ZD table.
+
+    Args:
+        frame_or_data (obj): The depth frame (eys3dPy.Frame, FrameView or recorded frame),
+            or the flat raw data from `get_data()`.
+        depth_format (int): The DEPTH_RAW_DATA_TYPE. It is `dataFormat` of frame if None.
+        shape (tuple): The (H, W) of flat raw data. It is not needed for frame.
+
+    Returns:
+        np.array: The raw depth image. The shape is (H, W) and dtype is uint8 or uint16.
+            The unused bits are not masked. Please refer `raw_to_z`.
+
+    Raises:
+        ValueError: The shape or the depth data type is unknown.
+    """
+    frame = frame_or_data
+    if hasattr(frame, "get_raw_data"):  # FrameView
+        frame = frame.get_frame()
+    if hasattr(frame, "get_data"):
+        shape = (frame.get_height(), frame.get_width())
+        if depth_format is None:
+            depth_format = frame.dataFormat
+        frame_or_data = frame.get_data()
+    if depth_format is None:
+        raise ValueError("The depth data type is needed for raw data.")
+    if shape is None:
+        raise ValueError("The shape is needed for the flat raw data.")
+    data_type = get_depth_data_type(depth_format)
+    if not data_type.bits:
+        raise ValueError("The depth is off.")
+    (height, width) = shape
+    data = np.asarray(frame_or_data, dtype=np.uint8).reshape(-1)
+    data = data[:height * width * data_type.bytes_per_pixel]
+    if data_type.bytes_per_pixel == 2:
+        data = data.view("<u2")
+    return data.reshape(height, width)
+
+
+def zd_table_from_bytes(data):
+    """Convert the ZD table in bytes to the array.
+
+    The ZD table of device and frame (`nZDTable` in Frame.h) is 2 bytes per entry in big endian.
+
+    Args:
+        data (bytes or array): The ZD table in bytes.
+
+    Returns:
+        np.array: The z value in millimeter by disparity. The dtype is uint16.
+    """
+    return np.frombuffer(bytes(bytearray(data)), dtype=">u2").astype(np.uint16)
+
+
+def zd_table_from_frame(frame, depth_format=None):
+    """Derive the ZD table from the raw depth and the z value of depth frame.
+
+    The native binding exposes the raw depth (`get_data`) and the z value (`get_depth_ZD_value`)
+    of depth frame, but not the ZD table itself. The table is rebuilt from the pairs of them:
+        * The entries of the disparities in the frame are their z values, so they are exact.
+        * The other entries follow Z = K / disparity as the ZD table of device, where K is
+          the median of z * disparity in the frame.
+    The 14 bits raw depth is the z value, so its table is the identity.
+
+    Args:
+        frame (obj): The depth frame (eys3dPy.Frame or FrameView).
+        depth_format (int): The DEPTH_RAW_DATA_TYPE. It is `dataFormat` of frame if None.
+
+    Returns:
+        np.array: The z value in millimeter by disparity. The dtype is uint16.
+            The size is 2 ** bits of the raw depth, e.g. 2048 for 11 bits.
+
+    Raises:
+        ValueError: The frame has no depth, or the depth data type is unknown.
+    """
+    if hasattr(frame, "get_raw_data"):  # FrameView
+        frame = frame.get_frame()
+    if depth_format is None:
+        depth_format = frame.dataFormat
+    bits = get_depth_data_type(depth_format).bits
+    if bits == 14:
+        return np.arange(1 << 14, dtype=np.uint16)
+    raw = get_raw_depth(frame, depth_format).reshape(-1)
+    disparity = np.bitwise_and(raw, (1 << bits) - 1, dtype=np.intp)
+    z = np.asarray(frame.get_depth_ZD_value(),
+                   dtype=np.uint16)[:disparity.size]
+    valid = (disparity > 0) & (z > 0)
+    if not valid.any():
+        raise ValueError("The frame has no depth to derive the ZD table.")
+    (disparity, z) = (disparity[valid], z[valid])
+    k = np.median(z * disparity.astype(np.float64))
+    zd_table = np.zeros(1 << bits, dtype=np.uint16)
+    zd_table[1:] = np.clip(np.rint(k / np.arange(1, 1 << bits)), 0, 0xFFFF)
+    zd_table[disparity] = z
+    return zd_table
+
+
+def raw_to_z(raw_depth, zd_table, depth_format=None, out=None):
+    """Convert the raw depth to the z value by ZD table.
+
+    It looks up the ZD table by `np.take` over the whole frame, the same as `getZValue` in Frame.h:
+        * 8 bits and 11 bits: The disparity is the index of ZD table. The 8 bits disparity is scaled
+          to the index if the table is of 11 bits, e.g. the ZD table of device.
+        * 14 bits: The raw depth is the z value. The ZD table is not used.
+    The unused bits of pixel, e.g. the high byte of 8 bits x80, are masked.
+    The interleave and scale down modes do not change the conversion. The scale down depth is
+    of the size of frame, which is smaller than the resolution of mode.
+
+    Example:
+        reader = FrameSetReader("record.eys3d")
+        zd_table = device.get_zd_table(depth_frame)  # A depth frame of the opened stream
+        for frameset in reader:
+            z_map = raw_to_z(frameset.depth_frame, zd_table)
+
+    Args:
+        raw_depth (obj): The depth frame, or the raw depth image from `get_raw_depth`.
+        zd_table (np.array): The ZD table. Please refer `Device.get_zd_table`.
+        depth_format (int): The DEPTH_RAW_DATA_TYPE. It is `dataFormat` of frame if None.
+            The image of uint8 is taken as 8 bits, and uint16 as 11 bits if both are None.
+        out (np.array): The uint16 array to write. A new array is allocated if None.
+
+    Returns:
+        np.array: The z value in millimeter. The shape is (H, W) and dtype is uint16.
+    """
+    if hasattr(raw_depth, "get_raw_data"):  # FrameView
+        raw_depth = raw_depth.get_frame()
+    if hasattr(raw_depth, "get_data"):
+        if depth_format is None:
+            depth_format = raw_depth.dataFormat
+        raw_depth = get_raw_depth(raw_depth, depth_format)
+    raw_depth = np.asarray(raw_depth)
+    if depth_format is not None:
+        bits = get_depth_data_type(depth_format).bits
+    else:
+        bits = 8 if raw_depth.dtype == np.uint8 else 11
+    if out is None:
+        out = np.empty(raw_depth.shape, dtype=np.uint16)
+    if bits == 14:
+        return np.bitwise_and(raw_depth, (1 << 14) - 1, out=out)
+    zd_table = np.asarray(zd_table)
+    index = np.bitwise_and(raw_depth, (1 << bits) - 1, dtype=np.intp)
+    table_bits = int(len(zd_table)).bit_length() - 1
+    if table_bits > bits:
+        np.left_shift(index, table_bits - bits, out=index)
+    return np.take(zd_table, index, out=out, mode="clip")
@@ -1,4 +1,3 @@
-import eys3dPy
 from eys3d import logger
 
 class DepthAccuracy:
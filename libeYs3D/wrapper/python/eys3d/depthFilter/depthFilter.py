@@ -1,4 +1,3 @@
-import eys3dPy
 from eys3d import logger
 from .holeFill import HoleFill
 from .edgePreServingFilter import EdgePreServingFilter
@@ -1,7 +1,7 @@
 import json
 import numpy as np
 
-import eys3dPy
+from .backend import load_backend
 from eys3d import logger
 from .depthFilter import DepthFilterOptions
 from .depthAccuracy import DepthAccuracy
@@ -9,6 +9,9 @@ from .cameraProperty import CameraProperty
 from .irProperty import IRProperty
 from .config import RectLogData
 from .register import RegisterOptions
+from .depth import (IntegralImageCache, zd_table_from_bytes,
+                    zd_table_from_frame)
+from .pointcloud import get_ray_table_key, ray_table_cache
 
 __all__ = ["Device"]
 
@@ -19,10 +22,16 @@ class EYS3DSystem:
     This class is to initialize eys3d system.
     It creates a system and search eys3d camera module by query usb port.
     Then, it creates device instance by object.
+
+    Args:
+        backend (str or module): The backend of system, `native` or `sim`. Please refer `load_backend`.
+            The default backend is used if None.
     """
-    def __init__(self):
+    def __init__(self, backend=None):
+        self.backend = load_backend(backend)
         #self.system = eys3dPy.System.get_eys3d_system()
-        self.system = eys3dPy.System(eys3dPy.COLOR_BYTE_ORDER.COLOR_BGR24)
+        self.system = self.backend.System(
+            self.backend.COLOR_BYTE_ORDER.COLOR_BGR24)
 
     def get_camera_device(self, camera_index):
         """Get the eys3d camera device.
@@ -44,6 +53,14 @@ class EYS3DSystem:
     def dump_system_info(self):
         self.system.dump_system_info()
 
+    def get_backend(self):
+        """Get the backend of system.
+
+        Returns:
+            module: The backend module, e.g. eys3dPy.
+        """
+        return self.backend
+
 
 class Device(object):
     """The class is the function related to eys3d api function.
@@ -60,12 +77,22 @@ class Device(object):
 
     Args:
         device_index (int): Index for device would like to initialize.
+        system (obj): The EYS3DSystem to search the device. A new one is created if None.
+            It should be shared when opening several devices.
+        backend (str or module): The backend of new EYS3DSystem, `native` or `sim`.
+            It is ignored if system is provided. The default backend is used if None.
     """
-    def __init__(self, camera_index=0):
-        self.__system = EYS3DSystem()
+    def __init__(self, camera_index=0, system=None, backend=None):
+        self.__system = system if system is not None else EYS3DSystem(backend)
+        self.__backend = self.__system.get_backend()
         self.__camera_device = self.__system.get_camera_device(camera_index)
         self.__camera_index = camera_index
         self.__rectLogIndex = 0
+        self.__integral_image_cache = IntegralImageCache()
+        self.__depth_resolution = None
+        self.__ray_table_keys = {}  # (nRectifyLogIndex, width, height): key in ray_table_cache
+        self.__depth_format = None
+        self.__zd_table = (None, None)
 
         if self.__camera_device is None:
             raise Exception("The depth camera device is not found")
@@ -73,6 +100,16 @@ class Device(object):
     def dump_system_info(self):
         self.__system.dump_system_info()
 
+    def get_backend(self):
+        """Get the backend of device.
+
+        To get the backend module which creates the frames and pipelines of device.
+
+        Returns:
+            module: The backend module, e.g. eys3dPy.
+        """
+        return self.__backend
+
     def get_device_index(self):
         """Get the index of user-provided camera device.
 
@@ -90,7 +127,8 @@ class Device(object):
                     colorFrameCallback=None,
                     depthFrameCallback=None,
                     PCFrameCallback=None,
-                    IMUDataCallback=None):
+                    IMUDataCallback=None,
+                    dispatcher=None):
         """Open camera device with Config and callback function.
 
         It would call APC_OpenDevice by stream setting.
@@ -102,12 +140,21 @@ class Device(object):
             depthFrameCallback (function): The callback function of depth frame. User could define the callback function. If none, the device could not enable depth streaming.
             PCFrameCallback (function): The callback function of point cloud frame. User could define the callback function. If none, the device could not enable point cloud streaming.
             IMUDataCallback (function): The callback function of IMU sensor data. User could define the callback function. If none, the device could not enable IMU streaming.
+            dispatcher (obj): The class CallbackDispatcher to run the callbacks on its workers instead of the producer threads of device.
+                The callbacks run on the producer threads if None.
         """
+        if dispatcher is not None:
+            (colorFrameCallback, depthFrameCallback, PCFrameCallback,
+             IMUDataCallback) = dispatcher.wrap_callbacks(
+                 colorFrameCallback, depthFrameCallback, PCFrameCallback,
+                 IMUDataCallback)
         try:
             conf = config.get_config()
         except Exception as e:
             raise e
         self.__rectLogIndex = rectLogIndex
+        self.__depth_resolution = (conf['depthWidth'], conf['depthHeight'])
+        self.__depth_format = conf['depthFormat']
         # open device whit init_stream
         self.__camera_device.init_stream(
             conf['colorFormat'],
@@ -118,7 +165,7 @@ class Device(object):
             conf['depthWidth'],
             conf['depthHeight'],
             conf['depthStreamFormat'],  # depthDataTransferCtrl
-            eys3dPy.CONTROL_MODE.IMAGE_SN_SYNC,  # ctrlMode
+            self.__backend.CONTROL_MODE.IMAGE_SN_SYNC,  # ctrlMode
             self.__rectLogIndex,  # #rectifyLogIndex
             colorFrameCallback,  # colorImageCallback
             depthFrameCallback,  # depthImageCallback
@@ -132,6 +179,8 @@ class Device(object):
 
     def open_device_with_pipeline(self, config, sync=0):
         conf = config.get_config()
+        self.__depth_resolution = (conf['depthWidth'], conf['depthHeight'])
+        self.__depth_format = conf['depthFormat']
         if sync:
             pipeline = self.__camera_device.init_stream_with_frameset(
                 conf['colorFormat'],
@@ -142,7 +191,7 @@ class Device(object):
                 conf['depthWidth'],
                 conf['depthHeight'],
                 conf['depthStreamFormat'],  # depthDataTransferCtrl
-                eys3dPy.CONTROL_MODE.IMAGE_SN_SYNC,  # ctrlMode
+                self.__backend.CONTROL_MODE.IMAGE_SN_SYNC,  # ctrlMode
                 self.__rectLogIndex,  # #rectifyLogIndex
             )
         else:
@@ -155,7 +204,7 @@ class Device(object):
                 conf['depthWidth'],
                 conf['depthHeight'],
                 conf['depthStreamFormat'],  # depthDataTransferCtrl
-                eys3dPy.CONTROL_MODE.IMAGE_SN_SYNC,  # ctrlMode
+                self.__backend.CONTROL_MODE.IMAGE_SN_SYNC,  # ctrlMode
                 self.__rectLogIndex,  # #rectifyLogIndex
             )
         if conf['actualFps'] == conf['ILM']:
@@ -260,21 +309,117 @@ class Device(object):
     def get_rectify_mat_log_data(self, nRectifyLogIndex=None):
         if nRectifyLogIndex is None:
             nRectifyLogIndex = self.__rectLogIndex
-        return RectLogData(self.__camera_device.get_rectify_log_data(),
-                           nRectifyLogIndex)  #nRectifyLogIndex)
+        rect_log_data = RectLogData(
+            self.__camera_device.get_rectify_log_data(),
+            nRectifyLogIndex)  #nRectifyLogIndex)
+        # Prepare the ray table of depth stream once for the 3D consumers.
+        if self.__depth_resolution is not None and all(
+                self.__depth_resolution):
+            (width, height) = self.__depth_resolution
+            ray_table_cache.get_or_create(
+                self.__get_ray_table_key(rect_log_data, width, height),
+                rect_log_data, width, height)
+        return rect_log_data
+
+    def get_ray_table(self, width=None, height=None, nRectifyLogIndex=None):
+        """Get the ray table of depth to convert depth to point cloud.
+
+        The table is cached by `pointcloud.get_ray_table_key` in `pointcloud.ray_table_cache`,
+        so it is shared with `pointcloud.depth_to_points`. It is created from rectify log data only if not cached.
+
+        Args:
+            width (int): The width of depth. The depth stream of device is used if None.
+            height (int): The height of depth. The depth stream of device is used if None.
+            nRectifyLogIndex (int): The index of rectify log. The index of opened stream is used if None.
+
+        Returns:
+            obj: The class RayTable. Please refer `pointcloud.depth_to_points`.
+
+        Raises:
+            ValueError: The resolution is not provided and the device is not opened.
+        """
+        if width is None or height is None:
+            if self.__depth_resolution is None:
+                raise ValueError(
+                    "The resolution is needed if the device is not opened.")
+            (width, height) = self.__depth_resolution
+        if nRectifyLogIndex is None:
+            nRectifyLogIndex = self.__rectLogIndex
+        key = self.__ray_table_keys.get((nRectifyLogIndex, width, height))
+        table = ray_table_cache.get(key) if key is not None else None
+        if table is None:
+            rect_log_data = self.get_rectify_mat_log_data(nRectifyLogIndex)
+            table = ray_table_cache.get_or_create(
+                self.__get_ray_table_key(rect_log_data, width, height),
+                rect_log_data, width, height)
+        return table
+
+    def __get_ray_table_key(self, rect_log_data, width, height):
+        # The key is remembered, so the rectify log is not read again for the cached table.
+        key = get_ray_table_key(rect_log_data, width, height)
+        self.__ray_table_keys[(rect_log_data.rectifyLogIndex, width,
+                               height)] = key
+        return key
+
+    def get_zd_table(self, frame=None):
+        """Get the ZD table of depth stream as array.
+
+        To convert the raw disparity to z value in Python, e.g. the raw depth recorded.
+        Please refer `depth.raw_to_z`. The ZD table depends on the mode,
+        so it is cached by the ZD table index, resolution and depth data type of opened stream.
+
+        The table is read from `nZDTable` of the frame, or from `CameraDevice.get_zd_table` of backend.
+        The native eys3dPy binding exposes neither of them yet, so the table is derived from
+        the raw depth and the z value of the frame. Please refer `depth.zd_table_from_frame`.
+        On native, the frame is needed for the first call after the device is opened.
+
+        Args:
+            frame (obj): The depth frame of the opened stream. It is not needed if the table is cached,
+                or the backend provides the table, e.g. the simulator.
+
+        Returns:
+            np.array: The z value in millimeter by disparity. The dtype is uint16.
+
+        Raises:
+            ValueError: The ZD table is not available, e.g. no frame is given on native,
+                or the frame has no depth.
+        """
+        zd_table = getattr(frame, "nZDTable", None)
+        if zd_table is not None and len(zd_table):
+            return zd_table_from_bytes(zd_table)
+        if self.__depth_resolution is None:
+            if frame is None:
+                raise ValueError(
+                    "The ZD table is available after the device is opened, or from depth frame.")
+            return zd_table_from_frame(frame)
+        key = (self.__get_zdtable_index(), self.__depth_resolution,
+               int(self.__depth_format))
+        (cached_key, zd_table) = self.__zd_table
+        if cached_key == key:
+            return zd_table
+        if hasattr(self.__camera_device, "get_zd_table"):
+            zd_table = zd_table_from_bytes(self.__camera_device.get_zd_table())
+        elif frame is not None:
+            zd_table = zd_table_from_frame(frame)
+        else:
+            raise ValueError(
+                "The backend does not provide the ZD table of device. Please get it with depth frame.")
+        zd_table.flags.writeable = False
+        self.__zd_table = (key, zd_table)
+        return zd_table
 
     @logger.catch()
     def __get_zdtable_index(self):
         try:
-            return eys3dPy.get_zdtable_index()
+            return self.__backend.get_zdtable_index()
         except ValueError as e:
             raise e
 
     def get_usb_type(self, ):
         usb_type = self.__camera_device.get_usb_port_type()
-        if usb_type == eys3dPy.USB_PORT_TYPE.USB_PORT_TYPE_3_0:
+        if usb_type == self.__backend.USB_PORT_TYPE.USB_PORT_TYPE_3_0:
             return 3
-        elif usb_type == eys3dPy.USB_PORT_TYPE.USB_PORT_TYPE_2_0:
+        elif usb_type == self.__backend.USB_PORT_TYPE.USB_PORT_TYPE_2_0:
             return 2
         else:
             return 0  # eys3dPy.USB_PORT_TYPE.USB_PORT_TYPE_UNKNOW
@@ -307,7 +452,7 @@ class Device(object):
         To get the class of CameraProperty.
         User could read description on `cameraProperty.py` in detail.
         """
-        return CameraProperty(self.__camera_device)
+        return CameraProperty(self.__camera_device, self.__backend)
 
     def get_IRProperty(self, ):
         return IRProperty(self.__camera_device)
@@ -385,6 +530,7 @@ class Device(object):
         Dump frame information to `~/.eYs3D/frames`.
         Notice:
             It needed a time to write log when called.
+            Please use `DumpService.dump_frame_info` to run it in background.
 
         Args:
             count (int): This is amount of recorded data.Default is 60.
@@ -440,6 +586,21 @@ class Device(object):
         """
         self.__camera_device.set_septh_roi_pixels(count)
 
+    def get_depth_integral(self, frame):
+        """Get the summed-area tables of depth frame to query many ROIs.
+
+        The depth ROI of device supports only one ROI.
+        To query many ROIs of a depth frame, e.g. the boxes of objects, in O(1) each.
+        The tables are built once for the serial number of frame and cached for the recent frames.
+
+        Args:
+            frame (obj): The depth frame.
+
+        Returns:
+            obj: The class DepthIntegral. Please refer `DepthIntegral.box_stats` and `DepthIntegral.roi_stats`.
+        """
+        return self.__integral_image_cache.get(frame)
+
     def dump_camera_device_properties(self):
         """
         """
@@ -0,0 +1,161 @@
+import concurrent.futures
+import threading
+
+from eys3d import logger
+
+__all__ = ["DumpService", "get_dump_service"]
+
+
+class DumpService:
+    """This class runs the dump jobs on a pool of worker threads.
+
+    `Device.dump_frame_info`, `Device.dump_IMU_data`, `Device.do_snapshot` and `RectLogData.save_json`
+    write files on the caller thread, so the preview loop stalls when they are called.
+    This class runs them on workers and returns a future for each job.
+
+    The number of jobs which are waiting or running is bounded by `capacity`.
+    `submit` waits for a free slot when it is full (backpressure), instead of dropping the job.
+
+    Example:
+        service = DumpService()
+        future = service.do_snapshot(device)
+        future.add_done_callback(lambda f: logger.info("Snapshot is done"))
+        service.shutdown()
+
+    Args:
+        workers (int): The number of worker threads. Default is 2.
+        capacity (int): The maximum number of jobs waiting or running. Default is 8.
+    """
+    def __init__(self, workers=2, capacity=8):
+        if workers <= 0 or capacity < workers:
+            raise ValueError(
+                "The workers should be positive and not more than capacity.")
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="eys3d-dump")
+        self.__slots = threading.BoundedSemaphore(capacity)
+        self.__lock = threading.Lock()
+        self.__submitted_count = 0
+        self.__completed_count = 0
+        self.__failed_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def submit(self, job, *args, submit_timeout=None, **kwargs):
+        """Submit the job.
+
+        It waits for a free slot if the service is full.
+
+        Args:
+            job (function): The function to run.
+            *args: The arguments of job.
+            submit_timeout (float): The maximun of time in seconds to wait for a free slot. It waits forever if None.
+            **kwargs: The keyword arguments of job, including `timeout` of job.
+
+        Returns:
+            obj: The concurrent.futures.Future of job.
+
+        Raises:
+            TimeoutError: No free slot in timeout.
+        """
+        if not self.__slots.acquire(timeout=submit_timeout):
+            raise TimeoutError("The dump service is full.")
+        try:
+            future = self.__executor.submit(job, *args, **kwargs)
+        except BaseException:
+            self.__slots.release()
+            raise
+        with self.__lock:
+            self.__submitted_count += 1
+        future.add_done_callback(self.__on_done)
+        return future
+
+    def dump_frame_info(self, device, count=60, submit_timeout=None):
+        """Submit `Device.dump_frame_info`.
+
+        Returns:
+            obj: The future of job.
+        """
+        return self.submit(device.dump_frame_info, count, submit_timeout=submit_timeout)
+
+    def dump_IMU_data(self, device, count=256, submit_timeout=None):
+        """Submit `Device.dump_IMU_data`.
+
+        Returns:
+            obj: The future of job.
+        """
+        return self.submit(device.dump_IMU_data, count, submit_timeout=submit_timeout)
+
+    def do_snapshot(self, device, submit_timeout=None):
+        """Submit `Device.do_snapshot`.
+
+        Returns:
+            obj: The future of job.
+        """
+        return self.submit(device.do_snapshot, submit_timeout=submit_timeout)
+
+    def save_rectify_log(self, rect_log_data, fname=None, submit_timeout=None):
+        """Submit `RectLogData.save_json`.
+
+        Returns:
+            obj: The future of job.
+        """
+        return self.submit(rect_log_data.save_json, fname, submit_timeout=submit_timeout)
+
+    def get_statistics(self):
+        """Get the statistics of service.
+
+        Returns:
+            dict: The statistics. The key is following:
+                * submitted: The number of jobs submitted.
+                * completed: The number of jobs completed, including failed.
+                * failed: The number of jobs raised exception.
+                * pending: The number of jobs waiting or running.
+        """
+        with self.__lock:
+            return {
+                'submitted': self.__submitted_count,
+                'completed': self.__completed_count,
+                'failed': self.__failed_count,
+                'pending': self.__submitted_count - self.__completed_count,
+            }
+
+    def shutdown(self, wait=True):
+        """Shutdown the service.
+
+        Args:
+            wait (bool): True to wait for the submitted jobs. Default is True.
+        """
+        self.__executor.shutdown(wait=wait)
+
+    def __on_done(self, future):
+        self.__slots.release()
+        failed = not future.cancelled() and future.exception() is not None
+        with self.__lock:
+            self.__completed_count += 1
+            self.__failed_count += failed
+        if failed:
+            logger.opt(exception=future.exception()).error(
+                "The dump job is failed.")
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def get_dump_service():
+    """Get the dump service shared in process.
+
+    It is created at the first call with the default setting.
+
+    Returns:
+        obj: The class DumpService.
+    """
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = DumpService()
+        return _default_service
@@ -0,0 +1,148 @@
+import numpy as np
+
+__all__ = ["FrameView"]
+
+
+class _PinnedBuffer:
+    """A buffer exported through `__array_interface__` which pins its owner.
+
+    The array created from this object refers to the memory of `array` without copying.
+    It holds the reference of `owner` so the owner would not be released
+    while any array created from this buffer is alive.
+
+    Args:
+        array (np.array): The contiguous array which owns the memory.
+        shape (tuple): The shape of exported view.
+        owner (obj): The object which should be kept alive with the view.
+    """
+    def __init__(self, array, shape, owner):
+        self.array = array
+        self.owner = owner
+        self.__array_interface__ = {
+            'version': 3,
+            'shape': tuple(shape),
+            'typestr': array.dtype.str,
+            'data': (array.__array_interface__['data'][0], True),  # read-only
+            'strides': None,
+        }
+
+
+def _pinned_view(data, shape, dtype, owner):
+    size = int(np.prod(shape))
+    array = np.asarray(data, dtype=dtype).reshape(-1)
+    if array.size < size:
+        raise ValueError(
+            "The size of buffer ({}) is less than the shape {}.".format(
+                array.size, shape))
+    # Slicing and asarray keep the original memory. Copy only if the buffer is not contiguous.
+    array = np.ascontiguousarray(array[:size])
+    return np.asarray(_PinnedBuffer(array, shape, owner))
+
+
+class FrameView:
+    """This class provides the shaped read-only views of frame data.
+
+    The frame from `Pipeline`, `FrameSetPipeline` or callback function only provides flat buffers
+    and user has to reshape them for each call, e.g. `frame.get_rgb_data().reshape(h, w, 3)`.
+    This class fetches each buffer from the frame once and hands out the shaped views over it.
+    All of the views are read-only and keep the frame alive until the last view is released.
+    Call `copy()` on the view if user would like to modify the data.
+
+    It also exports the rgb image through `__array_interface__`,
+    so `np.asarray(FrameView(frame))` is the (H, W, 3) rgb image.
+
+    Notice:
+        It does not save the copy of buffer. `get_rgb_data`, `get_depth_ZD_value` and `get_data` of
+        the eys3dPy binding copy the buffer into a new array, and reshaping that array is already a view.
+        This class only saves fetching the same buffer again for several views of one frame,
+        and costs an object per frame. It is no faster than `frame.get_rgb_data().reshape(h, w, 3)`
+        for a single image until the binding exports the frame buffer itself.
+        The views refer to the frame data. They would be overwritten if the frame is reused,
+        e.g. the frame is returned to `FramePool`.
+
+    Args:
+        frame (obj): The eys3dPy.Frame.
+    """
+    def __init__(self, frame):
+        self.__frame = frame
+        self.__height = frame.get_height()
+        self.__width = frame.get_width()
+        self.__rgb_image = None
+        self.__zd_image = None
+        self.__raw_data = None
+
+    def get_frame(self):
+        """Get the frame.
+
+        To get the frame which is viewed.
+
+        Returns:
+            obj: The eys3dPy.Frame.
+        """
+        return self.__frame
+
+    def get_height(self):
+        return self.__height
+
+    def get_width(self):
+        return self.__width
+
+    def get_shape(self):
+        """Get the shape of frame.
+
+        The return order is height, width.
+
+        Returns:
+            tuple: The tuple contains height and width.
+        """
+        return (self.__height, self.__width)
+
+    def get_rgb_image(self):
+        """Get the rgb image.
+
+        To get the rgb data of frame as an image.
+        The buffer is fetched from frame only at the first call.
+
+        Returns:
+            np.array: The read-only rgb image. The shape is (H, W, 3) and dtype is uint8.
+        """
+        if self.__rgb_image is None:
+            self.__rgb_image = _pinned_view(self.__frame.get_rgb_data(),
+                                            (self.__height, self.__width, 3),
+                                            np.uint8, self.__frame)
+        return self.__rgb_image
+
+    def get_depth_ZD_image(self):
+        """Get the z value of depth frame as an image.
+
+        To get the z value from ZD table of depth frame as an image.
+        The buffer is fetched from frame only at the first call.
+        The unit is millimeter.
+
+        Returns:
+            np.array: The read-only z value image. The shape is (H, W) and dtype is uint16.
+        """
+        if self.__zd_image is None:
+            self.__zd_image = _pinned_view(self.__frame.get_depth_ZD_value(),
+                                           (self.__height, self.__width),
+                                           np.uint16, self.__frame)
+        return self.__zd_image
+
+    def get_raw_data(self):
+        """Get the raw data of frame.
+
+        To get the raw data from device without transcoding.
+        The length of raw data depends on the format of frame, e.g. YUY2 is (H * W * 2).
+
+        Returns:
+            np.array: The read-only flat raw data. The dtype is uint8.
+        """
+        if self.__raw_data is None:
+            data = np.asarray(self.__frame.get_data(), dtype=np.uint8)
+            self.__raw_data = _pinned_view(data, data.shape, np.uint8,
+                                           self.__frame)
+        return self.__raw_data
+
+    @property
+    def __array_interface__(self):
+        return self.get_rgb_image().__array_interface__
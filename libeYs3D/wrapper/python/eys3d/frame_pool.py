@@ -0,0 +1,93 @@
+import queue
+from contextlib import contextmanager
+
+__all__ = ["FramePool"]
+
+
+class FramePool:
+    """This class is a bounded pool of reusable frames.
+
+    This class owns a fixed number of frames created by `factory` at construction.
+    User borrows the frame from pool, lets pipeline fill it and returns it back,
+    so the buffers of frame are allocated once and reused in the following calls.
+    It blocks the borrower if all of the frames are borrowed.
+
+    Example:
+        pool = FramePool(4, lambda: eys3dPy.Frame(0, 0, 0))
+        with pool.borrow() as frame:
+            pipe.wait_color_frame(frame, 1600)
+
+    Args:
+        size (int): The number of frames in pool.
+        factory (function): The function to create a frame. It is called `size` times.
+    """
+    def __init__(self, size, factory):
+        if size <= 0:
+            raise ValueError("The size of frame pool should be positive.")
+        self.__size = size
+        # LIFO to reuse the recently returned frame whose buffer is still in cache.
+        self.__frames = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self.__frames.put_nowait(factory())
+
+    def get_size(self):
+        """Get the number of frames in pool.
+
+        Returns:
+            int: The number of frames in pool.
+        """
+        return self.__size
+
+    def get_available_count(self):
+        """Get the number of frames which are not borrowed.
+
+        Returns:
+            int: The number of available frames.
+        """
+        return self.__frames.qsize()
+
+    def acquire(self, timeout=None):
+        """Acquire a frame from pool.
+
+        To acquire a frame from pool.
+        It waits for a returned frame if all of the frames are borrowed.
+        The frame should be returned by `release` after used.
+
+        The unit of timeout is seconds.
+
+        Args:
+            timeout (float): The maximun of time in seconds to wait. It waits forever if None.
+
+        Returns:
+            obj: The frame.
+
+        Raises:
+            Exception: No frame is returned in timeout.
+        """
+        try:
+            return self.__frames.get(timeout=timeout)
+        except queue.Empty:
+            raise Exception("The frame pool is exhausted.")
+
+    def release(self, frame):
+        """Return the frame to pool.
+
+        Args:
+            frame (obj): The frame acquired from this pool.
+        """
+        self.__frames.put_nowait(frame)
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        """Borrow a frame in a `with` block.
+
+        The frame is returned to pool when leaving the block.
+
+        Args:
+            timeout (float): Refer `acquire`.
+        """
+        frame = self.acquire(timeout)
+        try:
+            yield frame
+        finally:
+            self.release(frame)
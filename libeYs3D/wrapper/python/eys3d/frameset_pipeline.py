@@ -2,11 +2,16 @@ import threading
 
 import time
 import numpy as np
+from contextlib import contextmanager
 
 from eys3d import logger
-import eys3dPy
 from .device import Device
 from .config import Config, ModeConfig
+from .frame_pool import FramePool
+from .metrics import PipelineMetrics
+from .aio import add_streams, remove_streams, run_wait_in_worker
+from .pipeline import (COLOR_BYTES_PER_PIXEL, create_frame,
+                       get_depth_bytes_per_pixel, get_remaining_timeout)
 
 
 class FrameSetPipeline():
@@ -21,12 +26,25 @@ class FrameSetPipeline():
 
     Args:
         device_index (int): Index for device would like to initialize.
+        device (obj): The class Device. It would be used instead of creating one by device_index.
+        pool_size (int): The number of pre-allocated framesets for `borrow_frameset`.
+            Default is 0 and frame pool is disabled.
+        backend (str or module): The backend of device created by device_index, `native` or `sim`.
+            The default backend is used if None. Please refer `load_backend`.
+        bandwidth_controller (obj): The class BandwidthController to admit the stream on USB bus.
+            The pipelines on one host should share it. The stream is not controlled if None.
     """
-    def __init__(self, device_index=0, device=None):
+    def __init__(self,
+                 device_index=0,
+                 device=None,
+                 pool_size=0,
+                 backend=None,
+                 bandwidth_controller=None):
         if device:
             self.__dev = device
         else:
-            self.__dev = Device(device_index)
+            self.__dev = Device(device_index, backend=backend)
+        self.__backend = self.__dev.get_backend()
         self.__config = None
         self.__pipe = None
         self.dev_info = self.__dev.get_device_info()
@@ -37,6 +55,14 @@ class FrameSetPipeline():
         self.__depth_accuracy_info = None
         self.__depth_zValue = None
 
+        self.__pool_size = pool_size
+        self.__frameset_pool = None
+
+        self.__metrics = PipelineMetrics()
+
+        self.__bandwidth_controller = bandwidth_controller
+        self.__bandwidth_report = None
+
         self.__status = False
 
     @logger.catch
@@ -49,6 +75,8 @@ class FrameSetPipeline():
         Args:
             config (obj): The class Config.
 
+        Returns:
+            bool: False if the stream is refused by the bandwidth controller.
         """
         if config is None and self.__config is None:
             logger.exception("Config needed for device setting.")
@@ -57,15 +85,27 @@ class FrameSetPipeline():
             self.__config = config
 
         if not self.__status:
+            if self.__bandwidth_controller is not None:
+                admitted, self.__bandwidth_report = self.__bandwidth_controller.admit(
+                    self.__dev, self.__config)
+                if not admitted:
+                    return False
+                # The device is opened with the downgraded copy of config if downgraded.
+                self.__config = self.__bandwidth_report['config']
             self.__status = True
+            add_streams(1)
             self.__pipe = self.__dev.open_device_with_pipeline(
                 config=self.__config, sync=True)
             self.__color_frame_shape = self.__config.get_color_stream_resolution(
             )
             self.__depth_frame_shape = self.__config.get_depth_stream_resolution(
             )
+            if self.__pool_size:
+                self.__frameset_pool = FramePool(self.__pool_size,
+                                                 self.__create_frameset)
 
         self.__dev.enable_stream()
+        return True
 
     @logger.catch
     def get_frameset(self, ):
@@ -81,14 +121,18 @@ class FrameSetPipeline():
             bool : The return value is to mean the frame data is ready or not.
             np.array : The array of frame data. The shape is (H, W, 3) if rgb data. The shape is (H, W, 2) if raw data.
         """
-        frameset = eys3dPy.FrameSet()
+        frameset = self.__backend.FrameSet()
         ret = self.__pipe.get_frameset(frameset)
-        if ret == eys3dPy.FRAMESET_PIPELINE_RESULT.OK:
+        if ret == self.__backend.FRAMESET_PIPELINE_RESULT.OK:
+            self.__metrics.record_frameset(frameset)
             return True, frameset
+        if ret == self.__backend.FRAMESET_PIPELINE_RESULT.QUEUE_EMPTY:  # It is normal when polling.
+            return False, None
         else:
+            self.__metrics.record_result("frameset", ret)
             logger.warning(
                 "`get_frameset` is failed. The return value = {}.".format(
-                    eys3dPy.PIPELINE_RESULT(ret)))
+                    self.__backend.PIPELINE_RESULT(ret)))
             return False, None
 
     @logger.catch
@@ -108,16 +152,146 @@ class FrameSetPipeline():
             np.array : The array of frame data. The shape is (H, W, 3) if rgb data. The shape is (H, W, 2) if raw data.
         """
 
-        frameset = eys3dPy.FrameSet()
+        frameset = self.__backend.FrameSet()
         ret = self.__pipe.wait_frameset(frameset, timeout)
-        if ret == eys3dPy.FRAMESET_PIPELINE_RESULT.OK:
+        if ret == self.__backend.FRAMESET_PIPELINE_RESULT.OK:
+            self.__metrics.record_frameset(frameset)
             return True, frameset
         else:
+            self.__metrics.record_result("frameset", ret)
             logger.warning(
                 "`wait_frameset` is failed. The return value = {}.".format(
-                    eys3dPy.PIPELINE_RESULT(ret)))
+                    self.__backend.PIPELINE_RESULT(ret)))
             return False, None
 
+    @contextmanager
+    def borrow_frameset(self, timeout=1600):
+        """Borrow the frameset from frame pool.
+
+        To wait for frameset like `wait_frameset`, but the frameset is borrowed from frame pool.
+        The frameset is returned to pool when leaving the `with` block, so its buffers are reused by next call.
+        It is available if `pool_size` is set when pipeline initialized.
+        It would not wait if timeout is 0.
+
+        Example:
+            with pipe.borrow_frameset() as frameset:
+                if frameset is not None:
+                    rgb_image = FrameView(frameset.color_frame).get_rgb_image()
+
+        Notice:
+            The frameset and its data should not be used after leaving the `with` block.
+            Please copy the data if it is needed.
+
+        Args:
+            timeout (int): The maximun of time in milliseconds to wait. Default is 1600.
+
+        Yields:
+            obj : The frameset, or None if the frameset is not ready.
+        """
+        if self.__frameset_pool is None:
+            raise Exception(
+                "Frame pool is disabled. Please set pool_size and start pipeline."
+            )
+        start = time.monotonic()
+        # The negative timeout means waiting forever.
+        with self.__frameset_pool.borrow(
+                timeout / 1000.0 if timeout >= 0 else None) as frameset:
+            # The borrow and the wait share the timeout.
+            remaining = get_remaining_timeout(timeout, start)
+            if remaining == 0:
+                ret = self.__pipe.get_frameset(frameset)
+            else:
+                ret = self.__pipe.wait_frameset(frameset, remaining)
+            if ret == self.__backend.FRAMESET_PIPELINE_RESULT.OK:
+                self.__metrics.record_frameset(frameset)
+                yield frameset
+            else:
+                # The empty queue is normal when polling.
+                if (timeout != 0 or
+                        ret != self.__backend.FRAMESET_PIPELINE_RESULT.QUEUE_EMPTY):
+                    self.__metrics.record_result("frameset", ret)
+                    logger.warning(
+                        "`borrow_frameset` is failed. The return value = {}.".
+                        format(self.__backend.PIPELINE_RESULT(ret)))
+                yield None
+
+    def __create_frameset(self):
+        # Reserve the buffers of color and depth frame like `Pipeline`, so they are not grown by the first frames.
+        frameset = self.__backend.FrameSet()
+        frameset.color_frame = create_frame(self.__backend,
+                                            self.__color_frame_shape,
+                                            COLOR_BYTES_PER_PIXEL)
+        frameset.depth_frame = create_frame(
+            self.__backend, self.__depth_frame_shape,
+            get_depth_bytes_per_pixel(self.__config))
+        return frameset
+
+    async def next_frameset(self, timeout=1600):
+        """Wait for frameset in asyncio.
+
+        It is the coroutine version of `wait_frameset`.
+        The waiting is run on the thread pool shared by all pipelines, so the event loop is not blocked.
+        The GIL is not released while waiting. Please refer `eys3d.aio.run_in_worker` in detail.
+
+        Example:
+            ret, frameset = await pipe.next_frameset()
+
+        Args:
+            timeout (int): The maximun of time in milliseconds to wait. Default is 1600.
+
+        Returns:
+            bool : The return value is to mean the frameset is ready or not.
+            obj : The frameset.
+        """
+        return await run_wait_in_worker(self.wait_frameset, timeout)
+
+    async def frames(self, timeout=1600):
+        """Iterate the framesets in asyncio.
+
+        It is the asynchronous generator of framesets.
+        It stops after the pipeline stopped.
+
+        Example:
+            async for frameset in pipe.frames():
+                ...
+
+        Args:
+            timeout (int): The maximun of time in milliseconds to wait for each frameset. Default is 1600.
+
+        Yields:
+            obj : The frameset.
+
+        Raises:
+            Exception: The pipeline is not started.
+        """
+        if not self.__status:
+            raise Exception("The pipeline is not started.")
+        while self.__status:
+            ret, frameset = await self.next_frameset(timeout)
+            if ret:
+                yield frameset
+
+    def get_metrics(self):
+        """Get the metrics of pipeline.
+
+        To get the fps, latency, transcoding time and failed results of the frames got from pipeline.
+        The results are counted as stream `frameset`. Please refer `PipelineMetrics` in detail.
+
+        Returns:
+            obj : The class PipelineMetrics.
+        """
+        return self.__metrics
+
+    def get_bandwidth_report(self):
+        """Get the report of bandwidth controller at start.
+
+        Please refer `BandwidthController.admit` in detail.
+
+        Returns:
+            dict : The report. It is None if the stream is not controlled.
+        """
+        return self.__bandwidth_report
+
     def get_device(self):
         """Get the camera device.
 
@@ -143,8 +317,12 @@ class FrameSetPipeline():
 
         To stop the stream and then release device.
         """
+        if self.__status:
+            remove_streams(1)
         self.__status = False
         self.__dev.close_stream()
+        if self.__bandwidth_controller is not None:
+            self.__bandwidth_controller.release(self.__dev)
 
     def is_interleave_mode_enabled(self):
         """Get the status of interleaveMode.
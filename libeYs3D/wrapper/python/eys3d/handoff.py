@@ -0,0 +1,166 @@
+import collections
+import threading
+import time
+
+from eys3d import logger
+
+__all__ = ["FrameHandoff"]
+
+
+class FrameHandoff:
+    """This class hands off frames from one pipeline stream to consumer threads.
+
+    The reader thread blocks on the `wait_*` of pipeline, e.g. `Pipeline.wait_depth_frame`,
+    with a short timeout and publishes the frames into a bounded deque.
+    The consumers wait on the condition of the deque instead of the stream, so one reader
+    waits for the stream however many consumers there are.
+    The condition lock is only held to append or pop one frame.
+    The oldest frame is dropped if the deque is full.
+
+    Notice:
+        The binding does not release the GIL in `wait_*`, so the other Python threads are
+        still stalled while the reader waits in C/C++. Releasing it needs a change in the binding.
+
+    Example:
+        handoff = FrameHandoff(pipe.wait_depth_frame)
+        handoff.start()
+        ret, frame = handoff.get(timeout=1.6)
+        handoff.stop()
+
+    Args:
+        wait_frame (function): The blocking function which takes the timeout in milliseconds
+            and returns (bool, frame), e.g. `Pipeline.wait_depth_frame`.
+        capacity (int): The maximum number of frames kept for consumers. Default is 2.
+        timeout (int): The maximun of time in milliseconds for the reader to wait for each frame.
+            It also bounds the time `stop` waits for the reader. Default is 100.
+    """
+    def __init__(self, wait_frame, capacity=2, timeout=100):
+        if capacity <= 0:
+            raise ValueError("The capacity should be positive.")
+        if timeout <= 0:
+            raise ValueError("The timeout should be positive.")
+        self.__wait_frame = wait_frame
+        self.__timeout = timeout
+        self.__frames = collections.deque(maxlen=capacity)
+        self.__ready = threading.Condition(threading.RLock())
+        self.__waiting = 0
+        self.__running = False
+        self.__stopping = threading.Event()
+        self.__thread = None
+
+        self.__published_count = 0
+        self.__consumed_count = 0
+
+    def start(self):
+        """Start the reader thread.
+
+        To start the reader thread to wait for the stream.
+        """
+        if self.__running:
+            return
+        self.__running = True
+        self.__stopping.clear()
+        self.__thread = threading.Thread(target=self.__run,
+                                         name="eys3d-handoff",
+                                         daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Stop the reader thread.
+
+        To stop the reader thread and wake up the waiting consumers.
+        It returns after the current wait of the reader, which is at most the timeout of reader.
+        """
+        self.__running = False
+        self.__stopping.set()
+        with self.__ready:
+            self.__ready.notify_all()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def is_running(self):
+        return self.__running
+
+    def get(self, timeout=None):
+        """Get the oldest frame.
+
+        To get the oldest frame published by the reader thread.
+        It waits for the frame if no frame is published.
+
+        The unit of timeout is seconds.
+
+        Args:
+            timeout (float): The maximun of time in seconds to wait. It waits forever if None.
+
+        Returns:
+            bool : The return value is to mean the frame data is ready or not.
+            obj : The frame.
+        """
+        try:
+            return True, self.__pop()
+        except IndexError:
+            pass
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__ready:
+            self.__waiting += 1
+            try:
+                while self.__running:
+                    try:
+                        return True, self.__pop()
+                    except IndexError:
+                        pass
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self.__ready.wait(remaining)
+            finally:
+                self.__waiting -= 1
+        return False, None
+
+    def get_statistics(self):
+        """Get the statistics of handoff.
+
+        Returns:
+            dict: The statistics. The key is following:
+                * published: The number of frames published by the reader thread.
+                * consumed: The number of frames taken by consumers.
+                * dropped: The number of frames dropped because no consumer took them in time.
+                * queued: The number of frames waiting for consumers.
+        """
+        with self.__ready:
+            published = self.__published_count
+            consumed = self.__consumed_count
+            queued = len(self.__frames)
+        return {
+            'published': published,
+            'consumed': consumed,
+            'dropped': published - consumed - queued,
+            'queued': queued,
+        }
+
+    def __pop(self):
+        # The condition lock is reentrant, so it is also taken inside `get`.
+        with self.__ready:
+            frame = self.__frames.popleft()
+            self.__consumed_count += 1
+        return frame
+
+    @logger.catch
+    def __run(self):
+        while self.__running:
+            start = time.monotonic()
+            result = self.__wait_frame(self.__timeout)
+            # The waits decorated by `logger.catch` return None after the exception is logged.
+            (ret, frame) = result if result is not None else (False, None)
+            if not ret:
+                # The failed wait may return at once, e.g. the pipeline is stopped,
+                # so it is not retried before its timeout.
+                elapsed = time.monotonic() - start
+                self.__stopping.wait(max(self.__timeout / 1000.0 - elapsed, 0))
+                continue
+            with self.__ready:
+                self.__frames.append(frame)
+                self.__published_count += 1
+                if self.__waiting:
+                    self.__ready.notify()
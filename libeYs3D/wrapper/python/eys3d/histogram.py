@@ -0,0 +1,98 @@
+import bisect
+import threading
+
+__all__ = ["LatencyHistogram"]
+
+
+class LatencyHistogram:
+    """This class counts the latencies into buckets of fixed upper bounds.
+
+    Recording is a bisect and an increment, so it could be called for every frame.
+    The percentile is estimated by the upper bound of the bucket which contains it.
+
+    Args:
+        bounds (tuple): The ascending upper bounds of buckets in seconds.
+            The last bucket counts the latencies above the last bound. Default is `DEFAULT_BOUNDS`.
+    """
+    DEFAULT_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                      0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self, bounds=None):
+        self.__bounds = tuple(bounds or self.DEFAULT_BOUNDS)
+        if list(self.__bounds) != sorted(set(self.__bounds)):
+            raise ValueError("The bounds should be ascending.")
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def record(self, seconds):
+        """Record a latency.
+
+        Args:
+            seconds (float): The latency in seconds.
+        """
+        index = bisect.bisect_left(self.__bounds, seconds)
+        with self.__lock:
+            self.__counts[index] += 1
+            self.__count += 1
+            self.__sum += seconds
+            self.__max = max(self.__max, seconds)
+
+    def get_bounds(self):
+        return self.__bounds
+
+    def get_count(self):
+        return self.__count
+
+    def get_percentile(self, percent):
+        """Get the estimated percentile of latencies.
+
+        Args:
+            percent (float): The percentile from 0 to 100.
+
+        Returns:
+            float: The upper bound in seconds of the bucket which contains the percentile.
+                It is the maximum latency if the percentile is above the last bound, and 0 if nothing is recorded.
+        """
+        with self.__lock:
+            if not self.__count:
+                return 0.0
+            rank = max(percent / 100.0 * self.__count, 1)
+            total = 0
+            for index, count in enumerate(self.__counts):
+                total += count
+                if total >= rank:
+                    break
+            return self.__bounds[index] if index < len(
+                self.__bounds) else self.__max
+
+    def get_snapshot(self):
+        """Get the snapshot of histogram.
+
+        Returns:
+            dict: The snapshot. The key is following:
+                * bounds: The upper bounds of buckets in seconds.
+                * counts: The number of latencies in each bucket. It has one more item than bounds.
+                * count: The number of latencies.
+                * sum: The sum of latencies in seconds.
+                * max: The maximum latency in seconds.
+                * p50: The estimated median in seconds.
+                * p99: The estimated 99th percentile in seconds.
+        """
+        with self.__lock:
+            snapshot = {
+                'bounds': self.__bounds,
+                'counts': list(self.__counts),
+                'count': self.__count,
+                'sum': self.__sum,
+                'max': self.__max,
+            }
+        snapshot['p50'] = self.get_percentile(50)
+        snapshot['p99'] = self.get_percentile(99)
+        return snapshot
+
+    def reset(self):
+        with self.__lock:
+            self.__counts = [0] * (len(self.__bounds) + 1)
+            self.__count = 0
+            self.__sum = 0.0
+            self.__max = 0.0
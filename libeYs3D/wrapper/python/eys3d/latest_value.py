@@ -0,0 +1,98 @@
+__all__ = ["LatestValueBuffer"]
+
+
+class LatestValueBuffer:
+    """This class passes the latest value from a producer to a consumer without blocking or copying.
+
+    It has the semantics of triple buffer. The producer, e.g. the point cloud callback, builds the next value
+    (back buffer) and publishes it as the latest (middle buffer). The consumer, e.g. the GL render loop,
+    takes the latest as its own (front buffer) and keeps using it while newer values are published.
+    Neither side waits for the other: publishing replaces the latest by one reference store,
+    which is atomic in the interpreter, so no lock is taken. A value which is replaced before the consumer
+    takes it is counted as overwritten.
+
+    The value is passed by reference, so the producer should publish a new object each time
+    instead of modifying the published one.
+    The counters are exact for one producer and one consumer.
+
+    Example:
+        buffer = LatestValueBuffer()
+
+        def pc_frame_callback(pcframe):
+            buffer.publish((pcframe.get_xyz_data(), pcframe.get_rgb_data()))
+
+        while rendering:
+            is_new, value = buffer.get()
+            if value is not None:
+                draw(*value)
+    """
+    def __init__(self):
+        self.__latest = (0, None)  # (sequence, value) is replaced as a whole.
+        self.__sequence = 0
+        self.__consumed_sequence = 0
+        self.__consumed_count = 0
+        self.__overwritten_count = 0
+
+    def publish(self, value):
+        """Publish the value as the latest.
+
+        It never waits for the consumer.
+
+        Args:
+            value (obj): The value, e.g. the tuple of buffers of frame.
+        """
+        self.__sequence += 1
+        self.__latest = (self.__sequence, value)
+
+    def get(self):
+        """Get the latest value.
+
+        It never waits for the producer. The latest value is returned even if it was got before,
+        so the renderer could draw it again.
+
+        Returns:
+            bool : True if the value is published after the last get.
+            obj : The latest value. It is None if nothing is published.
+        """
+        (sequence, value) = self.__latest
+        if sequence == self.__consumed_sequence:
+            return False, value
+        self.__overwritten_count += sequence - self.__consumed_sequence - 1
+        self.__consumed_sequence = sequence
+        self.__consumed_count += 1
+        return True, value
+
+    def peek(self):
+        """Get the latest value without taking it.
+
+        Returns:
+            obj: The latest value. It is None if nothing is published.
+        """
+        return self.__latest[1]
+
+    def has_new(self):
+        """Check if a value is published after the last get.
+
+        Returns:
+            bool: True if there is a new value.
+        """
+        return self.__latest[0] != self.__consumed_sequence
+
+    def get_statistics(self):
+        """Get the statistics of buffer.
+
+        Returns:
+            dict: The statistics. The key is following:
+                * published: The number of values published.
+                * consumed: The number of new values taken by get.
+                * overwritten: The number of values replaced before they were taken.
+                * pending: 1 if the latest value is not taken yet, otherwise 0.
+        """
+        sequence = self.__latest[0]
+        unconsumed = sequence - self.__consumed_sequence
+        return {
+            'published': sequence,
+            'consumed': self.__consumed_count,
+            'overwritten': self.__overwritten_count + max(unconsumed - 1, 0),
+            'pending': min(unconsumed, 1),
+        }
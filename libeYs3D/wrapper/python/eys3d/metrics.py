@@ -0,0 +1,355 @@
+import collections
+import http.server
+import threading
+import time
+
+from eys3d import logger
+from .histogram import LatencyHistogram
+
+__all__ = ["PipelineMetrics", "MetricsExporter", "format_prometheus"]
+
+# The timestamp within this difference from the host clock is taken as on the host clock.
+_HOST_CLOCK_TOLERANCE_US = 10 * 1000000
+
+
+class _StreamMetrics:
+    def __init__(self, window):
+        self.arrivals = collections.deque(maxlen=window)
+        self.frame_count = 0
+        self.skipped_count = 0
+        self.last_serial_number = None
+        self.last_latency = 0.0
+        self.min_clock_offset = None
+        self.relative = False
+        self.results = collections.Counter()
+        self.latency = LatencyHistogram()
+        self.transcoding = LatencyHistogram()
+        self.filtering = LatencyHistogram()
+
+
+class PipelineMetrics:
+    """This class measures the frames got from pipeline.
+
+    `Pipeline` and `FrameSetPipeline` record each frame and each failed result into their metrics,
+    which are got by `get_metrics()`. For each stream, it measures:
+        * The frames per second over the recent frames.
+        * The latency from capture (`tsUs`) to Python. If `tsUs` is not on the host clock,
+          the latency is relative to the lowest one observed, so it shows the queueing but not the transfer.
+        * The `rgbTranscodingTimeUs` and `filteringTimeUs` of frame, if the backend provides them.
+        * The frames skipped by serial number, e.g. dropped by the full queue in native pipeline.
+        * The results of get and wait which are not OK, e.g. `TIMEOUT` and `SYNC_ERROR`.
+        * The estimated queue depth, which is the latency multiplied by fps.
+
+    Example:
+        pipe.start(conf)
+        ...
+        logger.info(pipe.get_metrics().get_snapshot())
+
+    Args:
+        window (int): The number of recent frames to compute fps. Default is 30.
+    """
+    def __init__(self, window=30):
+        if window < 2:
+            raise ValueError("The window should be at least 2.")
+        self.__window = window
+        self.__streams = collections.OrderedDict()
+        self.__lock = threading.Lock()
+        self.__start_time = time.monotonic()
+
+    def record_frame(self, stream, frame):
+        """Record the frame got from pipeline.
+
+        Args:
+            stream (str): The name of stream, e.g. `color`.
+            frame (obj): The eys3dPy.Frame.
+        """
+        now = time.monotonic()
+        clock_offset = time.time() * 1000000 - frame.tsUs
+        transcoding = getattr(frame, "rgbTranscodingTimeUs", None)
+        filtering = getattr(frame, "filteringTimeUs", None)
+        with self.__lock:
+            metrics = self.__get_stream(stream)
+            metrics.arrivals.append(now)
+            metrics.frame_count += 1
+            serial_number = frame.serialNumber
+            previous = metrics.last_serial_number
+            if previous is not None and serial_number > previous + 1:
+                metrics.skipped_count += serial_number - previous - 1
+            metrics.last_serial_number = serial_number
+            if abs(clock_offset) > _HOST_CLOCK_TOLERANCE_US:
+                metrics.relative = True
+            if metrics.relative:
+                if (metrics.min_clock_offset is None
+                        or clock_offset < metrics.min_clock_offset):
+                    metrics.min_clock_offset = clock_offset
+                clock_offset -= metrics.min_clock_offset
+            latency = max(clock_offset, 0) / 1000000.0
+            metrics.last_latency = latency
+        metrics.latency.record(latency)
+        if transcoding:
+            metrics.transcoding.record(transcoding / 1000000.0)
+        if filtering:
+            metrics.filtering.record(filtering / 1000000.0)
+
+    def record_frameset(self, frameset):
+        """Record the color and depth frame of frameset.
+
+        The frame of disabled stream, whose timestamp is 0, is not recorded.
+
+        Args:
+            frameset (obj): The eys3dPy.FrameSet.
+        """
+        if frameset.color_frame.tsUs:
+            self.record_frame("color", frameset.color_frame)
+        if frameset.depth_frame.tsUs:
+            self.record_frame("depth", frameset.depth_frame)
+
+    def record_result(self, stream, result):
+        """Record the result of get or wait which is not OK.
+
+        Args:
+            stream (str): The name of stream.
+            result (obj): The PIPELINE_RESULT.
+        """
+        name = getattr(result, "name", str(result))
+        with self.__lock:
+            self.__get_stream(stream).results[name] += 1
+
+    def get_snapshot(self):
+        """Get the snapshot of metrics.
+
+        Returns:
+            dict: The metrics. The key is following:
+                * uptime: The time in seconds since the metrics are created or reset.
+                * streams: The dictionary with the name of stream as key. The value is a dictionary:
+                    * frames: The number of frames.
+                    * fps: The frames per second of recent frames. It is 0 if no frame in 1 second.
+                    * skipped: The number of frames skipped by serial number.
+                    * latency: The latest latency in seconds.
+                    * latency_relative: True if the latency is relative to the lowest one.
+                    * queue_depth: The estimated number of frames waiting in queue.
+                    * results: The number of each result which is not OK, e.g. `TIMEOUT`.
+                    * latency_histogram: The histogram of latency. Please refer `LatencyHistogram.get_snapshot`.
+                    * transcoding_histogram: The histogram of `rgbTranscodingTimeUs` in seconds.
+                    * filtering_histogram: The histogram of `filteringTimeUs` in seconds.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            streams = list(self.__streams.items())
+            snapshot = {'uptime': now - self.__start_time, 'streams': {}}
+            for name, metrics in streams:
+                fps = self.__get_fps(metrics, now)
+                snapshot['streams'][name] = {
+                    'frames': metrics.frame_count,
+                    'fps': fps,
+                    'skipped': metrics.skipped_count,
+                    'latency': metrics.last_latency,
+                    'latency_relative': metrics.relative,
+                    'queue_depth': int(metrics.last_latency * fps),
+                    'results': dict(metrics.results),
+                }
+        for name, metrics in streams:
+            snapshot['streams'][name].update({
+                'latency_histogram': metrics.latency.get_snapshot(),
+                'transcoding_histogram': metrics.transcoding.get_snapshot(),
+                'filtering_histogram': metrics.filtering.get_snapshot(),
+            })
+        return snapshot
+
+    def reset(self):
+        with self.__lock:
+            self.__streams.clear()
+            self.__start_time = time.monotonic()
+
+    def __get_stream(self, stream):
+        metrics = self.__streams.get(stream)
+        if metrics is None:
+            metrics = self.__streams[stream] = _StreamMetrics(self.__window)
+        return metrics
+
+    @staticmethod
+    def __get_fps(metrics, now):
+        arrivals = metrics.arrivals
+        if len(arrivals) < 2 or now - arrivals[-1] > 1.0:
+            return 0.0
+        return (len(arrivals) - 1) / max(arrivals[-1] - arrivals[0], 1e-9)
+
+
+def _format_labels(labels):
+    return ",".join('{}="{}"'.format(
+        key,
+        str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                    for key, value in labels)
+
+
+def format_prometheus(metrics, prefix="eys3d"):
+    """Format the metrics in the text format of Prometheus.
+
+    Args:
+        metrics (dict): The class PipelineMetrics with the name of pipeline as key.
+        prefix (str): The prefix of metric names. Default is `eys3d`.
+
+    Returns:
+        str: The text of metrics.
+    """
+    families = collections.OrderedDict()
+
+    def add(name, kind, text, labels, value):
+        family = families.setdefault(name, (kind, text, []))
+        family[2].append((labels, value))
+
+    for pipeline, pipeline_metrics in metrics.items():
+        snapshot = pipeline_metrics.get_snapshot()
+        for stream, stats in snapshot['streams'].items():
+            labels = (("pipeline", pipeline), ("stream", stream))
+            add("frames_total", "counter",
+                "The number of frames got from pipeline.", labels,
+                stats['frames'])
+            add("frames_skipped_total", "counter",
+                "The number of frames skipped by serial number.", labels,
+                stats['skipped'])
+            add("fps", "gauge", "The frames per second of recent frames.",
+                labels, stats['fps'])
+            add("queue_depth", "gauge",
+                "The estimated number of frames waiting in queue.", labels,
+                stats['queue_depth'])
+            for result, count in sorted(stats['results'].items()):
+                add("pipeline_results_total", "counter",
+                    "The number of results which are not OK.",
+                    labels + (("result", result), ), count)
+            for key, name, text in (
+                ("latency_histogram", "latency_seconds",
+                 "The latency from capture to Python."),
+                ("transcoding_histogram", "rgb_transcoding_seconds",
+                 "The time of rgb transcoding."),
+                ("filtering_histogram", "filtering_seconds",
+                 "The time of depth filtering."),
+            ):
+                histogram = stats[key]
+                total = 0
+                for bound, count in zip(histogram['bounds'] + ("+Inf", ),
+                                        histogram['counts']):
+                    total += count
+                    add(name, "histogram", text, labels + (("le", bound), ),
+                        total)
+                add(name, "histogram", text, labels + (("", "sum"), ),
+                    histogram['sum'])
+                add(name, "histogram", text, labels + (("", "count"), ),
+                    histogram['count'])
+
+    lines = []
+    for name, (kind, text, samples) in families.items():
+        name = "{}_{}".format(prefix, name)
+        lines.append("# HELP {} {}".format(name, text))
+        lines.append("# TYPE {} {}".format(name, kind))
+        for labels, value in samples:
+            suffix = ""
+            if kind == "histogram":
+                if labels[-1][0] == "":
+                    suffix = "_" + labels[-1][1]
+                    labels = labels[:-1]
+                else:
+                    suffix = "_bucket"
+            lines.append("{}{}{{{}}} {}".format(name, suffix,
+                                                _format_labels(labels),
+                                                value))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """This class serves the metrics of pipelines in the text format of Prometheus.
+
+    It runs an HTTP server on its own thread, which answers `GET /metrics`.
+    It listens on the loopback interface by default, so the metrics are only visible on the host.
+
+    Example:
+        exporter = MetricsExporter(port=9464)
+        exporter.register("camera0", pipe.get_metrics())
+        exporter.start()
+        ...
+        exporter.stop()
+
+    Args:
+        port (int): The port to listen. The free port is chosen if 0. Default is 9464.
+        host (str): The address to listen. Default is `127.0.0.1`.
+    """
+    def __init__(self, port=9464, host="127.0.0.1"):
+        self.__address = (host, port)
+        self.__metrics = collections.OrderedDict()
+        self.__lock = threading.Lock()
+        self.__server = None
+        self.__thread = None
+
+    def register(self, name, metrics):
+        """Register the metrics of pipeline.
+
+        Args:
+            name (str): The name of pipeline. It is the `pipeline` label of metrics.
+            metrics (obj): The class PipelineMetrics.
+        """
+        with self.__lock:
+            self.__metrics[name] = metrics
+
+    def unregister(self, name):
+        with self.__lock:
+            self.__metrics.pop(name, None)
+
+    def get_text(self):
+        """Get the text of all of the registered metrics.
+
+        Returns:
+            str: The text in the format of Prometheus.
+        """
+        with self.__lock:
+            metrics = dict(self.__metrics)
+        return format_prometheus(metrics)
+
+    def get_port(self):
+        """Get the port listened.
+
+        Returns:
+            int: The port. It is None if not started.
+        """
+        if self.__server is None:
+            return None
+        return self.__server.server_address[1]
+
+    def start(self):
+        """Start the server thread."""
+        if self.__server is not None:
+            return
+        exporter = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.get_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type",
+                                 "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("[Metrics] " + format % args)
+
+        self.__server = http.server.ThreadingHTTPServer(
+            self.__address, Handler)
+        self.__server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.__server.serve_forever,
+                                         name="eys3d-metrics",
+                                         daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Stop the server thread."""
+        if self.__server is None:
+            return
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+        self.__server = None
+        self.__thread = None
@@ -0,0 +1,274 @@
+import collections
+import threading
+
+from .backend import load_backend
+from eys3d import logger
+
+__all__ = [
+    "ModeCatalog", "ModeInfo", "Resolution", "get_mode_catalog",
+    "clear_mode_catalogs"
+]
+
+Resolution = collections.namedtuple("Resolution", ["Width", "Height"])
+
+# The fields follow the `MODE_CONFIG` in ModeConfig.h. The lists of MODE_CONFIG are tuples.
+ModeInfo = collections.namedtuple("ModeInfo", [
+    "iMode", "csModeDesc", "iUSB_Type", "iInterLeaveModeFPS", "bRectifyMode",
+    "eDecodeType_L", "eDecodeType_K", "eDecodeType_T", "L_Resolution",
+    "D_Resolution", "K_Resolution", "T_Resolution", "vecDepthType",
+    "vecColorFps", "vecDepthFps"
+])
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _to_resolution(resolution):
+    if resolution is None:
+        return Resolution(0, 0)
+    return Resolution(resolution.Width, resolution.Height)
+
+
+def _to_mode_info(mode):
+    return ModeInfo(iMode=mode.iMode,
+                    csModeDesc=getattr(mode, "csModeDesc", ""),
+                    iUSB_Type=mode.iUSB_Type,
+                    iInterLeaveModeFPS=mode.iInterLeaveModeFPS,
+                    bRectifyMode=bool(mode.bRectifyMode),
+                    eDecodeType_L=mode.eDecodeType_L,
+                    eDecodeType_K=getattr(mode, "eDecodeType_K", None),
+                    eDecodeType_T=getattr(mode, "eDecodeType_T", None),
+                    L_Resolution=_to_resolution(mode.L_Resolution),
+                    D_Resolution=_to_resolution(mode.D_Resolution),
+                    K_Resolution=_to_resolution(
+                        getattr(mode, "K_Resolution", None)),
+                    T_Resolution=_to_resolution(
+                        getattr(mode, "T_Resolution", None)),
+                    vecDepthType=tuple(mode.vecDepthType),
+                    vecColorFps=tuple(mode.vecColorFps),
+                    vecDepthFps=tuple(mode.vecDepthFps))
+
+
+_MAX_MODE_INDEX_GAP = 32  # The maximum of continuous missing indexes probed without get_modes.
+
+
+def _read_modes(options):
+    # The modes of ModeConfigOptions, in the order of modeConfig.db.
+    if hasattr(options, "get_modes"):
+        return list(options.get_modes())
+    # The binding without get_modes. The indexes are probed from the first one until all modes are found.
+    # They could have gaps, e.g. the modes of the other USB type.
+    modes = []
+    count = options.get_mode_count()
+    index = options.get_current_index()
+    missing = 0
+    while len(modes) < count and missing < _MAX_MODE_INDEX_GAP:
+        if options.select_current_index(index) == 0:  # 0 is APC_OK in eSPDI_def.h
+            modes.append(options.get_current_mode_info())
+            missing = 0
+        else:
+            missing += 1
+        index += 1
+    if len(modes) < count:
+        logger.warning("Only {} of {} modes are found in modeConfig.db.".format(
+            len(modes), count))
+    return modes
+
+
+def _get_usb_type(usb_type):
+    return 3 if usb_type == 3 else 2
+
+
+class ModeCatalog:
+    """This class is the modes of camera module in `modeConfig.db`.
+
+    The catalog is loaded once per product id and USB type, and shared by the process.
+    Please get it by `get_mode_catalog` instead of creating it. The modes are immutable `ModeInfo`,
+    which has the attributes of `MODE_CONFIG`. They are indexed by mode index, resolution, fps and depth bits,
+    so the lookups do not query the database.
+
+    Example:
+        catalog = get_mode_catalog(0x162, 3)
+        mode_info = catalog.get_mode(1)
+        modes = catalog.find(depth_resolution=(640, 360), fps=30)
+
+    Args:
+        pid (int): The product id of camera module.
+        usb_type (int): The USB type. 3 for USB 3, otherwise USB 2.
+        modes (list): The MODE_CONFIG or ModeInfo of modes.
+    """
+    def __init__(self, pid, usb_type, modes):
+        self.__pid = pid
+        self.__usb_type = _get_usb_type(usb_type)
+        self.__modes = tuple(
+            mode if isinstance(mode, ModeInfo) else _to_mode_info(mode)
+            for mode in modes)
+        self.__by_index = {}
+        self.__by_color_resolution = collections.defaultdict(list)
+        self.__by_depth_resolution = collections.defaultdict(list)
+        self.__by_fps = collections.defaultdict(list)
+        self.__by_depth_bits = collections.defaultdict(list)
+        for mode in self.__modes:
+            self.__by_index.setdefault(mode.iMode, mode)
+            self.__by_color_resolution[tuple(mode.L_Resolution)].append(mode)
+            self.__by_depth_resolution[tuple(mode.D_Resolution)].append(mode)
+            for fps in sorted(set(mode.vecColorFps + mode.vecDepthFps)):
+                self.__by_fps[fps].append(mode)
+            for depth_bits in mode.vecDepthType:
+                self.__by_depth_bits[depth_bits].append(mode)
+
+    @classmethod
+    def load(cls, pid, usb_type, backend=None):
+        """Load the catalog from `modeConfig.db` by the backend.
+
+        Args:
+            pid (int): The product id of camera module.
+            usb_type (int): The USB type. 3 for USB 3, otherwise USB 2.
+            backend (str or module): The backend to read the database. The default backend is used if None.
+
+        Returns:
+            obj: The class ModeCatalog.
+        """
+        backend = load_backend(backend)
+        port_type = backend.USB_PORT_TYPE.USB_PORT_TYPE_3_0 if _get_usb_type(
+            usb_type) == 3 else backend.USB_PORT_TYPE.USB_PORT_TYPE_2_0
+        options = backend.ModeConfigOptions(port_type, pid)
+        return cls(pid, usb_type, _read_modes(options))
+
+    def __len__(self):
+        return len(self.__modes)
+
+    def __iter__(self):
+        return iter(self.__modes)
+
+    def __contains__(self, index):
+        return index in self.__by_index
+
+    def get_pid(self):
+        return self.__pid
+
+    def get_usb_type(self):
+        return self.__usb_type
+
+    def get_mode_count(self):
+        return len(self.__modes)
+
+    def get_modes(self):
+        """Get the modes.
+
+        Returns:
+            tuple: The ModeInfo of modes in the order of `modeConfig.db`.
+        """
+        return self.__modes
+
+    def get_indexes(self):
+        """Get the mode indexes.
+
+        Returns:
+            tuple: The mode indexes in the order of `modeConfig.db`.
+        """
+        return tuple(mode.iMode for mode in self.__modes)
+
+    def get_first_index(self):
+        return self.__modes[0].iMode if self.__modes else 0
+
+    def get_mode(self, index):
+        """Get the mode by index.
+
+        Args:
+            index (int): The mode index in modeConfig.db.
+
+        Returns:
+            obj: The ModeInfo. It is None if the index is not in catalog.
+        """
+        return self.__by_index.get(index)
+
+    def find(self,
+             color_resolution=None,
+             depth_resolution=None,
+             fps=None,
+             depth_bits=None):
+        """Find the modes matching all of the given conditions.
+
+        The condition is ignored if None. The resolution of disabled stream is (0, 0).
+
+        Args:
+            color_resolution (tuple): The (width, height) of color stream.
+            depth_resolution (tuple): The (width, height) of depth stream.
+            fps (int): The fps supported by color or depth stream.
+            depth_bits (int): The depth bits, e.g. 11 or 14.
+
+        Returns:
+            tuple: The ModeInfo of matched modes in the order of `modeConfig.db`.
+        """
+        candidates = []
+        if color_resolution is not None:
+            candidates.append(
+                self.__by_color_resolution.get(tuple(color_resolution), ()))
+        if depth_resolution is not None:
+            candidates.append(
+                self.__by_depth_resolution.get(tuple(depth_resolution), ()))
+        if fps is not None:
+            candidates.append(self.__by_fps.get(fps, ()))
+        if depth_bits is not None:
+            candidates.append(self.__by_depth_bits.get(depth_bits, ()))
+        if not candidates:
+            return self.__modes
+        candidates.sort(key=len)
+        others = [set(mode.iMode for mode in modes) for modes in candidates[1:]]
+        return tuple(
+            mode for mode in candidates[0]
+            if all(mode.iMode in indexes for indexes in others))
+
+    def get_resolutions(self):
+        """Get the resolutions in catalog.
+
+        Returns:
+            dict: The `color` and `depth` sorted lists of (width, height), excluding the disabled (0, 0).
+        """
+        return {
+            'color': sorted(r for r in self.__by_color_resolution if any(r)),
+            'depth': sorted(r for r in self.__by_depth_resolution if any(r)),
+        }
+
+    def get_fps_values(self):
+        return sorted(self.__by_fps)
+
+    def get_depth_bits_values(self):
+        return sorted(self.__by_depth_bits)
+
+
+def get_mode_catalog(pid, usb_type, backend=None):
+    """Get the shared mode catalog of camera module.
+
+    It is loaded from `modeConfig.db` at the first call for the product id, USB type and backend.
+
+    Args:
+        pid (int): The product id of camera module.
+        usb_type (int): The USB type. 3 for USB 3, otherwise USB 2.
+        backend (str or module): The backend to read the database. The default backend is used if None.
+
+    Returns:
+        obj: The class ModeCatalog.
+    """
+    backend = load_backend(backend)
+    key = (int(pid), _get_usb_type(usb_type), backend.__name__)
+    catalog = _catalogs.get(key)
+    if catalog is not None:
+        return catalog
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            try:
+                catalog = ModeCatalog.load(key[0], key[1], backend)
+            except Exception as e:
+                logger.exception(e)
+                raise e
+            _catalogs[key] = catalog
+    return catalog
+
+
+def clear_mode_catalogs():
+    """Clear the shared catalogs, e.g. after `modeConfig.db` is updated."""
+    with _catalogs_lock:
+        _catalogs.clear()
@@ -0,0 +1,250 @@
+import heapq
+import itertools
+import threading
+import time
+
+from eys3d import logger
+from .device import Device, EYS3DSystem
+from .frameset_pipeline import FrameSetPipeline
+from .bandwidth import BandwidthController
+
+__all__ = ["MultiCameraPipeline"]
+
+
+def get_frameset_timestamp(frameset):
+    """Get the timestamp of frameset.
+
+    The timestamp of frameset is the later one of color and depth frame,
+    because one of them is zero if the stream is disabled.
+
+    Args:
+        frameset (obj): The eys3dPy.FrameSet.
+
+    Returns:
+        int: The timestamp in microseconds.
+    """
+    return max(frameset.color_frame.tsUs, frameset.depth_frame.tsUs)
+
+
+class MultiCameraPipeline():
+    """This class is to manage the framesets of several camera devices.
+
+    This class opens the devices through one shared EYS3DSystem and starts one FrameSetPipeline on each device.
+    Each pipeline is drained by its own worker thread.
+    The framesets of all devices are merged into one stream ordered by timestamp (`tsUs`).
+
+    The merged stream is reordered in a window. A frameset is released when every running device has
+    delivered a frameset not older than it, or when it has waited longer than `reorder_window`.
+
+    The devices share one BandwidthController, so the streams oversubscribing a USB bus are
+    reported, downgraded or refused by `bandwidth_policy`. The refused device is not started.
+
+    Example:
+        pipe = MultiCameraPipeline()
+        pipe.start(conf)
+        ret, device_index, frameset = pipe.wait_frameset()
+
+    Args:
+        device_indexes (list): The indexes of devices would like to open. All of the enumerated devices are opened if None.
+        reorder_window (int): The maximun of time in milliseconds a frameset waits for reordering. Default is 50.
+        capacity (int): The maximum number of framesets kept in merged stream. The oldest is dropped if full. Default is 64.
+        backend (str or module): The backend of devices, `native` or `sim`. The default backend is used if None.
+        bandwidth_policy (str): The policy of BandwidthController. Default is WARN.
+    """
+    def __init__(self,
+                 device_indexes=None,
+                 reorder_window=50,
+                 capacity=64,
+                 backend=None,
+                 bandwidth_policy=BandwidthController.WARN):
+        self.__system = EYS3DSystem(backend)
+        if device_indexes is None:
+            device_indexes = range(self.__system.get_camera_device_count())
+        self.__devices = dict()
+        for index in device_indexes:
+            self.__devices[index] = Device(index, system=self.__system)
+        if not self.__devices:
+            raise Exception("The depth camera device is not found")
+        self.__bandwidth_controller = BandwidthController(bandwidth_policy)
+        self.__pipes = dict(
+            (index,
+             FrameSetPipeline(device=dev,
+                              bandwidth_controller=self.__bandwidth_controller))
+            for index, dev in self.__devices.items())
+        self.__started_pipes = dict()
+
+        self.__reorder_window = reorder_window / 1000.0
+        self.__capacity = capacity
+        self.__heap = []
+        self.__seq = itertools.count()
+        self.__cond = threading.Condition()
+        self.__latest_ts = dict()
+        self.__workers = []
+        self.__running = False
+
+        self.__start_time = None
+        self.__frame_count = dict((index, 0) for index in self.__devices)
+        self.__error_count = dict((index, 0) for index in self.__devices)
+        self.__dropped_count = 0
+
+    @logger.catch
+    def start(self, config, timeout=1600):
+        """Start the stream of all devices.
+
+        Args:
+            config (obj): The class Config. It could be a dictionary of Config with device index as key
+                if the devices use different setting.
+            timeout (int): The maximun of time in milliseconds for each worker to wait. Default is 1600.
+        """
+        if self.__running:
+            return
+        for index, pipe in self.__pipes.items():
+            if pipe.start(config[index] if isinstance(config, dict) else config):
+                self.__started_pipes[index] = pipe
+        self.__running = True
+        self.__start_time = time.monotonic()
+        for index, pipe in self.__started_pipes.items():
+            worker = threading.Thread(target=self.__run,
+                                      args=(index, pipe, timeout),
+                                      name="eys3d-camera-{}".format(index),
+                                      daemon=True)
+            worker.start()
+            self.__workers.append(worker)
+
+    def stop(self):
+        """Stop the stream of all devices.
+
+        To stop the workers and the stream of all devices.
+        """
+        self.__running = False
+        with self.__cond:
+            self.__cond.notify_all()
+        for pipe in self.__started_pipes.values():
+            pipe.stop()
+        for worker in self.__workers:
+            worker.join()
+        self.__workers = []
+        self.__started_pipes = dict()
+
+    def wait_frameset(self, timeout=1600):
+        """Wait for the earliest frameset of all devices.
+
+        The unit of timeout is milliseconds.
+
+        Args:
+            timeout (int): The maximun of time in milliseconds to wait. Default is 1600.
+
+        Returns:
+            bool : The return value is to mean the frameset is ready or not.
+            int : The index of device.
+            obj : The frameset.
+        """
+        deadline = time.monotonic() + timeout / 1000.0
+        with self.__cond:
+            while True:
+                now = time.monotonic()
+                if self.__heap:
+                    ts, _, index, arrival, frameset = self.__heap[0]
+                    release_time = arrival + self.__reorder_window
+                    if now >= release_time or self.__is_settled(ts):
+                        heapq.heappop(self.__heap)
+                        return True, index, frameset
+                    wake_time = min(release_time, deadline)
+                else:
+                    wake_time = deadline
+                if now >= deadline or not (self.__running or self.__heap):
+                    return False, None, None
+                self.__cond.wait(wake_time - now)
+
+    def __iter__(self):
+        """Iterate the merged framesets until stopped.
+
+        Yields:
+            tuple : The index of device and the frameset.
+        """
+        while self.__running or self.__heap:
+            ret, index, frameset = self.wait_frameset()
+            if ret:
+                yield index, frameset
+
+    def get_devices(self):
+        """Get the camera devices.
+
+        Returns:
+            dict : The class Device with device index as key.
+        """
+        return dict(self.__devices)
+
+    def get_pipelines(self):
+        """Get the pipelines of devices.
+
+        Returns:
+            dict : The class FrameSetPipeline with device index as key.
+        """
+        return dict(self.__pipes)
+
+    def get_bandwidth_controller(self):
+        """Get the bandwidth controller shared by devices.
+
+        Returns:
+            obj : The class BandwidthController.
+        """
+        return self.__bandwidth_controller
+
+    def get_statistics(self):
+        """Get the throughput statistics.
+
+        Returns:
+            dict: The statistics. The key is following:
+                * fps: The total framesets per second of all devices.
+                * frames: The total number of framesets of all devices.
+                * dropped: The number of framesets dropped because the merged stream is full.
+                * queued: The number of framesets waiting in merged stream.
+                * devices: The dictionary with device index as key. The value is a dictionary:
+                    * fps: The framesets per second.
+                    * frames: The number of framesets.
+                    * errors: The number of failed waits.
+                    * latest_ts: The timestamp of latest frameset.
+        """
+        elapsed = time.monotonic() - self.__start_time if self.__start_time else 0
+        devices = dict()
+        for index in self.__devices:
+            frames = self.__frame_count[index]
+            devices[index] = {
+                'fps': frames / elapsed if elapsed else 0.0,
+                'frames': frames,
+                'errors': self.__error_count[index],
+                'latest_ts': self.__latest_ts.get(index),
+            }
+        frames = sum(self.__frame_count.values())
+        return {
+            'fps': frames / elapsed if elapsed else 0.0,
+            'frames': frames,
+            'dropped': self.__dropped_count,
+            'queued': len(self.__heap),
+            'devices': devices,
+        }
+
+    def __is_settled(self, ts):
+        # No running device would deliver a frameset older than ts.
+        if len(self.__latest_ts) < len(self.__workers):
+            return False
+        return all(latest >= ts for latest in self.__latest_ts.values())
+
+    @logger.catch
+    def __run(self, index, pipe, timeout):
+        while self.__running:
+            ret, frameset = pipe.wait_frameset(timeout)
+            if not ret:
+                self.__error_count[index] += 1
+                continue
+            ts = get_frameset_timestamp(frameset)
+            with self.__cond:
+                self.__frame_count[index] += 1
+                self.__latest_ts[index] = ts
+                heapq.heappush(self.__heap, (ts, next(self.__seq), index,
+                                             time.monotonic(), frameset))
+                if len(self.__heap) > self.__capacity:
+                    heapq.heappop(self.__heap)
+                    self.__dropped_count += 1
+                self.__cond.notify_all()
@@ -0,0 +1,314 @@
+import gzip
+import os
+import queue
+import threading
+
+import numpy as np
+
+from eys3d import logger
+from .utils import get_EYS3D_HOME
+
+__all__ = ["write_ply", "write_pcd", "write_point_cloud", "PCFrameWriter"]
+
+_PLY_HEADER = """ply
+format binary_little_endian 1.0
+comment eYs3D point cloud
+element vertex {count}
+property float x
+property float y
+property float z
+{color}end_header
+"""
+_PLY_COLOR = """property uchar red
+property uchar green
+property uchar blue
+"""
+
+_PCD_HEADER = """# .PCD v0.7 - Point Cloud Data file format
+VERSION 0.7
+FIELDS x y z{fields}
+SIZE 4 4 4{sizes}
+TYPE F F F{types}
+COUNT 1 1 1{counts}
+WIDTH {count}
+HEIGHT 1
+VIEWPOINT 0 0 0 1 0 0 0
+POINTS {count}
+DATA binary
+"""
+
+
+def _get_points(xyz, rgb, skip_invalid):
+    xyz = np.asarray(xyz, dtype=np.float32).reshape(-1, 3)
+    if rgb is not None:
+        rgb = np.asarray(rgb, dtype=np.uint8).reshape(-1, 3)
+        if len(rgb) != len(xyz):
+            raise ValueError(
+                "The number of rgb ({}) is not the number of xyz ({}).".format(
+                    len(rgb), len(xyz)))
+    if skip_invalid:
+        # The point without depth is 0 in the buffers of PCFrame.
+        valid = xyz[:, 2] != 0
+        if not valid.all():
+            xyz = xyz[valid]
+            rgb = None if rgb is None else rgb[valid]
+    return (np.ascontiguousarray(xyz),
+            None if rgb is None else np.ascontiguousarray(rgb))
+
+
+def _interleave(xyz, rgb):
+    # The record of each point is x, y, z in float32 followed by the color bytes.
+    records = np.empty((len(xyz), 12 + rgb.shape[1]), dtype=np.uint8)
+    records[:, :12] = xyz.view(np.uint8).reshape(-1, 12)
+    records[:, 12:] = rgb
+    return records
+
+
+def _write_buffers(path, buffers, compress):
+    buffers = [memoryview(buffer).cast("B") for buffer in buffers]
+    if compress:
+        with gzip.open(path, "wb", compresslevel=1) as f:
+            for buffer in buffers:
+                f.write(buffer)
+        return
+    if not hasattr(os, "writev"):  # Windows
+        with open(path, "wb") as f:
+            for buffer in buffers:
+                f.write(buffer)
+        return
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # The header and the raw buffers are written by one system call. Continue if it is partial.
+        while buffers:
+            written = os.writev(fd, buffers)
+            while buffers and written >= len(buffers[0]):
+                written -= len(buffers[0])
+                buffers.pop(0)
+            if buffers:
+                buffers[0] = buffers[0][written:]
+    finally:
+        os.close(fd)
+
+
+def write_ply(path, xyz, rgb=None, skip_invalid=True, compress=False):
+    """Write the point cloud as binary little-endian PLY.
+
+    The xyz only cloud is written from the buffer without copying.
+
+    Args:
+        path (str): The path of file.
+        xyz (np.array): The xyz of points in float32, e.g. `PCFrame.get_xyz_data()`. The size is (N * 3).
+        rgb (np.array): The rgb of points in uint8, e.g. `PCFrame.get_rgb_data()`. The size is (N * 3). No color if None.
+        skip_invalid (bool): True to skip the points whose z is 0. Default is True.
+        compress (bool): True to compress the file by gzip. Default is False.
+
+    Returns:
+        int: The number of points written.
+    """
+    (xyz, rgb) = _get_points(xyz, rgb, skip_invalid)
+    header = _PLY_HEADER.format(count=len(xyz),
+                                color=_PLY_COLOR if rgb is not None else "")
+    data = xyz if rgb is None else _interleave(xyz, rgb)
+    _write_buffers(path, [header.encode("ascii"), data], compress)
+    return len(xyz)
+
+
+def write_pcd(path, xyz, rgb=None, skip_invalid=True, compress=False):
+    """Write the point cloud as binary PCD.
+
+    The rgb is packed as `rgb` field of PCL. The xyz only cloud is written from the buffer without copying.
+    The `binary_compressed` of PCL needs LZF, so the file is compressed by gzip if `compress` is True.
+
+    Args:
+        path (str): The path of file.
+        xyz (np.array): The xyz of points in float32. The size is (N * 3).
+        rgb (np.array): The rgb of points in uint8. The size is (N * 3). No color if None.
+        skip_invalid (bool): True to skip the points whose z is 0. Default is True.
+        compress (bool): True to compress the file by gzip. Default is False.
+
+    Returns:
+        int: The number of points written.
+    """
+    (xyz, rgb) = _get_points(xyz, rgb, skip_invalid)
+    if rgb is None:
+        header = _PCD_HEADER.format(count=len(xyz),
+                                    fields="",
+                                    sizes="",
+                                    types="",
+                                    counts="")
+        data = xyz
+    else:
+        header = _PCD_HEADER.format(count=len(xyz),
+                                    fields=" rgb",
+                                    sizes=" 4",
+                                    types=" U",
+                                    counts=" 1")
+        # The packed rgb of PCL is 0x00RRGGBB in little endian, which is the bytes of B, G, R and 0.
+        bgr0 = np.zeros((len(rgb), 4), dtype=np.uint8)
+        bgr0[:, :3] = rgb[:, ::-1]
+        data = _interleave(xyz, bgr0)
+    _write_buffers(path, [header.encode("ascii"), data], compress)
+    return len(xyz)
+
+
+def write_point_cloud(path, xyz, rgb=None, skip_invalid=True):
+    """Write the point cloud by the extension of path.
+
+    The extension is `.ply` or `.pcd`, with `.gz` to compress, e.g. `cloud.ply.gz`.
+
+    Args:
+        path (str): The path of file.
+        xyz (np.array): The xyz of points in float32. The size is (N * 3).
+        rgb (np.array): The rgb of points in uint8. The size is (N * 3). No color if None.
+        skip_invalid (bool): True to skip the points whose z is 0. Default is True.
+
+    Returns:
+        int: The number of points written.
+
+    Raises:
+        ValueError: The extension is not supported.
+    """
+    compress = path.endswith(".gz")
+    name = path[:-3] if compress else path
+    if name.endswith(".ply"):
+        return write_ply(path, xyz, rgb, skip_invalid, compress)
+    if name.endswith(".pcd"):
+        return write_pcd(path, xyz, rgb, skip_invalid, compress)
+    raise ValueError("The format of {} is not supported.".format(path))
+
+
+class PCFrameWriter:
+    """This class writes the point cloud frames continuously on its own thread.
+
+    It could be passed as `PCFrameCallback` of `Device.open_device`.
+    The callback only takes every Nth frame into a bounded queue and returns, so the callback thread is not blocked
+    by the disk. The frame is skipped and counted as dropped if the queue is full.
+    Each frame is written to `pc-{serial number}.{format}` in the directory.
+
+    Example:
+        writer = PCFrameWriter(every=10)
+        writer.start()
+        device.open_device(conf, PCFrameCallback=writer)
+        device.enable_PC_stream()
+        ...
+        writer.stop()
+
+    Args:
+        directory (str): The directory to write. Default is `EYS3D_HOME/point_cloud`.
+        fmt (str): The format, `ply` or `pcd`. Default is `ply`.
+        every (int): Write one of every N frames. Default is 1.
+        capacity (int): The maximum number of frames waiting to write. Default is 4.
+        color (bool): True to write the rgb of points. Default is True.
+        compress (bool): True to compress the files by gzip. Default is False.
+        copy (bool): True to copy the buffers in callback, in case they are reused after callback returns. Default is True.
+    """
+    def __init__(self,
+                 directory=None,
+                 fmt="ply",
+                 every=1,
+                 capacity=4,
+                 color=True,
+                 compress=False,
+                 copy=True):
+        if fmt not in ("ply", "pcd"):
+            raise ValueError("The format {} is not supported.".format(fmt))
+        if every <= 0 or capacity <= 0:
+            raise ValueError("The every and capacity should be positive.")
+        self.__directory = directory or os.path.join(get_EYS3D_HOME(),
+                                                     "point_cloud")
+        self.__extension = "{}.gz".format(fmt) if compress else fmt
+        self.__every = every
+        self.__color = color
+        self.__copy = copy
+        self.__queue = queue.Queue(maxsize=capacity)
+        self.__thread = None
+
+        self.__received_count = 0
+        self.__written_count = 0
+        self.__dropped_count = 0
+        self.__failed_count = 0
+
+    def __call__(self, pcframe):
+        self.write(pcframe)
+
+    def start(self):
+        """Start the writer thread."""
+        if self.__thread is not None:
+            return
+        os.makedirs(self.__directory, exist_ok=True)
+        self.__thread = threading.Thread(target=self.__run,
+                                         name="eys3d-pc-writer",
+                                         daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Stop the writer thread.
+
+        To write the frames in queue and then stop the writer thread.
+        """
+        if self.__thread is None:
+            return
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__thread = None
+
+    def write(self, pcframe):
+        """Take the point cloud frame to write.
+
+        It returns immediately. Only every Nth frame is taken.
+
+        Args:
+            pcframe (obj): The eys3dPy.PCFrame.
+
+        Returns:
+            bool: True if the frame is taken to write.
+        """
+        self.__received_count += 1
+        if (self.__received_count - 1) % self.__every:
+            return False
+        xyz = pcframe.get_xyz_data()
+        rgb = pcframe.get_rgb_data() if self.__color else None
+        if self.__copy:
+            xyz = np.array(xyz, copy=True)
+            rgb = None if rgb is None else np.array(rgb, copy=True)
+        try:
+            self.__queue.put_nowait((pcframe.get_serial_number(), xyz, rgb))
+        except queue.Full:
+            self.__dropped_count += 1
+            return False
+        return True
+
+    def get_statistics(self):
+        """Get the statistics of writer.
+
+        Returns:
+            dict: The statistics. The key is following:
+                * received: The number of frames received.
+                * written: The number of files written.
+                * dropped: The number of frames dropped because the queue is full.
+                * failed: The number of files failed to write.
+                * queued: The number of frames waiting to write.
+        """
+        return {
+            'received': self.__received_count,
+            'written': self.__written_count,
+            'dropped': self.__dropped_count,
+            'failed': self.__failed_count,
+            'queued': self.__queue.qsize(),
+        }
+
+    def __run(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+            (serial_number, xyz, rgb) = item
+            path = os.path.join(
+                self.__directory,
+                "pc-{:08d}.{}".format(serial_number, self.__extension))
+            try:
+                write_point_cloud(path, xyz, rgb)
+                self.__written_count += 1
+            except (OSError, ValueError):
+                self.__failed_count += 1
+                logger.exception("Failed to write point cloud {}".format(path))
@@ -1,12 +1,70 @@
+import asyncio
 import threading
 
 import time
 import numpy as np
+from contextlib import contextmanager
 
 from eys3d import logger
-import eys3dPy
 from .device import Device
 from .config import Config, ModeConfig
+from .frame_pool import FramePool
+from .metrics import PipelineMetrics
+from .aio import add_streams, remove_streams, run_wait_in_worker
+from .depth import get_depth_data_type
+
+# The bytes per pixel of raw color data. It is 2 for YUY2, and MJPG is compressed into less.
+COLOR_BYTES_PER_PIXEL = 2
+
+
+def get_depth_bytes_per_pixel(config):
+    """Get the bytes per pixel of raw depth data of config.
+
+    Args:
+        config (obj): The class Config.
+
+    Returns:
+        int: The bytes per pixel. It is 2 if the depth data type is unknown.
+    """
+    try:
+        return get_depth_data_type(
+            config.get_config()['depthFormat']).bytes_per_pixel
+    except ValueError:
+        return 2
+
+
+def create_frame(backend, shape, bytes_per_pixel):
+    """Create the frame with the buffers reserved for the resolution.
+
+    The buffers for raw data, z value and rgb are reserved in the order of Frame.h.
+    They keep the capacity when the frame is reused, e.g. in `FramePool`.
+
+    Args:
+        backend (module): The backend module.
+        shape (tuple): The (H, W) of frame.
+        bytes_per_pixel (int): The bytes per pixel of raw data.
+
+    Returns:
+        obj: The eys3dPy.Frame.
+    """
+    (height, width) = shape
+    return backend.Frame(height * width * bytes_per_pixel, 0, height * width,
+                         0, height * width * 3, 0)
+
+
+def get_remaining_timeout(timeout, start):
+    """Get the time left of timeout.
+
+    Args:
+        timeout (int): The timeout in milliseconds. It is negative to wait forever.
+        start (float): The `time.monotonic()` when the timeout started.
+
+    Returns:
+        int: The milliseconds left, at least 0. It is the timeout itself if negative.
+    """
+    if timeout < 0:
+        return timeout
+    return max(int(timeout - (time.monotonic() - start) * 1000), 0)
 
 
 class Pipeline():
@@ -21,12 +79,25 @@ class Pipeline():
 
     Args:
         device_index (int): Index for device would like to initialize.
+        device (obj): The class Device. It would be used instead of creating one by device_index.
+        pool_size (int): The number of pre-allocated frames for `borrow_color_frame` and `borrow_depth_frame`.
+            Default is 0 and frame pool is disabled.
+        backend (str or module): The backend of device created by device_index, `native` or `sim`.
+            The default backend is used if None. Please refer `load_backend`.
+        bandwidth_controller (obj): The class BandwidthController to admit the stream on USB bus.
+            The pipelines on one host should share it. The stream is not controlled if None.
     """
-    def __init__(self, device_index=0, device=None):
+    def __init__(self,
+                 device_index=0,
+                 device=None,
+                 pool_size=0,
+                 backend=None,
+                 bandwidth_controller=None):
         if device:
             self.__dev = device
         else:
-            self.__dev = Device(device_index)
+            self.__dev = Device(device_index, backend=backend)
+        self.__backend = self.__dev.get_backend()
         self.__config = None
         self.__pipe = None
         self.dev_info = self.__dev.get_device_info()
@@ -37,6 +108,15 @@ class Pipeline():
         self.__depth_accuracy_info = None
         self.__depth_zValue = None
 
+        self.__pool_size = pool_size
+        self.__color_frame_pool = None
+        self.__depth_frame_pool = None
+
+        self.__metrics = PipelineMetrics()
+
+        self.__bandwidth_controller = bandwidth_controller
+        self.__bandwidth_report = None
+
         self.__status = False
 
     @logger.catch
@@ -49,6 +129,8 @@ class Pipeline():
         Args:
             config (obj): The class Config.
 
+        Returns:
+            bool: False if the stream is refused by the bandwidth controller.
         """
         if config is None and self.__config is None:
             logger.exception("Config needed for device setting.")
@@ -57,16 +139,36 @@ class Pipeline():
             self.__config = config
 
         if not self.__status:
+            if self.__bandwidth_controller is not None:
+                admitted, self.__bandwidth_report = self.__bandwidth_controller.admit(
+                    self.__dev, self.__config)
+                if not admitted:
+                    return False
+                # The device is opened with the downgraded copy of config if downgraded.
+                self.__config = self.__bandwidth_report['config']
             self.__status = True
+            add_streams(2)
             self.__pipe = self.__dev.open_device_with_pipeline(
                 config=self.__config, sync=False)
             self.__color_frame_shape = self.__config.get_color_stream_resolution(
             )
             self.__depth_frame_shape = self.__config.get_depth_stream_resolution(
             )
+            if self.__pool_size:
+                depth_bytes_per_pixel = get_depth_bytes_per_pixel(
+                    self.__config)
+                self.__color_frame_pool = FramePool(
+                    self.__pool_size, lambda: create_frame(
+                        self.__backend, self.__color_frame_shape,
+                        COLOR_BYTES_PER_PIXEL))
+                self.__depth_frame_pool = FramePool(
+                    self.__pool_size, lambda: create_frame(
+                        self.__backend, self.__depth_frame_shape,
+                        depth_bytes_per_pixel))
 
         """self.__dev.enable_stream()"""
         self.__dev.enable_color_depth_stream()
+        return True
 
     @logger.catch
     def get_color_frame(self, ):
@@ -82,14 +184,18 @@ class Pipeline():
             bool : The return value is to mean the frame data is ready or not.
             np.array : The array of frame data. The shape is (H, W, 3) if rgb data. The shape is (H, W, 2) if raw data.
         """
-        frame = eys3dPy.Frame(0, 0, 0)
+        frame = self.__backend.Frame(0, 0, 0)
         ret = self.__pipe.get_color_frame(frame)
-        if ret == eys3dPy.PIPELINE_RESULT.OK:
+        if ret == self.__backend.PIPELINE_RESULT.OK:
+            self.__metrics.record_frame("color", frame)
             return True, frame
+        if ret == self.__backend.PIPELINE_RESULT.QUEUE_EMPTY:  # It is normal when polling.
+            return False, None
         else:
+            self.__metrics.record_result("color", ret)
             logger.warning(
                 "`get_color_frame` is failed. The return value = {}.".format(
-                    eys3dPy.PIPELINE_RESULT(ret)))
+                    self.__backend.PIPELINE_RESULT(ret)))
             return False, None
 
     @logger.catch
@@ -105,14 +211,18 @@ class Pipeline():
             bool : The return value is to mean the frame data is ready or not.
             np.array : The array of frame data. The shape is (H, W, 3) if rgb data. The shape is (H, W, 2) if raw data.
         """
-        frame = eys3dPy.Frame(0, 0, 0)
+        frame = self.__backend.Frame(0, 0, 0)
         ret = self.__pipe.get_depth_frame(frame)
-        if ret == eys3dPy.PIPELINE_RESULT.OK:
+        if ret == self.__backend.PIPELINE_RESULT.OK:
+            self.__metrics.record_frame("depth", frame)
             return True, frame
+        if ret == self.__backend.PIPELINE_RESULT.QUEUE_EMPTY:  # It is normal when polling.
+            return False, None
         else:
+            self.__metrics.record_result("depth", ret)
             logger.warning(
                 "`get_depth_frame` is failed. The return value = {}.".format(
-                    eys3dPy.PIPELINE_RESULT(ret)))
+                    self.__backend.PIPELINE_RESULT(ret)))
             return False, None
 
     @logger.catch
@@ -131,14 +241,16 @@ class Pipeline():
             bool : The return value is to mean the frame data is ready or not.
             np.array : The array of frame data. The shape is (H, W, 3) if rgb data. The shape is (H, W, 2) if raw data.
         """
-        frame = eys3dPy.Frame(0, 0, 0)
+        frame = self.__backend.Frame(0, 0, 0)
         ret = self.__pipe.wait_color_frame(frame, timeout)
-        if ret == eys3dPy.PIPELINE_RESULT.OK:
+        if ret == self.__backend.PIPELINE_RESULT.OK:
+            self.__metrics.record_frame("color", frame)
             return True, frame
         else:
+            self.__metrics.record_result("color", ret)
             logger.warning(
                 "`wait_color_frame` is failed. The return value = {}.".format(
-                    eys3dPy.PIPELINE_RESULT(ret)))
+                    self.__backend.PIPELINE_RESULT(ret)))
             return False, None
 
     @logger.catch
@@ -158,16 +270,184 @@ class Pipeline():
             np.array : The array of frame data. The shape is (H, W, 3) if rgb data. The shape is (H, W, 2) if raw data.
         """
 
-        frame = eys3dPy.Frame(0, 0, 0)
+        frame = self.__backend.Frame(0, 0, 0)
         ret = self.__pipe.wait_depth_frame(frame, timeout)
-        if ret == eys3dPy.PIPELINE_RESULT.OK:
+        if ret == self.__backend.PIPELINE_RESULT.OK:
+            self.__metrics.record_frame("depth", frame)
             return True, frame
         else:
+            self.__metrics.record_result("depth", ret)
             logger.warning(
                 "`wait_depth_frame` is failed. The return value = {}.".format(
-                    eys3dPy.PIPELINE_RESULT(ret)))
+                    self.__backend.PIPELINE_RESULT(ret)))
             return False, None
 
+    async def next_color_frame(self, timeout=1600):
+        """Wait for color frame in asyncio.
+
+        It is the coroutine version of `wait_color_frame`.
+        The waiting is run on the thread pool shared by all pipelines, so the event loop is not blocked.
+        The GIL is not released while waiting. Please refer `eys3d.aio.run_in_worker` in detail.
+
+        Example:
+            ret, frame = await pipe.next_color_frame()
+
+        Args:
+            timeout (int): The maximun of time in milliseconds to wait. Default is 1600.
+
+        Returns:
+            bool : The return value is to mean the frame data is ready or not.
+            obj : The color frame.
+        """
+        return await run_wait_in_worker(self.wait_color_frame, timeout)
+
+    async def next_depth_frame(self, timeout=1600):
+        """Wait for depth frame in asyncio.
+
+        It is the coroutine version of `wait_depth_frame`.
+        Please refer `next_color_frame` in detail.
+
+        Args:
+            timeout (int): The maximun of time in milliseconds to wait. Default is 1600.
+
+        Returns:
+            bool : The return value is to mean the frame data is ready or not.
+            obj : The depth frame.
+        """
+        return await run_wait_in_worker(self.wait_depth_frame, timeout)
+
+    async def frames(self, color=True, depth=True, timeout=1600):
+        """Iterate the frames in asyncio.
+
+        It is the asynchronous generator of color and depth frames.
+        The color and depth frames are waited at the same time and yielded as a pair.
+        The frame is None if its stream is not selected or not ready.
+        It stops after the pipeline stopped.
+
+        Example:
+            async for (cframe, dframe) in pipe.frames():
+                ...
+
+        Args:
+            color (bool): Wait for color frame. Default is True.
+            depth (bool): Wait for depth frame. Default is True.
+            timeout (int): The maximun of time in milliseconds to wait for each frame. Default is 1600.
+
+        Yields:
+            tuple : The color frame and depth frame.
+
+        Raises:
+            Exception: The pipeline is not started.
+        """
+        if not (color or depth):
+            raise ValueError("At least one of color and depth should be selected.")
+        if not self.__status:
+            raise Exception("The pipeline is not started.")
+        while self.__status:
+            (cret, cframe), (dret, dframe) = await asyncio.gather(
+                self.next_color_frame(timeout) if color else self.__none(),
+                self.next_depth_frame(timeout) if depth else self.__none())
+            if cret or dret:
+                yield (cframe, dframe)
+
+    async def __none(self):
+        return False, None
+
+    def borrow_color_frame(self, timeout=1600):
+        """Borrow the color frame from frame pool.
+
+        To wait for color frame like `wait_color_frame`, but the frame is borrowed from frame pool.
+        The frame is returned to pool when leaving the `with` block, so its buffers are reused by next call.
+        It is available if `pool_size` is set when pipeline initialized.
+        It would not wait if timeout is 0.
+
+        Example:
+            with pipe.borrow_color_frame() as frame:
+                if frame is not None:
+                    rgb_image = FrameView(frame).get_rgb_image()
+
+        Notice:
+            The frame and its data should not be used after leaving the `with` block.
+            Please copy the data if it is needed.
+
+        Args:
+            timeout (int): The maximun of time in milliseconds to wait. Default is 1600.
+
+        Returns:
+            obj : The context manager. It yields the frame, or None if the frame is not ready.
+        """
+        return self.__borrow_frame(self.__color_frame_pool,
+                                   self.__pipe.get_color_frame,
+                                   self.__pipe.wait_color_frame, timeout,
+                                   "borrow_color_frame", "color")
+
+    def borrow_depth_frame(self, timeout=1600):
+        """Borrow the depth frame from frame pool.
+
+        To wait for depth frame like `wait_depth_frame`, but the frame is borrowed from frame pool.
+        Please refer `borrow_color_frame` in detail.
+
+        Args:
+            timeout (int): The maximun of time in milliseconds to wait. Default is 1600.
+
+        Returns:
+            obj : The context manager. It yields the frame, or None if the frame is not ready.
+        """
+        return self.__borrow_frame(self.__depth_frame_pool,
+                                   self.__pipe.get_depth_frame,
+                                   self.__pipe.wait_depth_frame, timeout,
+                                   "borrow_depth_frame", "depth")
+
+    @contextmanager
+    def __borrow_frame(self, pool, get_frame, wait_frame, timeout, name,
+                       stream):
+        if pool is None:
+            raise Exception(
+                "Frame pool is disabled. Please set pool_size and start pipeline."
+            )
+        start = time.monotonic()
+        # The negative timeout means waiting forever.
+        with pool.borrow(timeout / 1000.0 if timeout >= 0 else None) as frame:
+            # The borrow and the wait share the timeout.
+            remaining = get_remaining_timeout(timeout, start)
+            if remaining == 0:
+                ret = get_frame(frame)
+            else:
+                ret = wait_frame(frame, remaining)
+            if ret == self.__backend.PIPELINE_RESULT.OK:
+                self.__metrics.record_frame(stream, frame)
+                yield frame
+            else:
+                # The empty queue is normal when polling.
+                if (timeout != 0 or
+                        ret != self.__backend.PIPELINE_RESULT.QUEUE_EMPTY):
+                    self.__metrics.record_result(stream, ret)
+                    logger.warning(
+                        "`{}` is failed. The return value = {}.".format(
+                            name, self.__backend.PIPELINE_RESULT(ret)))
+                yield None
+
+    def get_metrics(self):
+        """Get the metrics of pipeline.
+
+        To get the fps, latency, transcoding time and failed results of the frames got from pipeline.
+        Please refer `PipelineMetrics` in detail.
+
+        Returns:
+            obj : The class PipelineMetrics.
+        """
+        return self.__metrics
+
+    def get_bandwidth_report(self):
+        """Get the report of bandwidth controller at start.
+
+        Please refer `BandwidthController.admit` in detail.
+
+        Returns:
+            dict : The report. It is None if the stream is not controlled.
+        """
+        return self.__bandwidth_report
+
     def get_device(self):
         """Get the camera device.
 
@@ -200,8 +480,12 @@ class Pipeline():
 
         To stop the stream and then release device.
         """
+        if self.__status:
+            remove_streams(2)
         self.__status = False
         self.__dev.close_stream()
+        if self.__bandwidth_controller is not None:
+            self.__bandwidth_controller.release(self.__dev)
 
     def is_interleave_mode_enabled(self):
         """Get the status of interleaveMode.
@@ -0,0 +1,121 @@
+"""The playback of recordings through the Pipeline API.
+
+The recording written by `FrameSetRecorder` is played by the simulated backend,
+so the code using Pipeline or FrameSetPipeline is unchanged.
+The recording is memory-mapped and the frames are read-only views of it without copying.
+
+Example:
+    from eys3d import simulator
+    simulator.configure(recording="capture.eys3d", realtime=False, loop=True)
+    pipe = FrameSetPipeline(backend="sim")
+    pipe.start(conf)
+    ret, frameset = pipe.wait_frameset()
+
+It could also be selected by the environment variables without changing code:
+    EYS3D_BACKEND=sim EYS3D_SIM_RECORDING=capture.eys3d python app.py
+"""
+import numpy as np
+
+from eys3d import logger
+from .recorder import ENTRY_FRAMESET, FrameSetReader
+from .simulator import Frame
+
+__all__ = ["RecordingSource"]
+
+
+class RecordingSource:
+    """The framesets of recording played by the simulated camera module.
+
+    The frames are produced in the order of recording. They keep the recorded `tsUs` and `serialNumber`.
+    When the recording is looped, they are shifted by the duration and the range of serial numbers of recording
+    so they keep increasing.
+    In real time, the frames are paced by the recorded timestamps divided by `speed`.
+
+    The ZD value and rgb data are empty if they are not recorded. Please record with `zd=True` and `rgb=True`
+    if they are used after playback.
+
+    Args:
+        conf (dict): The stream setting of camera module.
+        settings (dict): The settings of simulator. Please refer `simulator.configure`.
+    """
+    def __init__(self, conf, settings):
+        self.__reader = FrameSetReader(settings['recording'])
+        index = self.__reader.get_index()
+        self.__entries = np.flatnonzero(index['kind'] == ENTRY_FRAMESET)
+        if not len(self.__entries):
+            self.__reader.close()
+            raise Exception("No frameset is in the recording: {}".format(
+                settings['recording']))
+        self.__ts = index['tsUs'][self.__entries].astype(np.int64)
+        self.__serial_numbers = index['serialNumber'][self.__entries].astype(
+            np.int64)
+        self.__loop = settings['loop']
+        self.__speed = float(settings['speed'])
+        # The interval after the last frame is the usual interval of recording.
+        intervals = np.diff(self.__ts)
+        self.__period = int(np.median(intervals)) if len(
+            intervals) else int(1000000 / conf['fps'])
+        self.__duration = int(self.__ts[-1] - self.__ts[0]) + self.__period
+        # The recorded serial numbers could have gaps, e.g. the frames dropped while recording.
+        self.__serial_span = int(self.__serial_numbers[-1] -
+                                 self.__serial_numbers[0]) + 1
+        self.__cache = (None, None)
+
+        frameset = self.__read(0)
+        for (frame, shape, name) in (
+            (frameset.color_frame, conf['color'], "color"),
+            (frameset.depth_frame, conf['depth'], "depth")):
+            if frame.width and (frame.height, frame.width) != tuple(shape):
+                logger.warning(
+                    "The {} stream of recording is {}x{}, not the config {}x{}."
+                    .format(name, frame.width, frame.height, shape[1],
+                            shape[0]))
+
+    def get_count(self):
+        return len(self.__entries)
+
+    def is_looping(self):
+        return self.__loop
+
+    def get_interval(self, n):
+        k = n % self.get_count()
+        interval = self.__ts[k] - self.__ts[k - 1] if k else (
+            self.__period if n else 0)
+        return max(int(interval), 0) / 1000000.0 / self.__speed
+
+    def get_stamp(self, n, serial_number):
+        (cycle, k) = divmod(n, self.get_count())
+        return (int(self.__ts[k]) + cycle * self.__duration,
+                int(self.__serial_numbers[k]) + cycle * self.__serial_span)
+
+    def get_color_frame(self, k):
+        return self.__make_frame(self.__read(k).color_frame)
+
+    def get_depth_frame(self, k):
+        return self.__make_frame(self.__read(k).depth_frame)
+
+    def get_point_cloud(self, k):
+        return None  # The point cloud is not recorded.
+
+    def close(self):
+        self.__cache = (None, None)
+        self.__reader.close()
+
+    def __read(self, k):
+        # The color and depth frame of one frameset are read once.
+        if self.__cache[0] != k:
+            self.__cache = (k, self.__reader.read(int(self.__entries[k])))
+        return self.__cache[1]
+
+    def __make_frame(self, recorded):
+        if not recorded.width:
+            return None
+        frame = Frame()
+        frame.width = recorded.width
+        frame.height = recorded.height
+        frame.dataFormat = recorded.dataFormat
+        frame.interleaveMode = recorded.interleaveMode
+        frame.dataVec = recorded.dataVec
+        frame.zdDepthVec = recorded.zdDepthVec
+        frame.rgbVec = recorded.rgbVec
+        return frame
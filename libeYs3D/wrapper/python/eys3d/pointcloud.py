@@ -0,0 +1,272 @@
+import collections
+import threading
+
+import numpy as np
+
+from .depth import as_z_map
+
+__all__ = [
+    "get_intrinsics", "get_ray_table_key", "depth_to_points", "RayTable",
+    "RayTableCache", "ray_table_cache"
+]
+
+
+def get_intrinsics(rect_log_data, width, height):
+    """Get the intrinsics of rectified left image at the resolution of depth.
+
+    The intrinsics are taken from `ReProjectMat`, or from `NewCamMat1` if `ReProjectMat` is empty.
+    They are in the resolution of rectified single image (`OutImgWidth` / 2 x `OutImgHeight`),
+    so they are scaled to the resolution of depth.
+
+    Args:
+        rect_log_data (obj): The class RectLogData from `Device.get_rectify_mat_log_data`, or its dictionary.
+        width (int): The width of depth.
+        height (int): The height of depth.
+
+    Returns:
+        tuple: The (fx, fy, cx, cy) in pixels of depth.
+    """
+    log = rect_log_data if isinstance(rect_log_data,
+                                      dict) else vars(rect_log_data)
+    reproject = np.asarray(log['ReProjectMat'], dtype=np.float64).reshape(-1)
+    if reproject[11]:
+        # The reprojection matrix is [1 0 0 -cx; 0 1 0 -cy; 0 0 0 f; 0 0 -1/Tx (cx - cx')/Tx].
+        (fx, fy, cx, cy) = (reproject[11], reproject[11], -reproject[3],
+                            -reproject[7])
+    else:
+        camera = np.asarray(log['NewCamMat1'], dtype=np.float64).reshape(-1)
+        (fx, fy, cx, cy) = (camera[0], camera[5], camera[2], camera[6])
+    scale_x = width / (log['OutImgWidth'] / 2.0)
+    scale_y = height / float(log['OutImgHeight'])
+    return (fx * scale_x, fy * scale_y, cx * scale_x, cy * scale_y)
+
+
+def get_ray_table_key(rect_log_data, width, height):
+    """Get the key of ray table in `ray_table_cache`.
+
+    The key is (fx, fy, cx, cy, width, height), so the devices and `depth_to_points` share the table
+    of same intrinsics and resolution.
+
+    Args:
+        rect_log_data (obj): The class RectLogData, or its dictionary.
+        width (int): The width of depth.
+        height (int): The height of depth.
+
+    Returns:
+        tuple: The key of table.
+    """
+    return get_intrinsics(rect_log_data, width, height) + (width, height)
+
+
+class RayTable:
+    """The rays of pixels of depth at one resolution.
+
+    The ray of pixel (u, v) is `((u - cx) / fx, (v - cy) / fy, 1)`,
+    so the point of pixel is `z * ray` by a single multiply.
+
+    Args:
+        fx (float): The focal length in pixels of x.
+        fy (float): The focal length in pixels of y.
+        cx (float): The x of principal point.
+        cy (float): The y of principal point.
+        width (int): The width of depth.
+        height (int): The height of depth.
+    """
+    def __init__(self, fx, fy, cx, cy, width, height):
+        self.fx = fx
+        self.fy = fy
+        self.cx = cx
+        self.cy = cy
+        self.width = width
+        self.height = height
+        self.rays = np.empty((height, width, 3), dtype=np.float32)
+        self.rays[..., 0] = ((np.arange(width) - cx) / fx)[None, :]
+        self.rays[..., 1] = ((np.arange(height) - cy) / fy)[:, None]
+        self.rays[..., 2] = 1
+        self.rays.flags.writeable = False
+
+    @classmethod
+    def from_rect_log_data(cls, rect_log_data, width, height):
+        return cls(*get_intrinsics(rect_log_data, width, height), width,
+                   height)
+
+    def get_shape(self):
+        return (self.height, self.width)
+
+    def get_intrinsics(self):
+        return (self.fx, self.fy, self.cx, self.cy)
+
+    def get_size(self):
+        return self.rays.nbytes
+
+
+class RayTableCache:
+    """This class caches the ray tables in least recently used order with bounded memory.
+
+    The key is usually from `get_ray_table_key`, i.e. the intrinsics and resolution of depth.
+    `Device.get_rectify_mat_log_data` puts the table of its depth resolution into `ray_table_cache`,
+    so the 3D consumers of device get it without computing the intrinsics again.
+
+    Args:
+        max_bytes (int): The maximum size in bytes of tables. The least recently used is evicted. Default is 64 MiB.
+    """
+    def __init__(self, max_bytes=64 << 20):
+        self.__max_bytes = max_bytes
+        self.__size = 0
+        self.__tables = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__tables)
+
+    def get(self, key):
+        """Get the ray table.
+
+        Args:
+            key (tuple): The key of table.
+
+        Returns:
+            obj: The class RayTable. It is None if not cached.
+        """
+        with self.__lock:
+            table = self.__tables.get(key)
+            if table is not None:
+                self.__tables.move_to_end(key)
+            return table
+
+    def get_or_create(self, key, rect_log_data, width, height):
+        """Get the ray table, or create it from rectify log data if not cached.
+
+        Args:
+            key (tuple): The key of table.
+            rect_log_data (obj): The class RectLogData, or its dictionary.
+            width (int): The width of depth.
+            height (int): The height of depth.
+
+        Returns:
+            obj: The class RayTable.
+        """
+        table = self.get(key)
+        if table is None:
+            table = RayTable.from_rect_log_data(rect_log_data, width, height)
+            self.put(key, table)
+        return table
+
+    def put(self, key, table):
+        with self.__lock:
+            previous = self.__tables.pop(key, None)
+            if previous is not None:
+                self.__size -= previous.get_size()
+            self.__tables[key] = table
+            self.__size += table.get_size()
+            # The newest table is kept even if it is larger than the bound.
+            while self.__size > self.__max_bytes and len(self.__tables) > 1:
+                _, evicted = self.__tables.popitem(last=False)
+                self.__size -= evicted.get_size()
+
+    def get_size(self):
+        """Get the size of cached tables.
+
+        Returns:
+            int: The size in bytes.
+        """
+        return self.__size
+
+    def clear(self):
+        with self.__lock:
+            self.__tables.clear()
+            self.__size = 0
+
+
+ray_table_cache = RayTableCache()  # The cache shared by devices and depth_to_points.
+
+
+def depth_to_points(depth,
+                    rect_log_data,
+                    color=None,
+                    stride=1,
+                    roi=None,
+                    z_range=None,
+                    organized=False,
+                    shape=None):
+    """Convert the z value of depth to point cloud.
+
+    The point is in the coordinate of rectified left camera in millimeters:
+    x is right, y is down and z is forward.
+    The pixel without depth (z value is 0) or out of `z_range` is not a point.
+
+    Example:
+        rect_log_data = device.get_rectify_mat_log_data()
+        xyz, rgb = depth_to_points(dframe, rect_log_data, color=cframe, z_range=device.get_z_range())
+
+    Args:
+        depth (obj): The depth frame, the z value image or the flat ZD buffer. Please refer `depth.as_z_map`.
+        rect_log_data (obj): The class RectLogData, or its dictionary, or the class RayTable of depth,
+            e.g. from `Device.get_ray_table`.
+        color (obj): The color frame (eys3dPy.Frame or FrameView) or the rgb image of shape (H, W, 3).
+            It is sampled at the nearest pixel if the resolution is different from depth. No rgb if None.
+        stride (int): The step of pixels to subsample. Default is 1.
+        roi (tuple): The (x1, y1, x2, y2) of depth to convert. x2 and y2 are exclusive. The whole depth if None.
+        z_range (tuple or dict): The (ZNear, ZFar) in millimeters, or the dictionary of `Device.get_z_range()`.
+            No clipping if None.
+        organized (bool): True to return the points in the shape of image, and the point without depth is 0.
+            Otherwise only the points with depth are returned. Default is False.
+        shape (tuple): The (H, W) of flat ZD buffer. It is not needed for frame or image.
+
+    Returns:
+        np.array: The xyz of points. The shape is (N, 3), or (H', W', 3) if organized. The dtype is float32.
+        np.array: The rgb of points. The shape is same as xyz and dtype is uint8. It is None if no color.
+    """
+    z_map = as_z_map(depth, shape)
+    (height, width) = z_map.shape
+    (x1, y1, x2, y2) = roi if roi is not None else (0, 0, width, height)
+    if isinstance(rect_log_data, RayTable):
+        table = rect_log_data
+        if table.get_shape() != (height, width):
+            raise ValueError(
+                "The ray table of {} is not the depth of {}.".format(
+                    table.get_shape(), (height, width)))
+    else:
+        table = ray_table_cache.get_or_create(
+            get_ray_table_key(rect_log_data, width, height), rect_log_data,
+            width, height)
+    columns = slice(x1, x2, stride)
+    rows = slice(y1, y2, stride)
+
+    z = z_map[rows, columns]
+    valid = z > 0
+    if z_range is not None:
+        (near, far) = (z_range["Near"],
+                       z_range["Far"]) if isinstance(z_range,
+                                                     dict) else z_range
+        valid &= (z >= near) & (z <= far)
+    xyz = z.astype(np.float32)[..., None] * table.rays[rows, columns]
+
+    rgb = None
+    if color is not None:
+        image = _as_rgb_image(color)
+        (color_height, color_width) = image.shape[:2]
+        if (color_height, color_width) == (height, width):
+            rgb = image[rows, columns]
+            if organized:
+                rgb = rgb.copy()  # The invalid points are cleared below.
+        else:
+            color_rows = np.arange(height)[rows] * color_height // height
+            color_columns = np.arange(width)[columns] * color_width // width
+            rgb = image[color_rows[:, None], color_columns[None, :]]
+
+    if organized:
+        xyz[~valid] = 0
+        if rgb is not None:
+            rgb[~valid] = 0
+        return (xyz, rgb)
+    return (xyz[valid], None if rgb is None else rgb[valid])
+
+
+def _as_rgb_image(color):
+    if hasattr(color, "get_rgb_image"):  # FrameView
+        return color.get_rgb_image()
+    if hasattr(color, "get_rgb_data"):
+        return np.asarray(color.get_rgb_data(), dtype=np.uint8).reshape(
+            color.get_height(), color.get_width(), 3)
+    return np.asarray(color, dtype=np.uint8)
@@ -0,0 +1,548 @@
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from eys3d import logger
+
+__all__ = [
+    "FrameSetRecorder", "FrameSetReader", "RecordedFrame", "RecordedFrameSet",
+    "RecordedSensorData"
+]
+
+# The layout of recording. All of the fields are little endian.
+#
+#   file header   : magic, version, length of metadata, metadata in JSON
+#   record        : record header, payload, padding to 8 bytes
+#   ...
+#   index         : one entry per frameset, frame or IMU sample
+#   footer        : magic, offset of index, count of entries
+#
+# The records of one entry are contiguous, so an entry is read by one slice of file.
+# The payloads are aligned to 8 bytes and could be viewed by numpy without copying.
+FILE_MAGIC = b"EYS3DREC"
+INDEX_MAGIC = b"EYS3DIDX"
+VERSION = 1
+_FILE_HEADER = struct.Struct("<8sHHI")
+_RECORD_HEADER = struct.Struct("<BBBBqIHHiII")
+_FOOTER = struct.Struct("<8sQQ")
+_ALIGNMENT = 8
+_RECORD_MARK = 0xE3  # The mark of record header to find the end of records when scanning.
+
+# The stream of record.
+STREAM_COLOR = 0
+STREAM_DEPTH = 1
+STREAM_IMU = 2
+
+# The payload of record.
+PAYLOAD_RAW = 0
+PAYLOAD_ZD = 1
+PAYLOAD_RGB = 2
+
+# The kind of index entry.
+ENTRY_FRAMESET = 0
+ENTRY_COLOR = 1
+ENTRY_DEPTH = 2
+ENTRY_IMU = 3
+
+INDEX_DTYPE = np.dtype([
+    ('tsUs', '<i8'),
+    ('offset', '<u8'),
+    ('size', '<u4'),
+    ('serialNumber', '<u4'),
+    ('kind', '<u4'),
+    ('reserved', '<u4'),
+])
+
+_PAYLOAD_DTYPES = {
+    PAYLOAD_RAW: np.uint8,
+    PAYLOAD_ZD: np.dtype('<u2'),
+    PAYLOAD_RGB: np.uint8,
+}
+
+_PADDING = bytes(_ALIGNMENT)
+
+
+def _get_padding(size):
+    return -size % _ALIGNMENT
+
+
+class FrameSetRecorder:
+    """This class records the raw data of framesets into a seekable binary file.
+
+    Each frame is written with its raw data from device (YUY2/MJPG of color, 8/11/14 bits of depth)
+    without transcoding, and with `tsUs`, `serialNumber`, width, height and format.
+    The ZD value and rgb data could be recorded as well if they are needed for playback.
+    The IMU samples are recorded as opaque payloads with timestamp and serial number.
+
+    The records are appended through a buffered writer in chunks of `chunk_size`,
+    and the buffers of frame are written without copying in Python.
+    The index is kept in memory and written at the end of file when closed,
+    so `FrameSetReader` seeks to any timestamp by binary search.
+
+    Example:
+        with FrameSetRecorder("capture.eys3d", metadata=conf.get_config()) as recorder:
+            while recording:
+                ret, frameset = pipe.wait_frameset()
+                if ret:
+                    recorder.write_frameset(frameset)
+
+    Args:
+        path (str): The path of recording file.
+        metadata (dict): The JSON serializable information of recording, e.g. the setting of Config.
+        zd (bool): True to record the ZD value of depth frame. Default is False.
+        rgb (bool): True to record the rgb data of color and depth frame. Default is False.
+        chunk_size (int): The size in bytes of write buffer. Default is 4 MiB.
+    """
+    def __init__(self,
+                 path,
+                 metadata=None,
+                 zd=False,
+                 rgb=False,
+                 chunk_size=4 << 20):
+        self.__path = path
+        self.__zd = zd
+        self.__rgb = rgb
+        self.__index = []
+        self.__file = open(path, "wb", buffering=chunk_size)
+        meta = json.dumps(metadata or {}).encode("utf-8")
+        self.__file.write(
+            _FILE_HEADER.pack(FILE_MAGIC, VERSION, _ALIGNMENT, len(meta)))
+        self.__file.write(meta)
+        self.__file.write(_PADDING[:_get_padding(_FILE_HEADER.size +
+                                                  len(meta))])
+        self.__offset = self.__file.tell()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_path(self):
+        return self.__path
+
+    def get_count(self):
+        """Get the number of recorded entries.
+
+        Returns:
+            int: The number of framesets, frames and IMU samples recorded.
+        """
+        return len(self.__index)
+
+    def get_size(self):
+        """Get the size of recorded data.
+
+        Returns:
+            int: The size in bytes written into file, not including the index.
+        """
+        return self.__offset
+
+    def write_frameset(self, frameset):
+        """Write the frameset.
+
+        The frame which is empty is skipped, e.g. the color frame if the color stream is disabled.
+
+        Args:
+            frameset (obj): The eys3dPy.FrameSet.
+        """
+        color_frame = frameset.color_frame
+        depth_frame = frameset.depth_frame
+        start = self.__offset
+        self.__write_frame(STREAM_COLOR, color_frame)
+        self.__write_frame(STREAM_DEPTH, depth_frame)
+        self.__add_entry(ENTRY_FRAMESET, start,
+                         max(color_frame.tsUs, depth_frame.tsUs),
+                         max(color_frame.serialNumber,
+                             depth_frame.serialNumber))
+
+    def write_color_frame(self, frame):
+        """Write the color frame.
+
+        Args:
+            frame (obj): The eys3dPy.Frame of color stream.
+        """
+        start = self.__offset
+        self.__write_frame(STREAM_COLOR, frame)
+        self.__add_entry(ENTRY_COLOR, start, frame.tsUs, frame.serialNumber)
+
+    def write_depth_frame(self, frame):
+        """Write the depth frame.
+
+        Args:
+            frame (obj): The eys3dPy.Frame of depth stream.
+        """
+        start = self.__offset
+        self.__write_frame(STREAM_DEPTH, frame)
+        self.__add_entry(ENTRY_DEPTH, start, frame.tsUs, frame.serialNumber)
+
+    def write_imu(self, tsUs, serial_number, data):
+        """Write the IMU sample.
+
+        Args:
+            tsUs (int): The timestamp in microseconds.
+            serial_number (int): The serial number of sample.
+            data (bytes or np.array): The data of sample.
+        """
+        start = self.__offset
+        data = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        self.__write_record(STREAM_IMU, PAYLOAD_RAW, 0, tsUs, serial_number,
+                            0, 0, 0, data)
+        self.__add_entry(ENTRY_IMU, start, tsUs, serial_number)
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        """Close the recording.
+
+        To write the index and footer, and then close the file.
+        """
+        if self.__file.closed:
+            return
+        index = np.array(self.__index, dtype=INDEX_DTYPE)
+        self.__file.write(index.tobytes())
+        self.__file.write(
+            _FOOTER.pack(INDEX_MAGIC, self.__offset, len(self.__index)))
+        self.__file.close()
+        logger.info("Recorded {} entries ({} bytes) into {}".format(
+            len(self.__index), self.__offset, self.__path))
+
+    def __add_entry(self, kind, start, tsUs, serial_number):
+        self.__index.append((tsUs, start, self.__offset - start, serial_number,
+                             kind, 0))
+
+    def __write_frame(self, stream, frame):
+        width = frame.get_width()
+        height = frame.get_height()
+        data = np.asarray(frame.get_data(), dtype=np.uint8).reshape(-1)
+        if width * height == 0 or data.size == 0:
+            return
+        # The fields are not exported by the frame of every backend.
+        flags = int(bool(getattr(frame, "interleaveMode", False)))
+        data_format = int(getattr(frame, "dataFormat", 0))
+        args = (frame.tsUs, frame.serialNumber, width, height, data_format)
+        self.__write_record(stream, PAYLOAD_RAW, flags, *args, data)
+        if self.__zd and stream == STREAM_DEPTH:
+            self.__write_record(
+                stream, PAYLOAD_ZD, flags, *args,
+                np.asarray(frame.get_depth_ZD_value(), dtype='<u2'))
+        if self.__rgb:
+            self.__write_record(
+                stream, PAYLOAD_RGB, flags, *args,
+                np.asarray(frame.get_rgb_data(), dtype=np.uint8))
+
+    def __write_record(self, stream, payload, flags, tsUs, serial_number,
+                       width, height, data_format, data):
+        data = np.ascontiguousarray(data).reshape(-1)
+        size = data.nbytes
+        self.__file.write(
+            _RECORD_HEADER.pack(stream, payload, flags, _RECORD_MARK, tsUs,
+                                serial_number,
+                                width, height, data_format, size, 0))
+        self.__file.write(memoryview(data).cast("B"))
+        padding = _get_padding(size)
+        self.__file.write(_PADDING[:padding])
+        self.__offset += _RECORD_HEADER.size + size + padding
+
+
+class RecordedFrame:
+    """The frame read from recording.
+
+    It provides the same getters as eys3dPy.Frame, so it could be passed to `FrameView`.
+    The buffers are read-only views of the recording.
+    The ZD value and rgb data are empty if they are not recorded.
+    """
+    def __init__(self,
+                 tsUs=0,
+                 serialNumber=0,
+                 width=0,
+                 height=0,
+                 dataFormat=0,
+                 interleaveMode=False):
+        self.tsUs = tsUs
+        self.serialNumber = serialNumber
+        self.width = width
+        self.height = height
+        self.dataFormat = dataFormat
+        self.interleaveMode = interleaveMode
+        self.dataVec = np.empty(0, dtype=np.uint8)
+        self.zdDepthVec = np.empty(0, dtype=np.uint16)
+        self.rgbVec = np.empty(0, dtype=np.uint8)
+
+    def get_width(self):
+        return self.width
+
+    def get_height(self):
+        return self.height
+
+    def get_timestamp(self):
+        return self.tsUs
+
+    def get_serial_number(self):
+        return self.serialNumber
+
+    def get_data(self):
+        return self.dataVec
+
+    def get_depth_ZD_value(self):
+        return self.zdDepthVec
+
+    def get_rgb_data(self):
+        return self.rgbVec
+
+
+class RecordedFrameSet:
+    """The frameset read from recording."""
+    def __init__(self, color_frame=None, depth_frame=None):
+        self.color_frame = color_frame or RecordedFrame()
+        self.depth_frame = depth_frame or RecordedFrame()
+
+
+class RecordedSensorData:
+    """The IMU sample read from recording."""
+    def __init__(self, tsUs, serialNumber, data):
+        self.tsUs = tsUs
+        self.serialNumber = serialNumber
+        self.data = data
+
+    def get_serial_number(self):
+        return self.serialNumber
+
+    def get_data(self):
+        return self.data
+
+
+class FrameSetReader:
+    """This class reads the recording written by `FrameSetRecorder`.
+
+    The file is memory-mapped and the buffers of frames are read-only views of it.
+    The index is loaded from the end of file. It is rebuilt by scanning the records
+    if the recording was not closed, e.g. the recorder was killed.
+
+    Example:
+        with FrameSetReader("capture.eys3d") as reader:
+            index = reader.seek(tsUs)
+            frameset = reader.read(index)
+
+    Args:
+        path (str): The path of recording file.
+    """
+    def __init__(self, path):
+        self.__path = path
+        self.__file = open(path, "rb")
+        try:
+            self.__mmap = mmap.mmap(self.__file.fileno(),
+                                    0,
+                                    access=mmap.ACCESS_READ)
+        except ValueError:
+            self.__file.close()
+            raise Exception("The recording is empty: {}".format(path))
+        self.__buffer = self.__mmap
+        magic, version, _, meta_size = _FILE_HEADER.unpack_from(self.__buffer)
+        if magic != FILE_MAGIC:
+            self.close()
+            raise Exception("The file is not a recording: {}".format(path))
+        if version != VERSION:
+            self.close()
+            raise Exception(
+                "The version {} of recording is not supported.".format(
+                    version))
+        self.__metadata = json.loads(
+            bytes(self.__buffer[_FILE_HEADER.size:_FILE_HEADER.size +
+                                meta_size]).decode("utf-8"))
+        self.__data_offset = _FILE_HEADER.size + meta_size + _get_padding(
+            _FILE_HEADER.size + meta_size)
+        self.__index = self.__load_index()
+        # The order of timestamp for seeking. The entries are almost in order, so sorting is cheap.
+        self.__ts_order = np.argsort(self.__index['tsUs'], kind='stable')
+        self.__sorted_ts = self.__index['tsUs'][self.__ts_order]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.__index)
+
+    def __iter__(self):
+        for i in range(len(self.__index)):
+            yield self.read(i)
+
+    def close(self):
+        self.__index = np.empty(0, dtype=INDEX_DTYPE)
+        try:
+            self.__mmap.close()
+        except BufferError:
+            pass  # The frames are still alive. It is unmapped when the last one is released.
+        self.__file.close()
+
+    def get_path(self):
+        return self.__path
+
+    def get_metadata(self):
+        """Get the metadata of recording.
+
+        Returns:
+            dict: The metadata passed to `FrameSetRecorder`.
+        """
+        return self.__metadata
+
+    def get_index(self):
+        """Get the index of recording.
+
+        Returns:
+            np.array: The read-only structured array with fields
+                `tsUs`, `offset`, `size`, `serialNumber` and `kind`.
+        """
+        index = self.__index.view()
+        index.flags.writeable = False
+        return index
+
+    def get_time_range(self):
+        """Get the range of timestamp.
+
+        Returns:
+            tuple: The first and last timestamp in microseconds. It is None if empty.
+        """
+        if not len(self.__sorted_ts):
+            return None
+        return (int(self.__sorted_ts[0]), int(self.__sorted_ts[-1]))
+
+    def seek(self, tsUs, kind=None):
+        """Find the first entry at or after the timestamp.
+
+        The entry is found by binary search in O(log n).
+
+        Args:
+            tsUs (int): The timestamp in microseconds.
+            kind (int): Only find the entry of this kind, e.g. `ENTRY_FRAMESET`. Any kind if None.
+
+        Returns:
+            int: The index of entry. It is None if no entry is at or after the timestamp.
+        """
+        position = int(np.searchsorted(self.__sorted_ts, tsUs, side='left'))
+        while position < len(self.__ts_order):
+            i = int(self.__ts_order[position])
+            if kind is None or self.__index['kind'][i] == kind:
+                return i
+            position += 1
+        return None
+
+    def read(self, i):
+        """Read the entry.
+
+        Args:
+            i (int): The index of entry.
+
+        Returns:
+            obj: `RecordedFrameSet` of frameset, `RecordedFrame` of color or depth frame,
+                or `RecordedSensorData` of IMU sample.
+        """
+        entry = self.__index[i]
+        kind = int(entry['kind'])
+        frames = dict()
+        sample = None
+        for header, data in self.__iter_records(int(entry['offset']),
+                                                int(entry['size'])):
+            stream, payload, flags, _, tsUs, serial_number, width, height, data_format, _, _ = header
+            if stream == STREAM_IMU:
+                sample = RecordedSensorData(tsUs, serial_number, data)
+                continue
+            frame = frames.get(stream)
+            if frame is None:
+                frame = frames[stream] = RecordedFrame(tsUs, serial_number,
+                                                       width, height,
+                                                       data_format,
+                                                       bool(flags & 1))
+            data = data.view(_PAYLOAD_DTYPES[payload])
+            if payload == PAYLOAD_RAW:
+                frame.dataVec = data
+            elif payload == PAYLOAD_ZD:
+                frame.zdDepthVec = data
+            else:
+                frame.rgbVec = data
+        if kind == ENTRY_FRAMESET:
+            return RecordedFrameSet(frames.get(STREAM_COLOR),
+                                    frames.get(STREAM_DEPTH))
+        if kind == ENTRY_IMU:
+            return sample
+        return frames.get(STREAM_COLOR if kind == ENTRY_COLOR else
+                          STREAM_DEPTH) or RecordedFrame()
+
+    def read_at(self, tsUs, kind=ENTRY_FRAMESET):
+        """Read the first entry at or after the timestamp.
+
+        Args:
+            tsUs (int): The timestamp in microseconds.
+            kind (int): Only read the entry of this kind. Any kind if None. Default is `ENTRY_FRAMESET`.
+
+        Returns:
+            obj: The entry. Please refer `read` in detail. It is None if not found.
+        """
+        i = self.seek(tsUs, kind)
+        return None if i is None else self.read(i)
+
+    def __iter_records(self, offset, size):
+        end = offset + size
+        while offset < end:
+            header = _RECORD_HEADER.unpack_from(self.__buffer, offset)
+            payload_size = header[9]
+            start = offset + _RECORD_HEADER.size
+            data = np.frombuffer(self.__buffer,
+                                 dtype=np.uint8,
+                                 count=payload_size,
+                                 offset=start)
+            yield header, data
+            offset = start + payload_size + _get_padding(payload_size)
+
+    def __load_index(self):
+        size = len(self.__buffer)
+        if size >= self.__data_offset + _FOOTER.size:
+            magic, offset, count = _FOOTER.unpack_from(self.__buffer,
+                                                       size - _FOOTER.size)
+            if magic == INDEX_MAGIC and offset + count * INDEX_DTYPE.itemsize + _FOOTER.size == size:
+                return np.frombuffer(self.__buffer,
+                                     dtype=INDEX_DTYPE,
+                                     count=count,
+                                     offset=offset)
+        logger.warning(
+            "The index of recording is not found. Rebuild it by scanning {}".
+            format(self.__path))
+        return self.__scan_index(size)
+
+    def __scan_index(self, size):
+        # Each frameset of recorder starts with the color record, or the depth record if no color.
+        # The color and depth frame in one frameset have the same serial number.
+        # The frame written alone is taken as a frameset.
+        entries = []
+        offset = self.__data_offset
+        while offset + _RECORD_HEADER.size <= size:
+            header = _RECORD_HEADER.unpack_from(self.__buffer, offset)
+            stream, payload, _, mark, tsUs, serial_number, _, _, _, payload_size, _ = header
+            record_end = offset + _RECORD_HEADER.size + payload_size + _get_padding(
+                payload_size)
+            if mark != _RECORD_MARK or stream > STREAM_IMU or payload > PAYLOAD_RGB or record_end > size:
+                break  # The last record is truncated, or the rest is not record.
+            last = entries[-1] if entries else None
+            if last is not None and last[4] == ENTRY_FRAMESET and (
+                    payload != PAYLOAD_RAW and last[5] == stream or
+                    stream == STREAM_DEPTH and last[5] == STREAM_COLOR
+                    and last[3] == serial_number):
+                last[0] = max(last[0], tsUs)
+                last[2] += record_end - offset
+                last[5] = stream
+            elif stream == STREAM_IMU:
+                entries.append([tsUs, offset, record_end - offset,
+                                serial_number, ENTRY_IMU, stream])
+            else:
+                entries.append([tsUs, offset, record_end - offset,
+                                serial_number, ENTRY_FRAMESET, stream])
+            offset = record_end
+        index = np.empty(len(entries), dtype=INDEX_DTYPE)
+        for i, entry in enumerate(entries):
+            index[i] = tuple(entry[:5]) + (0, )
+        return index
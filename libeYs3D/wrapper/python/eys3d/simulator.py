@@ -0,0 +1,1602 @@
+"""The simulated backend of eys3dPy.
+
+This module is a pure Python/NumPy stand-in of the native module `eys3dPy`.
+It implements the same surface used by eys3d (System, CameraDevice, Pipeline, FrameSetPipeline,
+Frame, FrameSet, PCFrame, ModeConfigOptions and the enums), so eys3d could run without camera module.
+It produces synthetic or recorded color, depth and point cloud frames at the configured resolution and fps.
+
+It is selected by the environment variable `EYS3D_BACKEND=sim` or by the argument `backend="sim"`
+of Device, Pipeline, FrameSetPipeline and MultiCameraPipeline.
+
+The recording of `FrameSetRecorder` could be replayed through the same API, so the code using
+Pipeline or FrameSetPipeline is unchanged. It is set by `configure(recording=path)` or by
+the environment variable `EYS3D_SIM_RECORDING`.
+
+Example:
+    from eys3d import simulator
+    simulator.configure(device_count=2, pid=0x162)
+    pipe = Pipeline(backend="sim")
+"""
+import collections
+import enum
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+__all__ = [
+    "configure", "get_settings", "System", "CameraDevice", "Pipeline",
+    "FrameSetPipeline", "Frame", "FrameSet", "PCFrame", "ModeConfigOptions"
+]
+
+
+class COLOR_RAW_DATA_TYPE(enum.IntEnum):
+    COLOR_RAW_DATA_YUY2 = 0
+    COLOR_RAW_DATA_MJPG = 2
+
+
+class DEPTH_RAW_DATA_TYPE(enum.IntEnum):
+    DEPTH_RAW_DATA_OFF_RAW = 0
+    DEPTH_RAW_DATA_DEFAULT = 0
+    DEPTH_RAW_DATA_8_BITS = 1
+    DEPTH_RAW_DATA_14_BITS = 2
+    DEPTH_RAW_DATA_8_BITS_x80 = 3
+    DEPTH_RAW_DATA_11_BITS = 4
+    DEPTH_RAW_DATA_OFF_RECTIFY = 5
+    DEPTH_RAW_DATA_8_BITS_RAW = 6
+    DEPTH_RAW_DATA_14_BITS_RAW = 7
+    DEPTH_RAW_DATA_8_BITS_x80_RAW = 8
+    DEPTH_RAW_DATA_11_BITS_RAW = 9
+    DEPTH_RAW_DATA_14_BITS_COMBINED_RECTIFY = 11
+    DEPTH_RAW_DATA_11_BITS_COMBINED_RECTIFY = 13
+    DEPTH_RAW_DATA_ILM_OFF_RAW = 16
+    DEPTH_RAW_DATA_ILM_DEFAULT = 16
+    DEPTH_RAW_DATA_ILM_8_BITS = 17
+    DEPTH_RAW_DATA_ILM_14_BITS = 18
+    DEPTH_RAW_DATA_ILM_8_BITS_x80 = 19
+    DEPTH_RAW_DATA_ILM_11_BITS = 20
+    DEPTH_RAW_DATA_ILM_OFF_RECTIFY = 21
+    DEPTH_RAW_DATA_ILM_8_BITS_RAW = 22
+    DEPTH_RAW_DATA_ILM_14_BITS_RAW = 23
+    DEPTH_RAW_DATA_ILM_8_BITS_x80_RAW = 24
+    DEPTH_RAW_DATA_ILM_11_BITS_RAW = 25
+    DEPTH_RAW_DATA_ILM_14_BITS_COMBINED_RECTIFY = 27
+    DEPTH_RAW_DATA_ILM_11_BITS_COMBINED_RECTIFY = 29
+    DEPTH_RAW_DATA_SCALE_DOWN_OFF_RAW = 32
+    DEPTH_RAW_DATA_SCALE_DOWN_DEFAULT = 32
+    DEPTH_RAW_DATA_SCALE_DOWN_8_BITS = 33
+    DEPTH_RAW_DATA_SCALE_DOWN_14_BITS = 34
+    DEPTH_RAW_DATA_SCALE_DOWN_8_BITS_x80 = 35
+    DEPTH_RAW_DATA_SCALE_DOWN_11_BITS = 36
+    DEPTH_RAW_DATA_SCALE_DOWN_OFF_RECTIFY = 37
+    DEPTH_RAW_DATA_SCALE_DOWN_8_BITS_RAW = 38
+    DEPTH_RAW_DATA_SCALE_DOWN_14_BITS_RAW = 39
+    DEPTH_RAW_DATA_SCALE_DOWN_8_BITS_x80_RAW = 40
+    DEPTH_RAW_DATA_SCALE_DOWN_11_BITS_RAW = 41
+    DEPTH_RAW_DATA_SCALE_DOWN_14_BITS_COMBINED_RECTIFY = 43
+    DEPTH_RAW_DATA_SCALE_DOWN_11_BITS_COMBINED_RECTIFY = 45
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_OFF_RAW = 48
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_DEFAULT = 48
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_8_BITS = 49
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_14_BITS = 50
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_8_BITS_x80 = 51
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_11_BITS = 52
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_OFF_RECTIFY = 53
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_8_BITS_RAW = 54
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_14_BITS_RAW = 55
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_8_BITS_x80_RAW = 56
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_11_BITS_RAW = 57
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_14_BITS_COMBINED_RECTIFY = 59
+    DEPTH_RAW_DATA_SCALE_DOWN_ILM_11_BITS_COMBINED_RECTIFY = 61
+
+
+class DEPTH_TRANSFER_CTRL(enum.IntEnum):
+    DEPTH_IMG_NON_TRANSFER = 0
+    DEPTH_IMG_GRAY_TRANSFER = 1
+    DEPTH_IMG_COLORFUL_TRANSFER = 2
+
+
+class CONTROL_MODE(enum.IntEnum):
+    IMAGE_SN_NONSYNC = 0
+    IMAGE_SN_SYNC = 1
+    IMAGE_NORECTIFY_DATA = 100
+    IMAGE_RECTIFY_DATA = 101
+
+
+class USB_PORT_TYPE(enum.IntEnum):
+    USB_PORT_TYPE_2_0 = 2
+    USB_PORT_TYPE_3_0 = 3
+    MIPI_PORT_TYPE = 4
+    USB_PORT_TYPE_UNKNOW = 5
+
+
+class SENSORMODE_INFO(enum.IntEnum):
+    SENSOR_A = 0
+    SENSOR_B = 1
+    SENSOR_BOTH = 2
+    SENSOR_C = 3
+    SENSOR_D = 4
+
+
+class LIGHT_SOURCE_VALUE(enum.IntEnum):
+    VALUE_50HZ = 0
+    VALUE_60HZ = 1
+
+
+class COLOR_BYTE_ORDER(enum.IntEnum):
+    COLOR_RGB24 = 0
+    COLOR_BGR24 = 1
+
+
+class DECODE_TYPE(enum.IntEnum):
+    YUYV = 0
+    MJPEG = 1
+
+
+class PIPELINE_RESULT(enum.IntEnum):
+    SYNC_ERROR = -2
+    STOPPED = -1
+    OK = 0
+    TIMEOUT = 1
+    QUEUE_EMPTY = 2
+    QUEUE_FULL = 3
+
+
+FRAMESET_PIPELINE_RESULT = PIPELINE_RESULT
+
+APC_OK = 0
+APC_NullPtr = -2  # Returned by `select_current_index` if the mode is not found.
+
+QUEUE_CAPACITY = 2  # Same as kMaxFrameCount of Pipeline in C/C++.
+BASELINE = 50.0  # The baseline of simulated module in millimeters.
+FOCAL_LENGTH = 800.0  # The focal length in pixels of 1280x720 rectified image.
+RECTIFIED_WIDTH = 1280
+RECTIFIED_HEIGHT = 720
+
+_settings = {
+    'device_count': int(os.environ.get('EYS3D_SIM_DEVICE_COUNT', 1)),
+    'pid': 0x162,
+    'usb_port_type': USB_PORT_TYPE.USB_PORT_TYPE_3_0,
+    'fps': None,
+    'realtime': True,
+    'cycle': 30,
+    'color_images': None,
+    'depth_images': None,
+    'z_range': (300, 5000),
+    'recording': os.environ.get('EYS3D_SIM_RECORDING') or None,
+    'loop': True,
+    'speed': 1.0,
+}
+
+
+def configure(**kwargs):
+    """Configure the simulated camera modules.
+
+    The setting takes effect on the System created after called.
+
+    Args:
+        device_count (int): The number of simulated camera modules. Default is 1 or `EYS3D_SIM_DEVICE_COUNT`.
+        pid (int): The product id of simulated camera module. Default is 0x162 (8062).
+        usb_port_type (int): The USB port type. Default is USB_PORT_TYPE_3_0.
+        fps (int): The fps to produce frames. The fps of config is used if None.
+        realtime (bool): Produce frames at fps if True, otherwise as fast as possible. Default is True.
+        cycle (int): The number of rendered frames played in a loop. Default is 30.
+        color_images (list): The recorded color images of shape (H, W, 3) uint8 played instead of rendered.
+        depth_images (list): The recorded z value images of shape (H, W) uint16 played instead of rendered.
+        z_range (tuple): The default (ZNear, ZFar) in millimeters. Default is (300, 5000).
+        recording (str): The path of recording played instead of rendered. Default is `EYS3D_SIM_RECORDING`.
+        loop (bool): Play the recording again from the start when it ends. Default is True.
+        speed (float): The speed of playing recording in real time. Default is 1.0.
+
+    Raises:
+        ValueError: The setting is unknown.
+    """
+    for key in kwargs:
+        if key not in _settings:
+            raise ValueError("Unknown setting of simulator: {}".format(key))
+    _settings.update(kwargs)
+
+
+def get_settings():
+    """Get the settings of simulated camera modules.
+
+    Returns:
+        dict: The copy of settings. Please refer `configure`.
+    """
+    return dict(_settings)
+
+
+def get_zdtable_index():
+    return 0
+
+
+def get_depth_bits(depth_format):
+    """Get the number of bits of depth data type.
+
+    Args:
+        depth_format (int): The DEPTH_RAW_DATA_TYPE including the interleave and scale down offsets.
+
+    Returns:
+        int: 8, 11 or 14. It is 0 if the depth is off.
+    """
+    return {
+        1: 8,
+        3: 8,
+        6: 8,
+        8: 8,
+        2: 14,
+        7: 14,
+        11: 14,
+        4: 11,
+        9: 11,
+        13: 11,
+    }.get(int(depth_format) % 16, 0)
+
+
+def get_mode_config_path():
+    """Get the path of ModeConfig.db.
+
+    Returns:
+        str: The path of ModeConfig.db under EYS3D_SDK_HOME.
+    """
+    return os.path.join(os.environ.get('EYS3D_SDK_HOME', ''), "libeYs3D",
+                        "out", "eYs3D", "cfg", "ModeConfig.db")
+
+
+class _Resolution:
+    def __init__(self, text=None):
+        self.Width = 0
+        self.Height = 0
+        if text:
+            (width, height) = text.split('_')[0].split('x')
+            self.Width = int(width)
+            self.Height = int(height)
+
+
+class MODE_CONFIG:
+    """The mode in ModeConfig.db.
+
+    The attributes follow the `MODE_CONFIG` in ModeConfig.h.
+    """
+    def __init__(self, row):
+        (mode, desc, l_res, d_res, k_res, t_res, depth_type, color_fps,
+         depth_fps, usb_type, rectify, ilm_fps) = row
+        self.iMode = mode
+        self.csModeDesc = desc or ""
+        self.iUSB_Type = usb_type
+        self.iInterLeaveModeFPS = ilm_fps or 0
+        self.bRectifyMode = bool(rectify)
+        self.eDecodeType_L = DECODE_TYPE.MJPEG if l_res and l_res.endswith(
+            "MJPEG") else DECODE_TYPE.YUYV
+        self.eDecodeType_K = DECODE_TYPE.YUYV
+        self.eDecodeType_T = DECODE_TYPE.YUYV
+        self.L_Resolution = _Resolution(l_res)
+        self.D_Resolution = _Resolution(d_res)
+        self.K_Resolution = _Resolution()
+        self.T_Resolution = _Resolution()
+        self.vecDepthType = self.__to_list(depth_type)
+        self.vecColorFps = self.__to_list(color_fps)
+        self.vecDepthFps = self.__to_list(depth_fps)
+
+    def __to_list(self, text):
+        if text is None or text == "":
+            return []
+        return [int(v) for v in str(text).split(',')]
+
+
+def _load_modes(pid):
+    with sqlite3.connect(get_mode_config_path()) as db:
+        table = db.execute("SELECT Table_Name FROM DeviceTable WHERE PID = ?",
+                           ("{:x}".format(pid), )).fetchone()
+        if table is None:
+            return None, []
+        rows = db.execute(
+            'SELECT Mode, Mode_Description, L_Resolution, D_Resolution, '
+            'K_Resolution, T_Resolution, Depth_Type, Color_FPS, Depth_FPS, '
+            'USB_Type, Rectify_Mode, Inter_Leave_Mode_FPS FROM "{}" '
+            'ORDER BY Mode'.format(table[0])).fetchall()
+    return table[0], [MODE_CONFIG(row) for row in rows]
+
+
+def get_module_name(pid):
+    """Get the module name of pid in ModeConfig.db.
+
+    Args:
+        pid (int): The product id.
+
+    Returns:
+        str: The module name, e.g. "8062". It is "SIM" if not found.
+    """
+    try:
+        name, _ = _load_modes(pid)
+    except sqlite3.Error:
+        name = None
+    return name or "SIM"
+
+
+class ModeConfigOptions:
+    """The modes of camera module in ModeConfig.db.
+
+    Args:
+        usb_type (int): The USB_PORT_TYPE. Only the modes of this USB type are listed.
+        pid (int): The product id of camera module.
+    """
+    def __init__(self, usb_type, pid):
+        _, modes = _load_modes(pid)
+        self.__modes = [m for m in modes if m.iUSB_Type == int(usb_type)]
+        self.__index = self.__modes[0].iMode if self.__modes else 0
+
+    def get_mode_count(self):
+        return len(self.__modes)
+
+    def get_modes(self):
+        return list(self.__modes)
+
+    def get_current_index(self):
+        return self.__index
+
+    def select_current_index(self, index):
+        for mode in self.__modes:
+            if mode.iMode == index:
+                self.__index = index
+                return APC_OK
+        return APC_NullPtr
+
+    def get_current_mode_info(self):
+        for mode in self.__modes:
+            if mode.iMode == self.__index:
+                return mode
+        return None
+
+
+class SensorDataSet:
+    def __init__(self, serial_number=0):
+        self.serialNumber = serial_number
+
+    def get_serial_number(self):
+        return self.serialNumber
+
+    def get_actual_data_count(self):
+        return 0
+
+
+class Frame:
+    """The frame of color or depth stream.
+
+    The arguments follow the constructor of Frame in Frame.h. The buffers are reserved
+    and reused when the frame is filled by pipeline.
+    """
+    def __init__(self,
+                 dataBufferSize=0,
+                 initDataVal=0,
+                 zdDepthBufferSize=0,
+                 initZDDepthVal=0,
+                 rgbBufferSize=0,
+                 initRGBVal=0):
+        self.tsUs = 0
+        self.serialNumber = 0
+        self.width = 0
+        self.height = 0
+        self.dataFormat = 0
+        self.interleaveMode = False
+        self.roiDepth = 0
+        self.roiZValue = 0
+        self.rgbTranscodingTimeUs = 0
+        self.filteringTimeUs = 0
+        self.dataVec = np.full(dataBufferSize, initDataVal, dtype=np.uint8)
+        self.zdDepthVec = np.full(zdDepthBufferSize,
+                                  initZDDepthVal,
+                                  dtype=np.uint16)
+        self.rgbVec = np.full(rgbBufferSize, initRGBVal, dtype=np.uint8)
+        self.depthAccuracyInfo = None
+        self.sensorDataSet = SensorDataSet()
+
+    def get_width(self):
+        return self.width
+
+    def get_height(self):
+        return self.height
+
+    def get_serial_number(self):
+        return self.serialNumber
+
+    def get_timestamp(self):
+        return self.tsUs
+
+    def get_data(self):
+        return self.dataVec
+
+    def get_rgb_data(self):
+        return self.rgbVec
+
+    def get_depth_ZD_value(self):
+        return self.zdDepthVec
+
+    def get_sensor_dataset(self):
+        return self.sensorDataSet
+
+    def get_depth_accuracy_info(self):
+        return dict(self.depthAccuracyInfo or {})
+
+    def clone(self, frame):
+        self.tsUs = frame.tsUs
+        self.serialNumber = frame.serialNumber
+        self.width = frame.width
+        self.height = frame.height
+        self.dataFormat = frame.dataFormat
+        self.interleaveMode = frame.interleaveMode
+        self.roiDepth = frame.roiDepth
+        self.roiZValue = frame.roiZValue
+        self.rgbTranscodingTimeUs = frame.rgbTranscodingTimeUs
+        self.filteringTimeUs = frame.filteringTimeUs
+        self.dataVec = _copy_into(self.dataVec, frame.dataVec)
+        self.zdDepthVec = _copy_into(self.zdDepthVec, frame.zdDepthVec)
+        self.rgbVec = _copy_into(self.rgbVec, frame.rgbVec)
+        self.depthAccuracyInfo = frame.depthAccuracyInfo
+        self.sensorDataSet = SensorDataSet(frame.serialNumber)
+
+
+class FrameSet:
+    """The color and depth frame with same serial number."""
+    def __init__(self):
+        self.color_frame = Frame()
+        self.depth_frame = Frame()
+
+    def clone(self, frameset):
+        self.color_frame.clone(frameset.color_frame)
+        self.depth_frame.clone(frameset.depth_frame)
+
+
+class PCFrame:
+    """The point cloud frame."""
+    def __init__(self, frame, xyz, rgb, drgb, transcoding_time):
+        self.__ts = frame.tsUs
+        self.__serial_number = frame.serialNumber
+        self.__width = frame.width
+        self.__height = frame.height
+        self.__xyz = xyz
+        self.__rgb = rgb
+        self.__drgb = drgb
+        self.__transcoding_time = transcoding_time
+
+    def get_timestamp(self):
+        return self.__ts
+
+    def get_serial_number(self):
+        return self.__serial_number
+
+    def get_width(self):
+        return self.__width
+
+    def get_height(self):
+        return self.__height
+
+    def get_xyz_data(self):
+        return self.__xyz
+
+    def get_rgb_data(self):
+        return self.__rgb
+
+    def get_drgb_data(self):
+        return self.__drgb
+
+    def get_transcoding_time(self):
+        return self.__transcoding_time
+
+
+def _copy_into(dst, src):
+    # The read-only buffers of produced frames are never modified, so they are shared without copying.
+    if not src.flags.writeable:
+        return src
+    # Reuse the buffer if the size is not changed, like the frame reused in pool.
+    if dst.size == src.size and dst.dtype == src.dtype and dst.flags.writeable:
+        np.copyto(dst, src)
+        return dst
+    return src.copy()
+
+
+class _FrameQueue:
+    """The queue of pipeline. The oldest item is dropped if the queue is full."""
+    def __init__(self, capacity=QUEUE_CAPACITY):
+        self.__items = collections.deque(maxlen=capacity)
+        self.__ready = threading.Condition()
+        self.__stopped = False
+
+    def push(self, item):
+        with self.__ready:
+            if self.__stopped:
+                return PIPELINE_RESULT.STOPPED
+            full = len(self.__items) == self.__items.maxlen
+            self.__items.append(item)
+            self.__ready.notify()
+        return PIPELINE_RESULT.QUEUE_FULL if full else PIPELINE_RESULT.OK
+
+    def pop(self, item, timeout):
+        with self.__ready:
+            if not self.__items and not self.__stopped:
+                if timeout == 0:
+                    return PIPELINE_RESULT.QUEUE_EMPTY
+                deadline = None if timeout < 0 else time.monotonic(
+                ) + timeout / 1000.0
+                while not self.__items and not self.__stopped:
+                    remaining = None if deadline is None else deadline - time.monotonic(
+                    )
+                    if remaining is not None and remaining <= 0:
+                        return PIPELINE_RESULT.SYNC_ERROR
+                    self.__ready.wait(remaining)
+            if self.__stopped:
+                return PIPELINE_RESULT.STOPPED
+            source = self.__items.popleft()
+        item.clone(source)
+        return PIPELINE_RESULT.OK
+
+    def clear(self):
+        with self.__ready:
+            self.__items.clear()
+
+    def stop(self):
+        with self.__ready:
+            self.__stopped = True
+            self.__items.clear()
+            self.__ready.notify_all()
+
+
+class Pipeline:
+    """The pipeline of color and depth stream returned by `CameraDevice.init_stream`."""
+    def __init__(self):
+        self.__color_queue = _FrameQueue()
+        self.__depth_queue = _FrameQueue()
+
+    def get_color_frame(self, frame):
+        return self.__color_queue.pop(frame, 0)
+
+    def get_depth_frame(self, frame):
+        return self.__depth_queue.pop(frame, 0)
+
+    def wait_color_frame(self, frame, timeout):
+        return self.__color_queue.pop(frame, timeout)
+
+    def wait_depth_frame(self, frame, timeout):
+        return self.__depth_queue.pop(frame, timeout)
+
+    def reset(self):
+        self.__color_queue.clear()
+        self.__depth_queue.clear()
+
+    def push_color_frame(self, frame):
+        return self.__color_queue.push(frame)
+
+    def push_depth_frame(self, frame):
+        return self.__depth_queue.push(frame)
+
+    def stop(self):
+        self.__color_queue.stop()
+        self.__depth_queue.stop()
+
+
+class FrameSetPipeline:
+    """The pipeline of frameset returned by `CameraDevice.init_stream_with_frameset`."""
+    def __init__(self):
+        self.__queue = _FrameQueue()
+
+    def get_frameset(self, frameset):
+        return self.__queue.pop(frameset, 0)
+
+    def wait_frameset(self, frameset, timeout):
+        return self.__queue.pop(frameset, timeout)
+
+    def reset(self):
+        self.__queue.clear()
+
+    def push_frameset(self, frameset):
+        return self.__queue.push(frameset)
+
+    def stop(self):
+        self.__queue.stop()
+
+
+def _make_zd_table(bits, focal_length):
+    # The z value of each raw depth value. It follows Z = f * B / disparity.
+    if bits == 14:
+        return np.arange(1 << 14, dtype=np.uint16)
+    scale = 8.0 if bits == 11 else 1.0
+    raw = np.arange(1 << bits, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        z = focal_length * BASELINE * scale / raw
+    z[0] = 0
+    return np.clip(np.rint(z), 0, 0xFFFF).astype(np.uint16)
+
+
+def _z_to_raw(z, bits, focal_length):
+    if bits == 14:
+        return np.minimum(z, (1 << 14) - 1).astype(np.uint16)
+    scale = 8.0 if bits == 11 else 1.0
+    with np.errstate(divide='ignore'):
+        raw = np.where(z > 0, focal_length * BASELINE * scale / z, 0)
+    return np.clip(np.rint(raw), 0, (1 << bits) - 1).astype(np.uint16)
+
+
+def _colorize(z, near, far, gray):
+    t = np.clip((z.astype(np.float32) - near) / float(max(far - near, 1)), 0,
+                1)
+    if gray:
+        v = (255 * (1 - t)).astype(np.uint8)
+        rgb = np.stack((v, v, v), axis=-1)
+    else:
+        rgb = np.stack(
+            (255 * (1 - t), 255 * (1 - np.abs(2 * t - 1)), 255 * t),
+            axis=-1).astype(np.uint8)
+    rgb[z == 0] = 0
+    return rgb
+
+
+def _freeze(frame):
+    # The pre-rendered buffers are shared by the produced frames, so they are read-only.
+    for vec in (frame.dataVec, frame.zdDepthVec, frame.rgbVec):
+        vec.flags.writeable = False
+    return frame
+
+
+def _to_yuy2(rgb):
+    # BT.601 in 8-bit fixed point. U and V are shared by each pair of pixels.
+    rgb = rgb.astype(np.int32)
+    (r, g, b) = (rgb[..., 0], rgb[..., 1], rgb[..., 2])
+    yuy2 = np.empty(rgb.shape[:2] + (2, ), dtype=np.uint8)
+    yuy2[..., 0] = (77 * r + 150 * g + 29 * b + 128) >> 8
+    (r, g, b) = ((r[:, 0::2] + r[:, 1::2]) >> 1, (g[:, 0::2] + g[:, 1::2]) >> 1,
+                 (b[:, 0::2] + b[:, 1::2]) >> 1)
+    yuy2[:, 0::2, 1] = np.clip(((-43 * r - 85 * g + 128 * b + 128) >> 8) + 128,
+                               0, 255)
+    yuy2[:, 1::2, 1] = np.clip(((128 * r - 107 * g - 21 * b + 128) >> 8) + 128,
+                               0, 255)
+    return yuy2
+
+
+def _render_color(height, width):
+    # The gradient background.
+    rgb = np.empty((height, width, 3), dtype=np.uint8)
+    rgb[..., 0] = np.linspace(0, 255, width, dtype=np.uint8)[None, :]
+    rgb[..., 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    rgb[..., 2] = 128
+    return rgb
+
+
+def _get_square(height, width, phase):
+    # The white square moving from left to right. The left is even to keep the pixel pairs of YUY2.
+    size = max(height // 6, 2)
+    left = int((width - size) * phase) & ~1
+    top = (height - size) // 2
+    return (slice(top, top + size), slice(left, left + size))
+
+
+def _render_floor(height, width, near, far):
+    # The floor from far to near.
+    yy = np.arange(height, dtype=np.float32)[:, None]
+    z = np.broadcast_to(far - (far - near) * 0.6 * yy / max(height, 1),
+                        (height, width))
+    z = np.rint(z).astype(np.uint16)
+    z[:, :max(width // 32, 1)] = 0  # The occluded border without depth.
+    return z
+
+
+def _render_ball(z, phase, near, far):
+    # Draw the ball moving from left to right in place. Return the bounding box.
+    (height, width) = z.shape
+    radius = height / 4.0
+    cx = radius + (width - 2 * radius) * phase
+    cy = height / 2.0
+    (top, bottom) = (max(int(cy - radius), 0), min(int(cy + radius) + 1, height))
+    (left, right) = (max(int(cx - radius), 0), min(int(cx + radius) + 1, width))
+    yy = np.arange(top, bottom, dtype=np.float32)[:, None]
+    xx = np.arange(left, right, dtype=np.float32)[None, :]
+    d2 = (xx - cx)**2 + (yy - cy)**2
+    ball = d2 < radius**2
+    region = z[top:bottom, left:right]
+    region[ball] = np.rint(near + (far - near) * 0.2 + np.sqrt(d2[ball]) /
+                           radius * (far - near) * 0.05)
+    return (slice(top, bottom), slice(left, right))
+
+
+class _FrameSource:
+    """The cycle of frames of one stream setting.
+
+    Each frame of cycle is rendered at the first time it is produced and reused in the following cycles,
+    so the producer only shares the buffers after the first cycle.
+    The background is rendered once. Only the region of moving object is rendered for each frame.
+    """
+    def __init__(self, conf, settings, z_range):
+        (self.color_height, self.color_width) = conf['color']
+        (self.depth_height, self.depth_width) = conf['depth']
+        self.color_format = conf['colorFormat']
+        self.depth_format = conf['depthFormat']
+        self.depth_transfer = conf['depthTransfer']
+        self.depth_bits = get_depth_bits(self.depth_format)
+        if not self.depth_bits:
+            self.depth_height = self.depth_width = 0
+        self.focal_length = FOCAL_LENGTH * self.depth_width / RECTIFIED_WIDTH if self.depth_width else FOCAL_LENGTH
+        self.zd_table = _make_zd_table(self.depth_bits or 11,
+                                       self.focal_length)
+        self.z_range = z_range
+        if self.depth_bits:
+            # The look-up tables by z value, so each frame is converted by indexing.
+            z_values = np.arange(1 << 16, dtype=np.uint16)
+            self.raw_lut = _z_to_raw(z_values, self.depth_bits,
+                                     self.focal_length)
+            self.rgb_lut = _colorize(
+                z_values, z_range[0], z_range[1], self.depth_transfer ==
+                DEPTH_TRANSFER_CTRL.DEPTH_IMG_GRAY_TRANSFER)
+
+        self.color_images = settings['color_images'] if self.color_height else None
+        self.depth_images = settings['depth_images'] if self.depth_height else None
+        for (images, shape, name) in (
+            (self.color_images, (self.color_height, self.color_width, 3), "color"),
+            (self.depth_images, (self.depth_height, self.depth_width), "depth")):
+            for image in images or []:
+                if np.shape(image) != shape:
+                    raise Exception(
+                        "The shape of recorded {} image {} is not the {} stream."
+                        .format(name, np.shape(image), name))
+        if settings['color_images'] or settings['depth_images']:
+            count = max(len(settings['color_images'] or []),
+                        len(settings['depth_images'] or []))
+        else:
+            count = max(settings['cycle'], 1)
+        self.period = 1.0 / conf['fps']
+        self.color_background = None
+        self.depth_background = None
+        self.color = [None] * count
+        self.depth = [None] * count
+        self.pc = [None] * count
+
+    def get_count(self):
+        return len(self.color)
+
+    def is_looping(self):
+        return True
+
+    def get_interval(self, n):
+        # The time in seconds between the (n - 1)th and nth produced frame.
+        return self.period
+
+    def get_stamp(self, n, serial_number):
+        # The timestamp and serial number of nth produced frame.
+        return (int(time.time() * 1000000), serial_number)
+
+    def close(self):
+        pass
+
+    def get_color_frame(self, k):
+        if self.color[k] is None and self.color_height:
+            if self.color_images:
+                rgb = np.array(self.color_images[k % len(self.color_images)],
+                               dtype=np.uint8)
+                yuy2 = _to_yuy2(rgb)
+            else:
+                if self.color_background is None:
+                    rgb = _render_color(self.color_height, self.color_width)
+                    self.color_background = (rgb, _to_yuy2(rgb))
+                (rgb, yuy2) = (v.copy() for v in self.color_background)
+                (rows, cols) = _get_square(self.color_height, self.color_width,
+                                           k / float(self.get_count()))
+                rgb[rows, cols] = 255
+                yuy2[rows, cols, 0] = 255
+                yuy2[rows, cols, 1] = 128
+            self.color[k] = self.__make_color_frame(rgb, yuy2)
+        return self.color[k]
+
+    def get_depth_frame(self, k):
+        if self.depth[k] is None and self.depth_height:
+            if self.depth_images:
+                z = np.asarray(self.depth_images[k % len(self.depth_images)],
+                               dtype=np.uint16)
+                (raw, zd, rgb) = self.__convert_depth(z)
+            else:
+                if self.depth_background is None:
+                    z = _render_floor(self.depth_height, self.depth_width,
+                                      self.z_range[0], self.z_range[1])
+                    self.depth_background = (z, ) + self.__convert_depth(z)
+                (z, raw, zd, rgb) = (v.copy() for v in self.depth_background)
+                box = _render_ball(z, k / float(self.get_count()),
+                                   self.z_range[0], self.z_range[1])
+                (raw[box], zd[box], rgb[box]) = self.__convert_depth(z[box])
+            self.depth[k] = self.__make_depth_frame(raw, zd, rgb)
+        return self.depth[k]
+
+    def get_point_cloud(self, k):
+        depth = self.get_depth_frame(k)
+        if self.pc[k] is None and depth is not None:
+            color = self.get_color_frame(k)
+            (h, w) = (self.depth_height, self.depth_width)
+            z = depth.zdDepthVec.reshape(h, w).astype(np.float32)
+            u = np.arange(w, dtype=np.float32)[None, :] - w / 2.0
+            v = np.arange(h, dtype=np.float32)[:, None] - h / 2.0
+            xyz = np.stack((u * z / self.focal_length,
+                            v * z / self.focal_length, z),
+                           axis=-1).reshape(-1)
+            if color is not None:
+                rows = np.arange(h) * self.color_height // h
+                cols = np.arange(w) * self.color_width // w
+                rgb = color.rgbVec.reshape(self.color_height,
+                                           self.color_width,
+                                           3)[rows[:, None],
+                                              cols[None, :]].reshape(-1)
+            else:
+                rgb = depth.rgbVec
+            xyz.flags.writeable = False
+            rgb.flags.writeable = False
+            self.pc[k] = (xyz, rgb, depth.rgbVec)
+        return self.pc[k]
+
+    def __convert_depth(self, z):
+        raw = self.raw_lut[z]
+        zd = self.zd_table[raw]
+        return (raw, zd, self.rgb_lut[zd])
+
+    def __make_color_frame(self, rgb, yuy2):
+        frame = Frame()
+        frame.width = self.color_width
+        frame.height = self.color_height
+        frame.dataFormat = int(self.color_format)
+        frame.rgbVec = rgb.reshape(-1)
+        # MJPG is not encoded in simulator. The raw data is always YUY2.
+        frame.dataVec = yuy2.reshape(-1)
+        return _freeze(frame)
+
+    def __make_depth_frame(self, raw, zd, rgb):
+        frame = Frame()
+        frame.width = self.depth_width
+        frame.height = self.depth_height
+        frame.dataFormat = int(self.depth_format)
+        frame.zdDepthVec = zd.reshape(-1)
+        if self.depth_bits == 8:
+            frame.dataVec = raw.astype(np.uint8).reshape(-1)
+        else:
+            frame.dataVec = raw.astype('<u2').view(np.uint8).reshape(-1)
+        if self.depth_transfer == DEPTH_TRANSFER_CTRL.DEPTH_IMG_NON_TRANSFER:
+            frame.rgbVec = np.zeros(0, dtype=np.uint8)
+        else:
+            frame.rgbVec = rgb.reshape(-1)
+        return _freeze(frame)
+
+
+class _Options:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def copy(self):
+        return type(self)(**self.__dict__)
+
+
+class DepthFilterOptions(_Options):
+    def __init__(self, **kwargs):
+        values = dict(enabled=False,
+                      bytes_per_pixel=2,
+                      subsample=False,
+                      subsample_mode=0,
+                      subsample_factor=3,
+                      edgePreServingFilter=False,
+                      edge_level=1,
+                      sigma=0.015,
+                      lambda_=0.7,
+                      holeFill=False,
+                      kernel_size=1,
+                      level=1,
+                      horizontal=False,
+                      temporalFilter=False,
+                      alpha=0.4,
+                      history=3,
+                      flyingDepthCancellation=False)
+        values.update(kwargs)
+        _Options.__init__(self, **values)
+
+    def enable(self, enable):
+        self.enabled = enable
+
+    def is_enabled(self):
+        return self.enabled
+
+    def get_bytes_per_pixel(self):
+        return self.bytes_per_pixel
+
+    def enable_subsample(self, enable):
+        self.subsample = enable
+
+    def is_subsample_enabled(self):
+        return self.subsample
+
+    def set_subsample_mode(self, mode):
+        self.subsample_mode = mode
+
+    def get_subsample_mode(self):
+        return self.subsample_mode
+
+    def set_subsample_factor(self, factor):
+        self.subsample_factor = factor
+
+    def get_subsample_factor(self):
+        return self.subsample_factor
+
+    def enable_edgePreServingFilter(self, enable):
+        self.edgePreServingFilter = enable
+
+    def is_edgePreServingFilter_enabled(self):
+        return self.edgePreServingFilter
+
+    def set_edge_level(self, level):
+        self.edge_level = level
+
+    def get_edge_level(self):
+        return self.edge_level
+
+    def set_sigma(self, sigma):
+        self.sigma = sigma
+
+    def get_sigma(self):
+        return self.sigma
+
+    def set_lambda(self, value):
+        self.lambda_ = value
+
+    def get_lambda(self):
+        return self.lambda_
+
+    def enable_holeFill(self, enable):
+        self.holeFill = enable
+
+    def is_holeFill_enabled(self):
+        return self.holeFill
+
+    def set_kernel_size(self, size):
+        self.kernel_size = size
+
+    def get_kernel_size(self):
+        return self.kernel_size
+
+    def set_level(self, level):
+        self.level = level
+
+    def get_level(self):
+        return self.level
+
+    def set_horizontal(self, horizontal):
+        self.horizontal = horizontal
+
+    def is_horizontal(self):
+        return self.horizontal
+
+    def enable_temporalFilter(self, enable):
+        self.temporalFilter = enable
+
+    def is_temporalFilter_enabled(self):
+        return self.temporalFilter
+
+    def set_alpha(self, alpha):
+        self.alpha = alpha
+
+    def get_alpha(self):
+        return self.alpha
+
+    def set_history(self, history):
+        self.history = history
+
+    def get_history(self):
+        return self.history
+
+    def enable_flyingDepthCancellation(self, enable):
+        self.flyingDepthCancellation = enable
+
+    def is_flyingDepthCancellation_enabled(self):
+        return self.flyingDepthCancellation
+
+
+class DepthAccuracyOptions(_Options):
+    def __init__(self, **kwargs):
+        values = dict(enabled=False, region_ratio=0.8, groundTruth_distance=0)
+        values.update(kwargs)
+        _Options.__init__(self, **values)
+
+    def enable(self, enable):
+        self.enabled = enable
+
+    def is_enabled(self):
+        return self.enabled
+
+    def set_region_ratio(self, ratio):
+        self.region_ratio = ratio
+
+    def get_region_ratio(self):
+        return self.region_ratio
+
+    def set_groundTruth_distance(self, distance):
+        self.groundTruth_distance = distance
+
+    def get_groundTruth_distance(self):
+        return self.groundTruth_distance
+
+
+class IRProperty(_Options):
+    def __init__(self, **kwargs):
+        values = dict(value=3, extended=False)
+        values.update(kwargs)
+        _Options.__init__(self, **values)
+
+    def enable_extendIR(self, enable):
+        self.extended = enable
+        self.value = min(self.value, self.get_IR_max())
+
+    def is_extendIR_enabled(self):
+        return self.extended
+
+    def get_IR_value(self):
+        return self.value
+
+    def set_IR_value(self, value):
+        self.value = value
+
+    def get_IR_min(self):
+        return 0
+
+    def get_IR_max(self):
+        return 15 if self.extended else 6
+
+
+class RegisterOptions(_Options):
+    def __init__(self, **kwargs):
+        values = dict(periodic_read=False, save_log=False, period_time=1000)
+        values.update(kwargs)
+        _Options.__init__(self, **values)
+
+    def enable_periodic_read(self, enable):
+        self.periodic_read = enable
+
+    def is_periodic_read(self):
+        return self.periodic_read
+
+    def enable_save_log(self, enable):
+        self.save_log = enable
+
+    def is_save_log(self):
+        return self.save_log
+
+    def set_period_time(self, period_time):
+        self.period_time = period_time
+
+    def get_period_time(self):
+        return self.period_time
+
+
+class CameraDevice:
+    """The simulated camera module.
+
+    It produces frames on its own thread after the stream is enabled.
+
+    Args:
+        index (int): The index of camera module.
+        settings (dict): The settings of simulator. Please refer `configure`.
+    """
+    def __init__(self, index, settings):
+        self.__index = index
+        self.__settings = settings
+        self.__pid = settings['pid']
+        self.__module_name = get_module_name(self.__pid)
+        self.__z_range = {
+            "Near": settings['z_range'][0],
+            "Far": settings['z_range'][1]
+        }
+        self.__conf = None
+        self.__source = None
+        self.__pipeline = None
+        self.__frameset_pipeline = None
+        self.__callbacks = (None, None, None, None)
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__color_depth_enabled = False
+        self.__pc_enabled = False
+        self.__interleave_mode = False
+        self.__serial_number = 0
+
+        self.__depth_filter_options = DepthFilterOptions()
+        self.__depth_accuracy_options = DepthAccuracyOptions()
+        self.__ir_property = IRProperty()
+        self.__register_options = RegisterOptions()
+        self.__registers = dict()
+        self.__properties = {
+            'AE': True,
+            'exposure_value': 0,
+            'exposure_time': 10.0,
+            'global_gain': 1.0,
+            'AWB': True,
+            'white_balance_temperature': 4500,
+            'low_light_compensation': 0,
+            'light_source': LIGHT_SOURCE_VALUE.VALUE_60HZ,
+        }
+        self.__HWPP = True
+        self.__plyFilter = False
+        self.__roi_center = (0, 0)
+        self.__roi_pixels = 10
+
+    def init_stream(self,
+                    colorFormat,
+                    colorWidth,
+                    colorHeight,
+                    actualFps,
+                    depthFormat,
+                    depthWidth,
+                    depthHeight,
+                    depthDataTransferCtrl,
+                    ctrlMode,
+                    rectifyLogIndex,
+                    colorImageCallback=None,
+                    depthImageCallback=None,
+                    pcFrameCallback=None,
+                    IMUDataCallback=None):
+        self.__open(colorFormat, colorWidth, colorHeight, actualFps,
+                    depthFormat, depthWidth, depthHeight,
+                    depthDataTransferCtrl, rectifyLogIndex)
+        self.__callbacks = (colorImageCallback, depthImageCallback,
+                            pcFrameCallback, IMUDataCallback)
+        self.__pipeline = Pipeline()
+        return self.__pipeline
+
+    def init_stream_with_frameset(self, colorFormat, colorWidth, colorHeight,
+                                  actualFps, depthFormat, depthWidth,
+                                  depthHeight, depthDataTransferCtrl, ctrlMode,
+                                  rectifyLogIndex):
+        self.__open(colorFormat, colorWidth, colorHeight, actualFps,
+                    depthFormat, depthWidth, depthHeight,
+                    depthDataTransferCtrl, rectifyLogIndex)
+        self.__frameset_pipeline = FrameSetPipeline()
+        return self.__frameset_pipeline
+
+    def enable_stream(self):
+        self.__color_depth_enabled = True
+        self.__pc_enabled = True
+        self.__start()
+
+    def enable_color_depth_stream(self):
+        self.__color_depth_enabled = True
+        self.__start()
+
+    def enable_pc_stream(self):
+        self.__pc_enabled = True
+        self.__start()
+
+    def pause_stream(self):
+        self.__color_depth_enabled = False
+        self.__pc_enabled = False
+        self.__join()
+
+    def pause_color_depth_stream(self):
+        self.__color_depth_enabled = False
+
+    def pause_pc_stream(self):
+        self.__pc_enabled = False
+
+    def close_stream(self):
+        self.pause_stream()
+        for pipeline in (self.__pipeline, self.__frameset_pipeline):
+            if pipeline is not None:
+                pipeline.stop()
+        self.__pipeline = None
+        self.__frameset_pipeline = None
+        self.__callbacks = (None, None, None, None)
+        if self.__source is not None:
+            self.__source.close()
+        self.__source = None
+
+    def release(self):
+        self.close_stream()
+
+    def enable_interleave_mode(self, enable):
+        self.__interleave_mode = enable
+
+    def is_interleave_mode_enabled(self):
+        return self.__interleave_mode
+
+    def get_camera_device_info(self):
+        return {
+            'firmware_version': "EX{}-SIM-1.0".format(self.__module_name),
+            'serial_number': "SIM{:04d}".format(self.__index),
+            'bus_info': "sim:{}".format(self.__index),
+            'model_name': "eYs3D {} Simulator".format(self.__module_name),
+            'dev_info': {
+                'PID': self.__pid,
+                'VID': 0x1E4E,
+                'dev_name': "eYs3D Simulator {}".format(self.__index),
+                'chip_ID': 0,
+                'dev_type': 0,
+            },
+        }
+
+    def get_usb_port_type(self):
+        return USB_PORT_TYPE(self.__settings['usb_port_type'])
+
+    def get_z_range(self):
+        return dict(self.__z_range)
+
+    def set_z_range(self, near, far):
+        self.__z_range = {"Near": near, "Far": far}
+
+    def get_zd_table(self):
+        """Get the ZD table of opened stream.
+
+        Returns:
+            bytes: The z value by disparity. It is 2 bytes per entry in big endian, as `nZDTable` in Frame.h.
+        """
+        zd_table = getattr(self.__source, "zd_table", None)
+        if zd_table is None:
+            raise ValueError("The stream is not initialized.")
+        return zd_table.astype(">u2").tobytes()
+
+    def get_rectify_log_data(self):
+        (width, height) = (RECTIFIED_WIDTH, RECTIFIED_HEIGHT)
+        (cx, cy, f) = (width / 2.0, height / 2.0, FOCAL_LENGTH)
+        cam_mat = np.array([f, 0, cx, 0, f, cy, 0, 0, 1], dtype=np.float32)
+        new_cam_mat1 = np.array([f, 0, cx, 0, 0, f, cy, 0, 0, 0, 1, 0],
+                                dtype=np.float32)
+        new_cam_mat2 = new_cam_mat1.copy()
+        new_cam_mat2[3] = -f * BASELINE
+        identity = np.eye(3, dtype=np.float32).reshape(-1)
+        return {
+            'InImgWidth': width * 2,
+            'InImgHeight': height,
+            'OutImgWidth': width * 2,
+            'OutImgHeight': height,
+            'RECT_ScaleEnable': 0,
+            'RECT_CropEnable': 0,
+            'RECT_ScaleWidth': width,
+            'RECT_ScaleHeight': height,
+            'CamMat1': cam_mat,
+            'CamDist1': np.zeros(8, dtype=np.float32),
+            'CamMat2': cam_mat.copy(),
+            'CamDist2': np.zeros(8, dtype=np.float32),
+            'RotaMat': identity,
+            'TranMat': np.array([-BASELINE, 0, 0], dtype=np.float32),
+            'LRotaMat': identity.copy(),
+            'RRotaMat': identity.copy(),
+            'NewCamMat1': new_cam_mat1,
+            'NewCamMat2': new_cam_mat2,
+            'RECT_Crop_Row_BG': 0,
+            'RECT_Crop_Row_ED': 0,
+            'RECT_Crop_Col_BG_L': 0,
+            'RECT_Crop_Col_ED_L': 0,
+            'RECT_Scale_Col_M': 1,
+            'RECT_Scale_Col_N': 1,
+            'RECT_Scale_Row_M': 1,
+            'RECT_Scale_Row_N': 1,
+            'RECT_AvgErr': 0.0,
+            'nLineBuffers': 0,
+            'ReProjectMat': np.array([
+                1, 0, 0, -cx, 0, 1, 0, -cy, 0, 0, 0, f, 0, 0, 1.0 / BASELINE,
+                0
+            ],
+                                     dtype=np.float32),
+        }
+
+    def get_depthFilterOptions(self):
+        return self.__depth_filter_options.copy()
+
+    def set_depthFilterOptions(self, options):
+        self.__depth_filter_options = options.copy()
+
+    def get_depthAccuracyOptions(self):
+        return self.__depth_accuracy_options.copy()
+
+    def set_depthAccuracyOptions(self, options):
+        self.__depth_accuracy_options = options.copy()
+
+    def get_IR_property(self):
+        return self.__ir_property.copy()
+
+    def set_IR_property(self, ir_property):
+        self.__ir_property = ir_property.copy()
+
+    def get_register_options(self):
+        return self.__register_options.copy()
+
+    def set_write_register_options(self, options):
+        self.__register_options = options.copy()
+
+    def get_FW_register(self, addr):
+        return self.__registers.get(('FW', addr), 0)
+
+    def set_FW_register(self, addr, value):
+        self.__registers[('FW', addr)] = value
+
+    def get_HW_register(self, addr):
+        return self.__registers.get(('HW', addr), 0)
+
+    def set_HW_register(self, addr, value):
+        self.__registers[('HW', addr)] = value
+
+    def get_sensor_register(self, addr, sensor_mode, slave_id):
+        return self.__registers.get(('I2C', addr, int(sensor_mode), slave_id),
+                                    0)
+
+    def set_sensor_register(self, addr, value, sensor_mode, slave_id):
+        self.__registers[('I2C', addr, int(sensor_mode), slave_id)] = value
+
+    def enable_AE(self):
+        self.__properties['AE'] = True
+
+    def disable_AE(self):
+        self.__properties['AE'] = False
+
+    def get_AE_status(self):
+        return 0 if self.__properties['AE'] else 1  # AE_ENABLE is 0.
+
+    def get_exposure_value(self):
+        return self.__properties['exposure_value']
+
+    def set_exposure_value(self, value):
+        self.__properties['exposure_value'] = value
+
+    def get_manual_exposure_time(self):
+        return self.__properties['exposure_time']
+
+    def set_manual_exposure_time(self, value):
+        self.__properties['exposure_time'] = value
+
+    def get_manual_global_gain(self):
+        return self.__properties['global_gain']
+
+    def set_manual_global_gain(self, value):
+        self.__properties['global_gain'] = value
+
+    def get_exposure_range(self):
+        return {"Max": -1, "Min": -13}
+
+    def enable_AWB(self):
+        self.__properties['AWB'] = True
+
+    def disable_AWB(self):
+        self.__properties['AWB'] = False
+
+    def get_AWB_status(self):
+        return 0 if self.__properties['AWB'] else 1  # AWB_ENABLE is 0.
+
+    def get_white_balance_temperature(self):
+        return self.__properties['white_balance_temperature']
+
+    def set_white_balance_temperature(self, value):
+        self.__properties['white_balance_temperature'] = value
+
+    def get_white_balance_temperature_range(self):
+        return {"Max": 6500, "Min": 2800}
+
+    def get_low_light_compensation_status(self):
+        return self.__properties['low_light_compensation']
+
+    def set_low_light_compensation(self, value):
+        self.__properties['low_light_compensation'] = value
+
+    def get_light_source_status(self):
+        return self.__properties['light_source']
+
+    def set_light_source(self, value):
+        self.__properties['light_source'] = LIGHT_SOURCE_VALUE(value)
+
+    def is_HWPP_supported(self):
+        return True
+
+    def is_HWPP_enabled(self):
+        return self.__HWPP
+
+    def enable_HWPP(self, enable):
+        self.__HWPP = enable
+
+    def is_plyFilter_supported(self):
+        return True
+
+    def is_plyFilter_enabled(self):
+        return self.__plyFilter
+
+    def enable_plyFilter(self, enable):
+        self.__plyFilter = enable
+
+    def set_depth_roi_center_point(self, x, y):
+        self.__roi_center = (x, y)
+
+    def set_septh_roi_pixels(self, count):
+        self.__roi_pixels = count
+
+    def get_IMU_device_info(self):
+        return {
+            'VID': 0,
+            'PID': 0,
+            'type': 0,
+            'serialNumber': "",
+            'fwVersion': "",
+            'moduleName': "",
+            'status': 0,
+            'isValid': False,
+        }
+
+    def do_snapshot(self):
+        pass
+
+    def dump_frame_info(self, count=60):
+        pass
+
+    def dump_IMU_data(self, count=256):
+        pass
+
+    def dump_camera_device_properties(self):
+        print(self.__properties)
+
+    def copy_from_G1toG2(self):
+        pass
+
+    def __open(self, colorFormat, colorWidth, colorHeight, actualFps,
+               depthFormat, depthWidth, depthHeight, depthDataTransferCtrl,
+               rectifyLogIndex):
+        self.close_stream()
+        self.__conf = {
+            'colorFormat': colorFormat,
+            'color': (colorHeight, colorWidth),
+            'depthFormat': depthFormat,
+            'depth': (depthHeight, depthWidth),
+            'depthTransfer': depthDataTransferCtrl,
+            'fps': self.__settings['fps'] or actualFps or 30,
+            'rectifyLogIndex': rectifyLogIndex,
+        }
+        if self.__settings['recording']:
+            from .playback import RecordingSource  # The recorder is only needed for playing.
+            self.__source = RecordingSource(self.__conf, self.__settings)
+        else:
+            self.__source = _FrameSource(
+                self.__conf, self.__settings,
+                (self.__z_range["Near"], self.__z_range["Far"]))
+
+    def __start(self):
+        with self.__lock:
+            if self.__source is None:
+                raise Exception("The stream is not initialized.")
+            if self.__thread is None:
+                self.__thread = threading.Thread(
+                    target=self.__run,
+                    name="eys3d-sim-{}".format(self.__index),
+                    daemon=True)
+                self.__thread.start()
+
+    def __join(self):
+        with self.__lock:
+            thread = self.__thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def __is_running(self):
+        # The thread quits itself when all of the streams are paused.
+        with self.__lock:
+            if self.__color_depth_enabled or self.__pc_enabled:
+                return True
+            self.__thread = None
+            return False
+
+    def __run(self):
+        source = self.__source
+        count = source.get_count()
+        next_time = time.monotonic()
+        n = 0
+        while self.__is_running():
+            k = n % count
+            if n and not k and not source.is_looping():
+                self.__finish()
+                break
+            if self.__settings['realtime']:
+                next_time += source.get_interval(n)
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.monotonic()  # Do not burst if late.
+            self.__serial_number += 1
+            stamp = source.get_stamp(n, self.__serial_number)
+            color = self.__stamp(source.get_color_frame(k), stamp)
+            depth = self.__stamp(source.get_depth_frame(k), stamp)
+            if self.__color_depth_enabled:
+                self.__publish(color, depth)
+            if self.__pc_enabled and self.__callbacks[2] and depth is not None:
+                start = time.monotonic()
+                point_cloud = source.get_point_cloud(k)
+                if point_cloud is not None:
+                    (xyz, rgb, drgb) = point_cloud
+                    self.__callbacks[2](PCFrame(
+                        depth, xyz, rgb, drgb,
+                        int((time.monotonic() - start) * 1000000)))
+            n += 1
+
+    def __finish(self):
+        # The recording is played to the end. The stream could be enabled to play again.
+        with self.__lock:
+            self.__color_depth_enabled = False
+            self.__pc_enabled = False
+            self.__thread = None
+
+    def __stamp(self, template, stamp):
+        # The buffers of pre-rendered frame are shared. They are read-only, so not copied when popped.
+        if template is None:
+            return None
+        (ts, serial_number) = stamp
+        frame = Frame()
+        frame.__dict__.update(template.__dict__)
+        frame.tsUs = ts
+        frame.serialNumber = serial_number
+        frame.sensorDataSet = SensorDataSet(serial_number)
+        frame.interleaveMode = self.__interleave_mode
+        if self.__depth_accuracy_options.enabled and template.zdDepthVec.size:
+            frame.depthAccuracyInfo = self.__get_accuracy_info(frame)
+        return frame
+
+    def __publish(self, color, depth):
+        (color_callback, depth_callback, _, _) = self.__callbacks
+        pipeline = self.__pipeline
+        if pipeline is not None:
+            if color is not None:
+                pipeline.push_color_frame(color)
+            if depth is not None:
+                pipeline.push_depth_frame(depth)
+        frameset_pipeline = self.__frameset_pipeline
+        if frameset_pipeline is not None:
+            frameset = FrameSet()
+            if color is not None:
+                frameset.color_frame = color
+            if depth is not None:
+                frameset.depth_frame = depth
+            frameset_pipeline.push_frameset(frameset)
+        if color is not None and color_callback:
+            color_callback(color)
+        if depth is not None and depth_callback:
+            depth_callback(depth)
+
+    def __get_accuracy_info(self, frame):
+        z = frame.zdDepthVec.reshape(frame.height, frame.width)
+        ratio = self.__depth_accuracy_options.region_ratio
+        (h, w) = (int(frame.height * ratio), int(frame.width * ratio))
+        top = (frame.height - h) // 2
+        left = (frame.width - w) // 2
+        roi = z[top:top + h, left:left + w]
+        valid = roi[roi > 0].astype(np.float64)
+        distance = float(valid.mean()) if valid.size else 0.0
+        truth = self.__depth_accuracy_options.groundTruth_distance
+        return {
+            'distance': distance,
+            'fill_rate': valid.size / float(max(roi.size, 1)),
+            'z_accuracy': (distance - truth) / truth if truth else 0.0,
+            'temporal_noise': 0.0,
+            'spatial_noise': float(valid.std()) if valid.size else 0.0,
+            'angle': 0.0,
+            'angle_x': 0.0,
+            'angle_y': 0.0,
+        }
+
+
+class System:
+    """The simulated eYs3D system.
+
+    It enumerates the simulated camera modules configured by `configure`.
+
+    Args:
+        color_byte_order (int): The COLOR_BYTE_ORDER. It is kept for compatibility.
+    """
+    def __init__(self, color_byte_order=COLOR_BYTE_ORDER.COLOR_RGB24):
+        self.__color_byte_order = color_byte_order
+        self.__settings = get_settings()
+        self.__devices = dict()
+
+    def get_camera_device_count(self):
+        return self.__settings['device_count']
+
+    def get_camera_device(self, camera_index):
+        if not 0 <= camera_index < self.get_camera_device_count():
+            return None
+        if camera_index not in self.__devices:
+            self.__devices[camera_index] = CameraDevice(
+                camera_index, self.__settings)
+        return self.__devices[camera_index]
+
+    def dump_system_info(self):
+        print("eYs3D simulated system: {} camera device(s), PID 0x{:x}".format(
+            self.get_camera_device_count(), self.__settings['pid']))
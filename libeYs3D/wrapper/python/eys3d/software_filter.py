@@ -0,0 +1,646 @@
+import time
+
+import numpy as np
+
+from eys3d import logger
+from .depth import as_z_map
+from .histogram import LatencyHistogram
+
+__all__ = [
+    "Subsample", "EdgePreServingFilter", "HoleFill", "TemporalFilter",
+    "RemoveCurve", "SoftwareDepthFilter"
+]
+
+# The (filtering mode, scaling factor) of subsample mode index. The filtering mode is 0 for median and 1 for mean.
+SUBSAMPLE_MODES = ((0, 2), (0, 3), (1, 4), (1, 5))
+
+# The 8 neighbors of pixel as (row, column) offsets.
+_NEIGHBORS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0),
+              (1, 1))
+
+
+def _shifted(padded, dy, dx, pad):
+    # The view of padded image shifted by (dy, dx), in the shape of image.
+    height = padded.shape[0] - 2 * pad
+    width = padded.shape[1] - 2 * pad
+    return padded[pad + dy:pad + dy + height, pad + dx:pad + dx + width]
+
+
+class _Stage:
+    """The base of software filters. The filter is enabled when it is created."""
+    def __init__(self):
+        self.__enabled = True
+
+    def enable(self):
+        self.__enabled = True
+
+    def disable(self):
+        self.__enabled = False
+
+    def is_enabled(self):
+        return self.__enabled
+
+    def reset(self):
+        """Reset the state kept between frames. Nothing is kept by default."""
+
+
+class Subsample(_Stage):
+    """Perform subsampling process in NumPy.
+
+    It scales the depth image down by the median or mean of valid (non-zero) z values in each block.
+    The blocks at the right and bottom which are smaller than the factor are dropped.
+    `SoftwareDepthFilter` scales the result up to the original size at the end like `APC_ApplyFilters`.
+
+    Args:
+        mode_index (int): The mode for subsample. Please refer `set`. Default is 1.
+    """
+    def __init__(self, mode_index=1):
+        _Stage.__init__(self)
+        self.__mode_index = 1
+        self.set(mode_index)
+
+    @logger.catch
+    def set(self, mode_index):
+        """Set the filtering mode and scaling factor.
+
+        Args:
+            mode_index (int): The mode for subsample.
+                0: median filter and factor 2.
+                1: median filter and factor 3.
+                2: mean filter and factor 4.
+                3: mean filter and factor 5.
+        """
+        if mode_index not in range(4):
+            raise ValueError("Out of range.")
+        self.__mode_index = mode_index
+
+    def get_mode_index(self):
+        return self.__mode_index
+
+    def get_factor(self):
+        return SUBSAMPLE_MODES[self.__mode_index][1]
+
+    def get(self):
+        """Get the filtering mode and scaling factor to a dictionary.
+
+        Returns:
+            dict: The dictionary with following keys:
+
+            mode_index (int): The filtering mode. 0: median filter. 1: mean filter.
+            factor (int): The scaling factor.
+        """
+        mode, factor = SUBSAMPLE_MODES[self.__mode_index]
+        return {'mode_index': mode, 'factor': factor}
+
+    def apply(self, z_map):
+        """Scale the z value image down.
+
+        Args:
+            z_map (np.array): The z value image of shape (H, W).
+
+        Returns:
+            np.array: The image of shape (H // factor, W // factor) in the type of z_map.
+        """
+        mode, factor = SUBSAMPLE_MODES[self.__mode_index]
+        height, width = z_map.shape[0] // factor, z_map.shape[1] // factor
+        blocks = z_map[:height * factor, :width * factor].reshape(
+            height, factor, width, factor).swapaxes(1, 2).reshape(
+                height, width, factor * factor)
+        valid = np.count_nonzero(blocks, axis=2)
+        if mode == 0:
+            # The zeros are sorted to the front, so the lower median of valid values is at
+            # zeros + (valid - 1) // 2. It is the last zero of the block without valid values.
+            index = (2 * factor * factor - valid - 1) // 2
+            result = np.take_along_axis(np.sort(blocks, axis=2),
+                                        index[..., None],
+                                        axis=2)[..., 0]
+        else:
+            result = blocks.sum(axis=2, dtype=np.uint32) // np.maximum(valid, 1)
+        return result.astype(z_map.dtype, copy=False)
+
+    def restore(self, z_map, shape):
+        """Scale the subsampled image up to the original size by the nearest pixel.
+
+        Args:
+            z_map (np.array): The subsampled image from `apply`.
+            shape (tuple): The (H, W) of the original image. The dropped pixels are 0.
+
+        Returns:
+            np.array: The image of shape (H, W).
+        """
+        factor = self.get_factor()
+        result = np.zeros(shape, dtype=z_map.dtype)
+        height, width = z_map.shape[0] * factor, z_map.shape[1] * factor
+        result[:height, :width] = z_map.repeat(factor, axis=0).repeat(factor,
+                                                                      axis=1)
+        return result
+
+
+class EdgePreServingFilter(_Stage):
+    """Perform edge preserve filtering in NumPy.
+
+    Each pass blends the pixel with the mean of its 4 neighbors, weighted by exp(-|dz| / (sigma * z)),
+    so the neighbors across the edges of depth barely contribute. Lambda is the ratio of the blended mean.
+    The invalid (zero) pixels are neither changed nor used.
+
+    Args:
+        level (int): The level for edge preserve filtering, i.e. the number of passes. The range is 1 ~ 10. Default is 1.
+        sigma (float): The relative difference of z at which the weight of neighbor is 1/e. Default is 0.015.
+        lambda_ (float): The ratio of blended mean in each pass. Default is 0.7.
+    """
+    def __init__(self, level=1, sigma=0.015, lambda_=0.7):
+        _Stage.__init__(self)
+        self.__level = 1
+        self.__sigma = sigma
+        self.__lambda = lambda_
+        self.set_edge_level(level)
+
+    @logger.catch
+    def set_edge_level(self, level):
+        """Set the level of edge.
+
+        Args:
+            level (int): The level for edge preserve filtering (larger means heavier effect). The range is 1 ~ 10.
+        """
+        if not 1 <= level <= 10:
+            raise ValueError("Out of range.")
+        self.__level = level
+
+    def get_edge_level(self):
+        return self.__level
+
+    def get_sigma(self):
+        return round(self.__sigma, 3)
+
+    def get_lambda(self):
+        return round(self.__lambda, 3)
+
+    def set(self, edge_level):
+        self.set_edge_level(edge_level)
+
+    def get(self):
+        """Get the config of edge preserve filtering to a dictionary.
+
+        Returns:
+            dict: The dictionary with the keys `level`, `sigma` and `lambda`.
+        """
+        return {
+            'level': self.__level,
+            'sigma': self.get_sigma(),
+            'lambda': self.get_lambda(),
+        }
+
+    def apply(self, z_map):
+        """Filter the z value image.
+
+        Args:
+            z_map (np.array): The z value image of shape (H, W).
+
+        Returns:
+            np.array: The filtered image in the type of z_map.
+        """
+        valid = z_map > 0
+        z = z_map.astype(np.float32)
+        for _ in range(self.__level):
+            padded = np.pad(z, 1, mode="edge")
+            # The scale of difference. The invalid pixels are reset below, so any positive scale works.
+            scale = np.where(valid, z * self.__sigma, np.float32(1.0))
+            total = z.copy()
+            weights = np.ones_like(z)
+            for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                neighbor = _shifted(padded, dy, dx, 1)
+                weight = np.exp(-np.abs(neighbor - z) / scale)
+                weight[neighbor == 0] = 0
+                total += weight * neighbor
+                weights += weight
+            z = np.where(valid, z + self.__lambda * (total / weights - z), 0)
+        return np.rint(z).astype(z_map.dtype)
+
+
+class HoleFill(_Stage):
+    """Perform hole filling in NumPy.
+
+    Each pass fills the invalid (zero) pixels by the farthest valid z within the kernel along the rows,
+    if horizontal, or along the columns. The holes are usually occlusions, which belong to the background.
+    The level is the number of passes, so the holes up to 2 * kernel_size * level pixels are filled.
+
+    Args:
+        kernel_size (int): The kernel size for hole filling. Default is 1.
+        level (int): The level for hole filling. The range is 1 ~ 3. Default is 1.
+        horizontal (bool): True to fill along the rows, otherwise along the columns. Default is False.
+    """
+    def __init__(self, kernel_size=1, level=1, horizontal=False):
+        _Stage.__init__(self)
+        self.__kernel_size = 1
+        self.__level = 1
+        self.__horizontal = bool(horizontal)
+        self.set_kernel_size(kernel_size)
+        self.set_level(level)
+
+    @logger.catch
+    def set_kernel_size(self, size=1):
+        """Set the kernel size.
+
+        Args:
+            size (int): The kernel size for hole filling. Defalut is 1.
+        """
+        if size < 1:
+            raise ValueError("Out of range.")
+        self.__kernel_size = int(size)
+
+    def get_kernel_size(self):
+        return self.__kernel_size
+
+    @logger.catch
+    def set_level(self, level):
+        """Set the level.
+
+        Args:
+            level (int): The level for hole filling. The larger one means heavier effect. The range is 1 ~ 3.
+        """
+        if not 1 <= level <= 3:
+            raise ValueError("Out of range.")
+        self.__level = level
+
+    def get_level(self):
+        return self.__level
+
+    def enable_horizontal(self):
+        self.__horizontal = True
+
+    def disable_horizontal(self):
+        self.__horizontal = False
+
+    def is_horizontal(self):
+        return self.__horizontal
+
+    def set(self, kernel_size, level):
+        if kernel_size:
+            self.set_kernel_size(kernel_size)
+        if level:
+            self.set_level(level)
+
+    def get(self):
+        """Get the config of the hole filling to a dictionary.
+
+        Returns:
+            dict: The dictionary with the keys `kernel_size` and `level`.
+        """
+        return {'kernel_size': self.__kernel_size, 'level': self.__level}
+
+    def apply(self, z_map):
+        """Fill the holes of z value image.
+
+        Args:
+            z_map (np.array): The z value image of shape (H, W).
+
+        Returns:
+            np.array: The filled image in the type of z_map.
+        """
+        size = self.__kernel_size
+        # Fill along the columns by filling the transposed image along its rows.
+        z = z_map.copy() if self.__horizontal else z_map.T.copy()
+        for _ in range(self.__level):
+            holes = z == 0
+            if not holes.any():
+                break
+            padded = np.pad(z, ((0, 0), (size, size)))
+            farthest = np.zeros_like(z)
+            for offset in range(2 * size + 1):
+                np.maximum(farthest,
+                           padded[:, offset:offset + z.shape[1]],
+                           out=farthest)
+            z[holes] = farthest[holes]
+        return z if self.__horizontal else np.ascontiguousarray(z.T)
+
+
+class TemporalFilter(_Stage):
+    """Perform temporal filtering in NumPy.
+
+    The z value is the exponential moving average of frames, i.e. alpha * current + (1 - alpha) * average.
+    The pixel which becomes invalid keeps its average for the history frames, then it is invalid.
+    The average restarts from the current value when the pixel is valid again.
+    The state is kept between frames, so please use one filter for one stream, and `reset` it at a new stream.
+
+    Args:
+        alpha (float): The weighting ratio of the current depth image. The range is 0 ~ 1.0. Default is 0.4.
+        history (int): Number of passing depth images to be recorded. The range is 2 ~ 3. Default is 3.
+    """
+    def __init__(self, alpha=0.4, history=3):
+        _Stage.__init__(self)
+        self.__alpha = 0.4
+        self.__history = 3
+        self.set_alpha(alpha)
+        self.set_history(history)
+        self.reset()
+
+    @logger.catch
+    def set_alpha(self, alpha):
+        """Set the alpha.
+
+        Args:
+            alpha (float): The weighting ratio for controlling the mix of the current depthimage and the passing depth images. The range is 0 ~ 1.0.
+        """
+        if not 0 < alpha < 1.0:
+            raise ValueError("Out of range.")
+        self.__alpha = alpha
+
+    def get_alpha(self):
+        return round(self.__alpha, 3)
+
+    @logger.catch
+    def set_history(self, history):
+        """Set the history.
+
+        Args:
+            history (int): Number of passing depth images to be recorded. The range is 2 ~ 3.
+        """
+        if not 2 <= history <= 3:
+            raise ValueError("Out of range.")
+        self.__history = history
+
+    def get_history(self):
+        return self.__history
+
+    def set(self, alpha, history):
+        if alpha:
+            self.set_alpha(alpha)
+        if history:
+            self.set_history(history)
+
+    def get(self):
+        """Get the config of the temporal filtering to a dictionary.
+
+        Returns:
+            dict: The dictionary with the keys `alpha` and `history`.
+        """
+        return {'alpha': round(self.__alpha, 1), 'history': self.__history}
+
+    def reset(self):
+        self.__average = None
+        self.__missing = None
+
+    def apply(self, z_map):
+        """Filter the z value image with the previous ones.
+
+        Args:
+            z_map (np.array): The z value image of shape (H, W).
+
+        Returns:
+            np.array: The filtered image in the type of z_map.
+        """
+        valid = z_map > 0
+        z = z_map.astype(np.float32)
+        if self.__average is None or self.__average.shape != z.shape:
+            self.__average = z
+            self.__missing = np.where(valid, 0,
+                                      self.__history + 1).astype(np.uint8)
+            return z_map.copy()
+        recent = self.__missing <= self.__history
+        blended = self.__average + self.__alpha * (z - self.__average)
+        self.__average = np.where(valid, np.where(recent, blended, z),
+                                  self.__average)
+        self.__missing = np.where(
+            valid, 0, np.minimum(self.__missing + 1,
+                                 self.__history + 1)).astype(np.uint8)
+        result = np.where(self.__missing <= self.__history, self.__average, 0)
+        return np.rint(result).astype(z_map.dtype)
+
+
+class RemoveCurve(_Stage):
+    """Perform flying depth cancellation in NumPy.
+
+    The pixels at the edges of objects get the z values between the foreground and the background,
+    which appear as curves in the point cloud. The valid pixel is removed (set to 0) if fewer than
+    min_neighbors of its 8 neighbors are within the relative threshold of its z value.
+
+    Args:
+        threshold (float): The relative difference of z of the supporting neighbors, below 1. Default is 0.05.
+        min_neighbors (int): The number of supporting neighbors to keep the pixel. Default is 2.
+    """
+    def __init__(self, threshold=0.05, min_neighbors=2):
+        _Stage.__init__(self)
+        self.__threshold = threshold
+        self.__min_neighbors = min_neighbors
+
+    def get(self):
+        return {
+            'threshold': self.__threshold,
+            'min_neighbors': self.__min_neighbors
+        }
+
+    def apply(self, z_map):
+        """Remove the flying pixels of z value image.
+
+        Args:
+            z_map (np.array): The z value image of shape (H, W).
+
+        Returns:
+            np.array: The image in the type of z_map.
+        """
+        z = z_map.astype(np.float32)
+        padded = np.pad(z, 1)
+        limit = z * self.__threshold
+        # The invalid neighbors never support, since the threshold is below 1.
+        difference = np.empty_like(z)
+        near = np.empty(z.shape, dtype=bool)
+        support = np.zeros(z.shape, dtype=np.uint8)
+        for dy, dx in _NEIGHBORS:
+            np.subtract(_shifted(padded, dy, dx, 1), z, out=difference)
+            np.abs(difference, out=difference)
+            np.less_equal(difference, limit, out=near)
+            support += near
+        return np.where(support >= self.__min_neighbors, z_map,
+                        0).astype(z_map.dtype, copy=False)
+
+
+class SoftwareDepthFilter:
+    """This class is the depth filters of `DepthFilterOptions` in NumPy.
+
+    The native filters only run in the SDK on the frames of the device. This class runs the same chain
+    on any z value image, e.g. of recorded or remote frames, on the thread or process which calls `apply`.
+    The filters have the same names and parameters as `DepthFilterOptions`, and run in the native order:
+    subsample, edgePreServingFilter, holeFill, temporalFilter, restoring the size of subsample, then removeCurve.
+    The cost of each stage is recorded, so the stages could be compared by `get_statistics`.
+
+    The algorithms are vectorized approximations of the native ones, so the results are similar but not identical.
+    Only the temporal filter keeps state, so please use one instance per stream.
+
+    Example:
+        software_filter = SoftwareDepthFilter.from_options(pipe.get_depthFilter_options())
+        z_map = software_filter.apply(frameset.depth_frame)
+        logger.info(software_filter.get_statistics())
+
+    Args:
+        subsample (obj): The Subsample. It is disabled if None.
+        edgePreServingFilter (obj): The EdgePreServingFilter. It is disabled if None.
+        holeFill (obj): The HoleFill. It is disabled if None.
+        temporalFilter (obj): The TemporalFilter. It is disabled if None.
+        removeCurve (obj): The RemoveCurve. It is disabled if None.
+    """
+    STAGES = ("subsample", "edgePreServingFilter", "holeFill",
+              "temporalFilter", "removeCurve")
+
+    def __init__(self,
+                 subsample=None,
+                 edgePreServingFilter=None,
+                 holeFill=None,
+                 temporalFilter=None,
+                 removeCurve=None):
+        stages = (subsample, edgePreServingFilter, holeFill, temporalFilter,
+                  removeCurve)
+        types = (Subsample, EdgePreServingFilter, HoleFill, TemporalFilter,
+                 RemoveCurve)
+        for name, stage, stage_type in zip(self.STAGES, stages, types):
+            if stage is None:
+                stage = stage_type()
+                stage.disable()
+            setattr(self, name, stage)
+        self.__histograms = {}
+
+    @classmethod
+    def from_options(cls, options):
+        """Create the filters with the parameters of `DepthFilterOptions`.
+
+        Args:
+            options (obj): The class DepthFilterOptions from `Pipeline.get_depthFilter_options`,
+                or the dictionary from `get`, e.g. sent to another process or host.
+
+        Returns:
+            obj: The class SoftwareDepthFilter.
+        """
+        if isinstance(options, dict):
+            return cls._from_dict(options)
+        mode = options.subsample.get()
+        values = {
+            'subsample': {
+                'enabled':
+                options.subsample.is_enabled(),
+                'mode_index':
+                SUBSAMPLE_MODES.index((mode['mode_index'], mode['factor']))
+            },
+            'edgePreServingFilter': {
+                'enabled': options.edgePreServingFilter.is_enabled(),
+                'level': options.edgePreServingFilter.get_edge_level(),
+                'sigma': options.edgePreServingFilter.get_sigma(),
+                'lambda': options.edgePreServingFilter.get_lambda(),
+            },
+            'holeFill': {
+                'enabled': options.holeFill.is_enabled(),
+                'kernel_size': options.holeFill.get_kernel_size(),
+                'level': options.holeFill.get_level(),
+                'horizontal': options.holeFill.is_horizontal(),
+            },
+            'temporalFilter': {
+                'enabled': options.temporalFilter.is_enabled(),
+                'alpha': options.temporalFilter.get_alpha(),
+                'history': options.temporalFilter.get_history(),
+            },
+            'removeCurve': {
+                'enabled': options.removeCurve.is_enabled()
+            },
+        }
+        if not options.is_enabled():
+            for stage in values.values():
+                stage['enabled'] = False
+        return cls._from_dict(values)
+
+    @classmethod
+    def _from_dict(cls, values):
+        subsample = values.get('subsample', {})
+        edge = values.get('edgePreServingFilter', {})
+        hole = values.get('holeFill', {})
+        temporal = values.get('temporalFilter', {})
+        curve = values.get('removeCurve', {})
+        software_filter = cls(
+            Subsample(subsample.get('mode_index', 1)),
+            EdgePreServingFilter(edge.get('level', 1), edge.get('sigma', 0.015),
+                                 edge.get('lambda', 0.7)),
+            HoleFill(hole.get('kernel_size', 1), hole.get('level', 1),
+                     hole.get('horizontal', False)),
+            TemporalFilter(temporal.get('alpha', 0.4),
+                           temporal.get('history', 3)),
+            RemoveCurve(curve.get('threshold', 0.05),
+                        curve.get('min_neighbors', 2)))
+        for name in cls.STAGES:
+            if not values.get(name, {}).get('enabled', False):
+                getattr(software_filter, name).disable()
+        return software_filter
+
+    def get(self):
+        """Get the config of the filters to a dictionary.
+
+        It could be passed to `from_options` to create the same filters, e.g. in another process.
+
+        Returns:
+            dict: The dictionary with the name of stage as key. The value is the dictionary of `get` of the stage,
+                with `enabled`. The mode_index of subsample is 0 ~ 3 as `Subsample.set`.
+        """
+        values = {}
+        for name in self.STAGES:
+            stage = getattr(self, name)
+            values[name] = dict(stage.get(), enabled=stage.is_enabled())
+        values['subsample']['mode_index'] = self.subsample.get_mode_index()
+        values['holeFill']['horizontal'] = self.holeFill.is_horizontal()
+        return values
+
+    def __record(self, name, start):
+        end = time.perf_counter()
+        histogram = self.__histograms.get(name)
+        if histogram is None:
+            histogram = self.__histograms[name] = LatencyHistogram()
+        histogram.record(end - start)
+        return end
+
+    def apply(self, frame_or_zmap, shape=None):
+        """Filter the z value image by the enabled stages.
+
+        Args:
+            frame_or_zmap (obj): The depth frame (eys3dPy.Frame or FrameView), the z value image of shape (H, W),
+                or the flat ZD buffer. Please refer `depth.as_z_map`. It is not modified.
+            shape (tuple): The (H, W) of flat ZD buffer. It is not needed for frame or image.
+
+        Returns:
+            np.array: The filtered z value image of shape (H, W).
+        """
+        z_map = as_z_map(frame_or_zmap, shape)
+        begin = start = time.perf_counter()
+        result = z_map
+        subsampled = self.subsample.is_enabled()
+        if subsampled:
+            result = self.subsample.apply(result)
+            start = self.__record("subsample", start)
+        for name in ("edgePreServingFilter", "holeFill", "temporalFilter"):
+            stage = getattr(self, name)
+            if stage.is_enabled():
+                result = stage.apply(result)
+                start = self.__record(name, start)
+        if subsampled:
+            result = self.subsample.restore(result, z_map.shape)
+            start = self.__record("restore", start)
+        if self.removeCurve.is_enabled():
+            result = self.removeCurve.apply(result)
+            start = self.__record("removeCurve", start)
+        self.__record("total", begin)
+        return np.array(result) if result is z_map else result
+
+    def reset(self):
+        """Reset the state of filters, e.g. at a new stream. It is like `APC_ResetFilters`."""
+        for name in self.STAGES:
+            getattr(self, name).reset()
+
+    def get_statistics(self):
+        """Get the cost of stages.
+
+        Returns:
+            dict: The snapshot of histogram in seconds with the name of stage as key. Please refer
+                `LatencyHistogram.get_snapshot`. The keys are the stages which have run, `restore` for
+                restoring the size of subsample, and `total` for the whole chain.
+        """
+        return {
+            name: histogram.get_snapshot()
+            for name, histogram in self.__histograms.items()
+        }
+
+    def reset_statistics(self):
+        self.__histograms = {}
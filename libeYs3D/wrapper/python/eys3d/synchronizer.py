@@ -0,0 +1,335 @@
+import bisect
+import collections
+import threading
+
+import numpy as np
+
+from eys3d import logger
+
+__all__ = ["FrameSynchronizer", "SyncedFrameSet"]
+
+
+class SyncedFrameSet:
+    """The frames of streams and the IMU data matched at one timestamp.
+
+    Args:
+        ts (int): The timestamp(microsec) of reference frame.
+        frames (dict): The frames by the name of stream.
+        imu_data (np.array): The IMU data interpolated at ts. It is None if IMU is not synchronized or not available.
+    """
+    def __init__(self, ts, frames, imu_data=None):
+        self.__ts = ts
+        self.__frames = frames
+        self.__imu_data = imu_data
+
+    def get_timestamp(self):
+        return self.__ts
+
+    def get_frame(self, name):
+        return self.__frames.get(name)
+
+    def get_frames(self):
+        return dict(self.__frames)
+
+    def get_color_frame(self):
+        return self.__frames.get("color")
+
+    def get_depth_frame(self):
+        return self.__frames.get("depth")
+
+    def get_pc_frame(self):
+        return self.__frames.get("pc")
+
+    def get_imu_data(self):
+        return self.__imu_data
+
+
+class FrameSynchronizer:
+    """This class matches the frames of streams by their hardware timestamps.
+
+    `FrameSetPipeline` matches color and depth by serial number in native code, which adds latency.
+    This class matches the frames of any streams, e.g. from `Pipeline` or the callbacks of device,
+    by `tsUs` in Python. Each stream has a ring buffer. The oldest frame of reference stream
+    is matched with the nearest frame of each other stream within tolerance.
+    The tolerance should be less than half of frame interval, then at most one frame of a stream is in the window
+    and the frame set is emitted as soon as all of its frames arrive.
+    The reference frame is missed if a stream has passed its window without a frame in it.
+
+    The IMU samples are interpolated linearly to the timestamp of reference frame,
+    so the frame set waits for the first IMU sample after it.
+
+    Example:
+        sync = FrameSynchronizer(("color", "depth"), tolerance_us=5000)
+        pipe.start(conf)
+        while True:
+            sync.poll(pipe)
+            ret, frameset = sync.get(timeout=0.1)
+            if ret:
+                cframe, dframe = frameset.get_color_frame(), frameset.get_depth_frame()
+
+    Args:
+        streams (tuple): The names of streams, e.g. `color`, `depth` and `pc`. Default is (`color`, `depth`).
+        reference (str): The name of reference stream. Default is `depth` if in streams, otherwise the first.
+        tolerance_us (int): The maximum difference of timestamps in microseconds. Default is 5000.
+        capacity (int): The size of ring buffer of each stream, and of the matched frame sets. Default is 8.
+        imu (bool): True to synchronize the IMU samples pushed by `push_imu`. Default is False.
+        imu_capacity (int): The size of buffer of IMU samples. Default is 1024.
+        callback (function): The function called with each SyncedFrameSet. It is called on the thread pushing
+            the last frame of set. The frame sets are kept for `get` if None.
+    """
+    def __init__(self,
+                 streams=("color", "depth"),
+                 reference=None,
+                 tolerance_us=5000,
+                 capacity=8,
+                 imu=False,
+                 imu_capacity=1024,
+                 callback=None):
+        if not streams or len(set(streams)) != len(streams):
+            raise ValueError("The streams should be unique and not empty.")
+        if reference is None:
+            reference = "depth" if "depth" in streams else streams[0]
+        if reference not in streams:
+            raise ValueError("The reference {} is not in streams.".format(
+                reference))
+        if tolerance_us < 0 or capacity <= 0 or imu_capacity < 2:
+            raise ValueError(
+                "The tolerance, capacity or imu_capacity is invalid.")
+        self.__streams = tuple(streams)
+        self.__reference = reference
+        self.__others = tuple(name for name in streams if name != reference)
+        self.__tolerance = tolerance_us
+        self.__capacity = capacity
+        self.__imu = imu
+        self.__imu_capacity = imu_capacity
+        self.__callback = callback
+
+        self.__lock = threading.Lock()
+        self.__buffers = dict((name, collections.deque()) for name in streams)
+        self.__imu_ts = []
+        self.__imu_values = []
+        self.__framesets = collections.deque(maxlen=capacity)
+        self.__ready = threading.Condition()
+
+        self.__received = dict.fromkeys(streams, 0)
+        self.__dropped = dict.fromkeys(streams, 0)
+        self.__matched_count = 0
+        self.__missed_count = 0
+        self.__imu_received_count = 0
+        self.__imu_missed_count = 0
+
+    def push(self, name, frame, ts=None):
+        """Push the frame of stream.
+
+        Args:
+            name (str): The name of stream.
+            frame (obj): The frame, e.g. eys3dPy.Frame or PCFrame.
+            ts (int): The timestamp(microsec) of frame. It is `frame.get_timestamp()` if None.
+        """
+        if ts is None:
+            ts = frame.get_timestamp()
+        with self.__lock:
+            buffer = self.__buffers[name]
+            self.__received[name] += 1
+            if buffer and ts <= buffer[-1][0]:
+                self.__dropped[name] += 1  # Out of order
+                return
+            if len(buffer) >= self.__capacity and name != self.__reference:
+                buffer.popleft()
+                self.__dropped[name] += 1
+            buffer.append((ts, frame))
+            framesets = self.__match()
+        self.__emit(framesets)
+
+    def push_color_frame(self, frame):
+        self.push("color", frame)
+
+    def push_depth_frame(self, frame):
+        self.push("depth", frame)
+
+    def push_pc_frame(self, pcframe):
+        self.push("pc", pcframe)
+
+    def push_imu(self, ts, values):
+        """Push the IMU sample.
+
+        Args:
+            ts (int): The timestamp(microsec) of sample.
+            values (array): The values of sample, e.g. acceleration and angular velocity.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        with self.__lock:
+            self.__imu_received_count += 1
+            if self.__imu_ts and ts <= self.__imu_ts[-1]:
+                return
+            self.__imu_ts.append(ts)
+            self.__imu_values.append(values)
+            if len(self.__imu_ts) > self.__imu_capacity:
+                del self.__imu_ts[0], self.__imu_values[0]
+            framesets = self.__match()
+        self.__emit(framesets)
+
+    def poll(self, pipeline):
+        """Push the frames in queues of pipeline without waiting.
+
+        Args:
+            pipeline (obj): The class Pipeline.
+
+        Returns:
+            int: The number of frames pushed.
+        """
+        getters = {
+            "color": pipeline.get_color_frame,
+            "depth": pipeline.get_depth_frame
+        }
+        count = 0
+        for name in self.__streams:
+            get_frame = getters.get(name)
+            while get_frame is not None:
+                ret, frame = get_frame()
+                if not ret:
+                    break
+                self.push(name, frame)
+                count += 1
+        return count
+
+    def get(self, timeout=None):
+        """Get the oldest matched frame set.
+
+        Args:
+            timeout (float): The maximun of time in seconds to wait. It does not wait if 0, and waits forever if None.
+
+        Returns:
+            bool : The return value is to mean the frame set is ready or not.
+            obj : The class SyncedFrameSet.
+        """
+        with self.__ready:
+            if not self.__ready.wait_for(lambda: self.__framesets, timeout):
+                return False, None
+            return True, self.__framesets.popleft()
+
+    def get_statistics(self):
+        """Get the statistics of synchronizer.
+
+        Returns:
+            dict: The statistics. The key is following:
+                * matched: The number of frame sets matched.
+                * missed: The number of reference frames without a match.
+                * miss_rate: The ratio of missed to the reference frames decided.
+                * received: The number of frames received by stream.
+                * dropped: The number of frames of other streams not used by any set, by stream.
+                * imu_received: The number of IMU samples received.
+                * imu_missed: The number of frame sets without IMU data, if IMU is synchronized.
+        """
+        with self.__lock:
+            decided = self.__matched_count + self.__missed_count
+            return {
+                'matched': self.__matched_count,
+                'missed': self.__missed_count,
+                'miss_rate': self.__missed_count / decided if decided else 0.0,
+                'received': dict(self.__received),
+                'dropped': dict(self.__dropped),
+                'imu_received': self.__imu_received_count,
+                'imu_missed': self.__imu_missed_count,
+            }
+
+    def reset(self):
+        """Clear the buffers and the matched frame sets."""
+        with self.__lock:
+            for buffer in self.__buffers.values():
+                buffer.clear()
+            del self.__imu_ts[:], self.__imu_values[:]
+        with self.__ready:
+            self.__framesets.clear()
+
+    def __match(self):
+        framesets = []
+        reference = self.__buffers[self.__reference]
+        while reference:
+            (ts, frame) = reference[0]
+            full = len(reference) >= self.__capacity
+            frames = {self.__reference: frame}
+            indexes = {}
+            missed = waiting = False
+            for name in self.__others:
+                index = self.__find(self.__buffers[name], ts)
+                if index is not None:
+                    indexes[name] = index
+                elif self.__buffers[name] and self.__buffers[name][-1][
+                        0] > ts + self.__tolerance:
+                    missed = True  # The stream has passed the window.
+                    break
+                else:
+                    waiting = True
+            if not missed and waiting:
+                if not full:
+                    break
+                missed = True  # The other stream is stalled.
+            imu_data = None
+            if not missed and self.__imu:
+                if (not self.__imu_ts or self.__imu_ts[-1] < ts) and not full:
+                    break
+                imu_data = self.__interpolate_imu(ts)
+                self.__imu_missed_count += imu_data is None
+            reference.popleft()
+            if missed:
+                self.__missed_count += 1
+            else:
+                for name, index in indexes.items():
+                    buffer = self.__buffers[name]
+                    self.__dropped[name] += index
+                    for _ in range(index):
+                        buffer.popleft()
+                    frames[name] = buffer.popleft()[1]
+                self.__matched_count += 1
+                framesets.append(SyncedFrameSet(ts, frames, imu_data))
+            # The frames before the window of next reference frame could not be matched.
+            for name in self.__others:
+                buffer = self.__buffers[name]
+                while buffer and buffer[0][0] < ts - self.__tolerance:
+                    buffer.popleft()
+                    self.__dropped[name] += 1
+        return framesets
+
+    def __find(self, buffer, ts):
+        # The index of nearest frame within tolerance.
+        best = None
+        for index, (frame_ts, _) in enumerate(buffer):
+            difference = abs(frame_ts - ts)
+            if difference <= self.__tolerance and (
+                    best is None or difference < best[0]):
+                best = (difference, index)
+            elif frame_ts > ts + self.__tolerance:
+                break
+        return None if best is None else best[1]
+
+    def __interpolate_imu(self, ts):
+        index = bisect.bisect_left(self.__imu_ts, ts)
+        if index == len(self.__imu_ts) or (index == 0
+                                           and self.__imu_ts[0] != ts):
+            return None
+        # Keep one sample before ts for the next frame set.
+        start = max(index - 1, 0)
+        del self.__imu_ts[:start], self.__imu_values[:start]
+        index -= start
+        (ts1, values1) = (self.__imu_ts[index], self.__imu_values[index])
+        if ts1 == ts:
+            return values1.copy()
+        (ts0, values0) = (self.__imu_ts[index - 1],
+                          self.__imu_values[index - 1])
+        weight = (ts - ts0) / float(ts1 - ts0)
+        return values0 + (values1 - values0) * weight
+
+    def __emit(self, framesets):
+        if not framesets:
+            return
+        if self.__callback is not None:
+            for frameset in framesets:
+                try:
+                    self.__callback(frameset)
+                except Exception:
+                    logger.exception("The callback of synchronizer is failed.")
+            return
+        with self.__ready:
+            self.__framesets.extend(framesets)
+            self.__ready.notify_all()
@@ -6,13 +6,19 @@ export PYTHONPATH=$VENDOR_SDK_ROOT/libeYs3D/out:$PYTHONPATH
 
 if [ $1 = 8062 ] 
 then
+	export EYS3D_BACKEND=native
 	TEST_FILE="test/test_eYs3DLib_8062.py"
 elif [ $1 = 8053 ]
 then
+	export EYS3D_BACKEND=native
 	TEST_FILE="test/test_eYs3DLib_8053.py"
+elif [ $1 = sim ]
+then
+	export EYS3D_BACKEND=sim
+	TEST_FILE="test/ --ignore=test/test_eYs3DLib_8053.py --ignore=test/test_eYs3DLib_8062.py"
 else
-	echo "Please input module (8053/8062) "
+	echo "Please input module (8053/8062/sim) "
 	exit
 fi
 
-sudo --preserve-env=PYTHONPATH $PYTHON_EXECUTE -m pytest $TEST_FILE
+sudo --preserve-env=PYTHONPATH,EYS3D_BACKEND $PYTHON_EXECUTE -m pytest $TEST_FILE
@@ -28,6 +28,8 @@ import os
 import cv2
 
 from eys3d import Pipeline, logger
+from eys3d.depth import roi_stats
+from eys3d.dump_service import get_dump_service
 
 # For depth-roi calculated
 x = y = 0
@@ -143,16 +145,17 @@ def cv_sample(device, config):
                     logger.info("Disable exposure")
                     camera_property.disable_AE()
                 status = 'play'
+            # The dumps are written in background, so the preview is not stalled.
             if status == 'snapshot':
-                device.do_snapshot()
+                get_dump_service().do_snapshot(device)
                 logger.info(status)
                 status = 'play'
             if status == 'dump_frame_info':
-                device.dump_frame_info()
+                get_dump_service().dump_frame_info(device)
                 logger.info(status)
                 status = 'play'
             if status == 'dump_imu_data':
-                device.dump_IMU_data()
+                get_dump_service().dump_IMU_data(device)
                 logger.info(status)
                 status = 'play'
             if status == 'dump_system_info':
@@ -161,8 +164,8 @@ def cv_sample(device, config):
                 status = 'play'
             if status == 'get_rectify_log':
                 rectify_log = device.get_rectify_mat_log_data()
-                rectify_log.save_json()
-                logger.info("Saved rectify log as json")
+                get_dump_service().save_rectify_log(rectify_log).add_done_callback(
+                    lambda future: logger.info("Saved rectify log as json"))
                 status = 'play'
             if status == 'dump_camera_properties':
                 device.dump_camera_device_properties()
@@ -236,36 +239,8 @@ def cv_sample(device, config):
 
 
 def calculate_roi(x, y, w, h, depth_roi, z_map):
-    if depth_roi > 1:
-        roi_x = max(x - depth_roi / 2.0, 0)
-        roi_y = max(y - depth_roi / 2.0, 0)
-        roi_x2 = roi_x + depth_roi
-        roi_y2 = roi_y + depth_roi
-
-        if roi_x2 > w:
-            roi_x2 = w
-            roi_x = roi_x2 - depth_roi
-        if roi_y2 > h:
-            roi_y2 = h
-            roi_y = roi_y2 - depth_roi
-
-        depth_roi_sum = 0
-        depth_roi_count = 0
-
-        for y_ in range(int(roi_y), int(roi_y2)):
-            for x_ in range(int(roi_x), int(roi_x2)):
-                z_value = z_map[y_][x_]
-                if z_value:
-                    depth_roi_sum += z_value
-                    depth_roi_count += 1
-        if depth_roi_count:
-            z_value = depth_roi_sum / depth_roi_count
-        else:
-            z_value = 0
-    else:
-        z_value = z_map[y][x]
-
-    return z_value
+    # The mean of z value in ROI without the pixels of no depth.
+    return roi_stats(z_map, (x, y), depth_roi)['mean']
 
 
 def depth_roi_callback(event, x_, y_, flag, param):
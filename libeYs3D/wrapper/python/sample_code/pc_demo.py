@@ -36,7 +36,7 @@ import math
 import threading
 import cv2
 
-from eys3d import Pipeline, Config, logger
+from eys3d import Pipeline, Config, LatestValueBuffer, logger
 
 xLen = 1280
 yLen = 720
@@ -52,7 +52,8 @@ bMMov = False
 mIn = [None] * 2
 mOut = [None] * 2
 
-lock = threading.Lock()
+# The callback publishes the buffers of the latest frame and the render loop takes them without locking.
+pc_buffer = LatestValueBuffer()
 DURATION = 100.0  # For PC fps
 timestamp = count = 0  # For PC fps
 point_cloud_viewer_format = 0  # For PC format
@@ -60,18 +61,6 @@ point_cloud_viewer_format = 0  # For PC format
 # Flag defined
 flag = {"filter": True}  #ply filter
 
-def my_try_lock(lock,timeout):
-    count = 0
-    success = False
-    while count < timeout and not success:
-        success = lock.acquire(False)
-        """logger.info("[Python] success: {}".format(success))"""
-        if success:
-            break
-        count = count + 1
-    return success
-
-
 def SetRot():
     xDif = mOut[0] - mIn[0]
     yDif = mOut[1] - mIn[1]
@@ -204,9 +193,11 @@ def MoveMouse(window, x, y):
 
 
 def DrawPCloud(config):
-    global aXyz, aRgb, pcframe, pc
+    _, buffers = pc_buffer.get()
+    if buffers is None:
+        return
+    (aXyz, aRgb, dRgb) = buffers
     try:
-        lock.acquire()
         glEnableClientState(GL_VERTEX_ARRAY)
         glVertexPointer(3, GL_FLOAT, 0, aXyz)
 
@@ -226,9 +217,7 @@ def DrawPCloud(config):
         glDrawArrays(GL_POINTS, 0, ptLen)
         glDisableClientState(GL_VERTEX_ARRAY)
         glDisableClientState(GL_COLOR_ARRAY)
-        lock.release()
     except:
-        lock.release()
         pass
 
 
@@ -262,7 +251,7 @@ def pc_frame_callback(pcframe):
         get_xyz_data (numpy array)  : The xyz data of this frame. The size is (H * W * 3).
         get_transcoding_time (int)  : For performance benchmark purpose in micro seconds.
     """
-    global aXyz, aRgb, count, timestamp, dRgb
+    global count, timestamp
     
     # For calculating PC callback fps
     if (count % DURATION) == 0:
@@ -272,16 +261,9 @@ def pc_frame_callback(pcframe):
             timestamp = pcframe.get_timestamp()
     count += 1
     
-            
-    if my_try_lock(lock, 1) == False:
-        return
-    """lock.acquire()"""
-    aXyz = pcframe.get_xyz_data()
-    aRgb = pcframe.get_rgb_data()
-    dRgb = pcframe.get_drgb_data()
-
 
-    lock.release()
+    pc_buffer.publish((pcframe.get_xyz_data(), pcframe.get_rgb_data(),
+                       pcframe.get_drgb_data()))
 
 
 def pc_sample(device, config):
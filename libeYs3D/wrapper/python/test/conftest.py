@@ -0,0 +1,5 @@
+import os
+
+# The tests run on the simulator if no backend is specified, e.g. without camera module.
+# The tests of camera module are run with EYS3D_BACKEND=native. Please refer run_pytest.sh.
+os.environ.setdefault("EYS3D_BACKEND", "sim")
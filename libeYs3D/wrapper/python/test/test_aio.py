@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+import eys3d
+from eys3d import aio
+
+
+def get_config(mode=1):
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, mode, 3)
+    return conf
+
+
+def test_next_frames():
+    pipe = eys3d.Pipeline(backend="sim")
+    pipe.start(get_config())
+
+    async def run():
+        return await asyncio.gather(pipe.next_color_frame(),
+                                    pipe.next_depth_frame())
+
+    (cret, cframe), (dret, dframe) = asyncio.run(run())
+    pipe.stop()
+    assert cret and dret
+    assert 1280 == cframe.get_width() == dframe.get_width()
+
+
+def test_timeout():
+    pipe = eys3d.Pipeline(backend="sim")
+    pipe.start(get_config(mode=4))  # Depth only
+
+    async def run():
+        return await pipe.next_color_frame(timeout=50)
+
+    assert (False, None) == asyncio.run(run())
+    pipe.stop()
+
+
+def test_frames_until_stop():
+    pipe = eys3d.Pipeline(backend="sim")
+    pipe.start(get_config())
+
+    async def run():
+        pairs = []
+        async for (cframe, dframe) in pipe.frames():
+            pairs.append((cframe, dframe))
+            if len(pairs) == 3:
+                pipe.stop()
+        return pairs
+
+    pairs = asyncio.run(run())
+    assert 3 == len(pairs)
+    assert all(cframe is not None and dframe is not None
+               for cframe, dframe in pairs)
+
+
+def test_frameset_frames():
+    pipe = eys3d.FrameSetPipeline(backend="sim")
+    pipe.start(get_config())
+
+    async def run():
+        serial_numbers = []
+        async for frameset in pipe.frames():
+            serial_numbers.append(frameset.depth_frame.get_serial_number())
+            if len(serial_numbers) == 3:
+                pipe.stop()
+        return serial_numbers
+
+    serial_numbers = asyncio.run(run())
+    assert serial_numbers == sorted(set(serial_numbers))
+
+
+def test_frames_without_start():
+    async def run(frames):
+        async for _ in frames:
+            pass
+
+    with pytest.raises(Exception, match="not started"):
+        asyncio.run(run(eys3d.Pipeline(backend="sim").frames()))
+    with pytest.raises(Exception, match="not started"):
+        asyncio.run(run(eys3d.FrameSetPipeline(backend="sim").frames()))
+
+
+def test_executor_grows_with_streams():
+    pipes = [eys3d.Pipeline(backend="sim") for _ in range(5)]
+    for pipe in pipes:
+        pipe.start(get_config())
+    # The 10 streams are waited at the same time, more than the default 8 workers.
+    assert 10 <= aio.get_executor()._max_workers
+
+    async def run():
+        return await asyncio.gather(
+            *[pipe.next_depth_frame() for pipe in pipes],
+            *[pipe.next_color_frame() for pipe in pipes])
+
+    results = asyncio.run(run())
+    for pipe in pipes:
+        pipe.stop()
+    assert all(ret for ret, _ in results)
+
+
+def test_failed_wait():
+    pipe = eys3d.FrameSetPipeline(backend="sim")
+
+    async def run():
+        # The waits raise before start, and return None from logger.catch.
+        return await asyncio.gather(pipe.next_frameset(),
+                                    eys3d.Pipeline(backend="sim").next_color_frame())
+
+    assert [(False, None), (False, None)] == asyncio.run(run())
@@ -0,0 +1,177 @@
+import pytest
+
+import eys3d
+from eys3d import simulator
+from eys3d.bandwidth import (BandwidthController, estimate_bandwidth,
+                             estimate_config_bandwidth,
+                             estimate_mode_bandwidth, get_host_controller,
+                             get_usb_capacity, rank_modes)
+
+
+def test_estimate_bandwidth():
+    estimation = estimate_bandwidth((1280, 720), (640, 360), 30)
+    assert 1280 * 720 * 2 * 30 == estimation['color']
+    assert 640 * 360 * 2 * 30 == estimation['depth']
+    assert estimation['color'] + estimation['depth'] == estimation['total']
+    mjpg = estimate_bandwidth((1280, 720), (0, 0), 30, color_mjpg=True)
+    assert mjpg['total'] < estimation['color'] / 4
+    assert 640 * 360 * 30 == estimate_bandwidth((0, 0), (640, 360), 30,
+                                                depth_bits=8)['total']
+    interleave = estimate_bandwidth((1280, 720), (640, 360), 30,
+                                    interleave=True)
+    assert 15 == interleave['fps']
+    assert estimation['total'] / 2 == interleave['total']
+
+
+def test_estimate_mode_bandwidth():
+    catalog = eys3d.get_mode_catalog(0x162, 3)
+    assert estimate_mode_bandwidth(catalog.get_mode(2))['interleave']
+    assert not estimate_mode_bandwidth(catalog.get_mode(1))['interleave']
+    assert 1280 * 720 * 2 * 30 == estimate_mode_bandwidth(
+        catalog.get_mode(5))['total']
+
+
+def test_rank_modes():
+    indexes = [c['index'] for c in rank_modes(0x162, 3)]
+    assert [1, 4, 3, 2, 5] == indexes
+    for candidate in rank_modes(0x162, 2):
+        assert candidate['bandwidth']['total'] <= get_usb_capacity(2)
+    assert [1, 4] == [c['index'] for c in rank_modes(0x162, 3, min_fps=60)]
+    assert [1, 3, 2] == [
+        c['index'] for c in rank_modes(0x162, 3, need_color=True)
+    ]
+    assert [] == rank_modes(0x162, 3, min_depth_res=(1920, 1080))
+    assert [] == rank_modes(0x162, 3, depth_bits=8)
+
+
+@pytest.mark.parametrize("usb_type, kwargs, index, fps", [
+    (3, {}, 1, 60),
+    (3, {'bandwidth_budget': 100 * 1000000}, 5, 30),
+    (2, {'need_color': True}, 6, 30),
+    (2, {'min_depth_res': (1280, 720)}, 7, 10),
+])
+def test_best_mode(usb_type, kwargs, index, fps):
+    conf = eys3d.Config()
+    ret, best = conf.best_mode(0x162, usb_type, **kwargs)
+    assert ret
+    assert index == best['index']
+    preset = eys3d.Config()
+    preset.set_preset_mode_config(0x162, index, usb_type)
+    assert preset.get_config() == conf.get_config()
+    assert fps == conf.get_config()['actualFps']
+
+
+def test_best_mode_depth_bits():
+    conf = eys3d.Config()
+    ret, best = conf.best_mode(0x162, 3, depth_bits=14, need_color=True)
+    assert ret and 14 == best['depth_bits']
+    assert 14 == simulator.get_depth_bits(conf.get_config()['depthFormat'])
+    assert (False, None) == conf.best_mode(0x162, 3, min_fps=90)
+    assert 14 == simulator.get_depth_bits(conf.get_config()['depthFormat'])
+
+
+def test_estimate_config_bandwidth():
+    for index in (1, 2, 4):
+        mode_info = eys3d.get_mode_catalog(0x162, 3).get_mode(index)
+        conf = eys3d.Config()
+        conf.set_preset_mode_config(0x162, index, 3)
+        assert estimate_mode_bandwidth(mode_info) == estimate_config_bandwidth(conf)
+
+
+def test_host_controller():
+    assert "usb-0000:00:14.0" == get_host_controller("usb-0000:00:14.0-2.1")
+    assert "sim" == get_host_controller("sim:1")
+
+
+def get_config(mode, usb_type=3):
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, mode, usb_type)
+    return conf
+
+
+def test_pipeline_refused():
+    controller = BandwidthController(BandwidthController.REFUSE,
+                                     capacity={2: 1, 3: 100 * 1000000})
+    pipe = eys3d.Pipeline(backend="sim", bandwidth_controller=controller)
+    assert not pipe.start(get_config(1))
+    report = pipe.get_bandwidth_report()
+    assert 60 == report['fps']
+    assert 100 * 1000000 == report['available']
+    assert 60 * 100 * 1000000 / report['bandwidth']['total'] == pytest.approx(
+        report['sustainable_fps'])
+    assert {} == controller.get_usage()
+    assert 1 == controller.get_statistics()['refused']
+
+    assert pipe.start(get_config(5))
+    assert pipe.wait_depth_frame()[0]
+    assert 1 == controller.get_statistics()['devices']
+    pipe.stop()
+    assert {} == controller.get_usage()
+
+
+def test_pipeline_downgraded():
+    controller = BandwidthController(BandwidthController.DOWNGRADE,
+                                     capacity={2: 1, 3: 150 * 1000000})
+    conf = get_config(1)
+    expected = conf.get_config()
+    pipe = eys3d.Pipeline(backend="sim", bandwidth_controller=controller)
+    assert pipe.start(conf)
+    report = pipe.get_bandwidth_report()
+    ret, dframe = pipe.wait_depth_frame()
+    pipe.stop()
+    # The given config is kept, and the device is opened with the downgraded copy.
+    assert expected == conf.get_config()
+    assert report['config'] is not conf
+    assert 3 == report['downgraded']
+    assert (60, 30) == (expected['actualFps'], report['fps'])
+    assert report['bandwidth']['total'] <= report['available']
+    (height, width) = report['config'].get_depth_stream_resolution()
+    assert ret and (height, width) == (dframe.get_height(),
+                                       dframe.get_width())
+
+
+def start_multi_camera(policy):
+    pipe = eys3d.MultiCameraPipeline(backend="sim", bandwidth_policy=policy)
+    conf = get_config(1)
+    expected = conf.get_config()
+    pipe.start(conf)
+    reports = dict((index, p.get_bandwidth_report())
+                   for index, p in pipe.get_pipelines().items())
+    assert expected == conf.get_config()  # The shared config is not downgraded.
+    return pipe, reports
+
+
+@pytest.mark.parametrize("policy", [
+    BandwidthController.WARN, BandwidthController.REFUSE,
+    BandwidthController.DOWNGRADE
+])
+def test_multi_camera_admission(policy):
+    simulator.configure(device_count=2)
+    try:
+        pipe, reports = start_multi_camera(policy)
+        controller = pipe.get_bandwidth_controller()
+        usage = controller.get_usage()
+        indexes = set()
+        for _ in range(10):
+            ret, index, _ = pipe.wait_frameset()
+            indexes.add(index)
+        pipe.stop()
+    finally:
+        simulator.configure(device_count=1)
+    assert None is reports[0]['downgraded']
+    assert 60 == reports[0]['sustainable_fps']
+    assert 60 > reports[1]['sustainable_fps']
+    (bus, bus_usage), = usage.items()
+    assert ("sim", 3) == bus
+    if policy == BandwidthController.WARN:
+        assert {0, 1} == indexes
+        assert bus_usage['used'] > bus_usage['capacity']
+    elif policy == BandwidthController.REFUSE:
+        assert {0} == indexes
+        assert 1 == len(bus_usage['devices'])
+    else:
+        assert {0, 1} == indexes
+        assert 3 == reports[1]['downgraded']
+        assert bus_usage['used'] <= bus_usage['capacity']
+        assert 1 == controller.get_statistics()['downgraded']
+    assert {} == controller.get_usage()
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import eys3d
+from eys3d import CallbackDispatcher, simulator
+from eys3d.histogram import LatencyHistogram
+
+
+class Item:
+    def __init__(self, serial_number):
+        self.serial_number = serial_number
+
+    def get_serial_number(self):
+        return self.serial_number
+
+
+def test_histogram():
+    histogram = LatencyHistogram(bounds=(0.001, 0.01, 0.1))
+    for seconds in (0.0005, 0.005, 0.005, 0.05, 0.5):
+        histogram.record(seconds)
+    snapshot = histogram.get_snapshot()
+    assert [1, 2, 1, 1] == snapshot['counts']
+    assert 5 == snapshot['count']
+    assert 0.01 == snapshot['p50']
+    assert 0.5 == snapshot['p99']
+
+
+def test_order():
+    got = []
+    with CallbackDispatcher(workers=4, policy=CallbackDispatcher.BLOCK) as dispatcher:
+        callback = dispatcher.wrap(lambda item: got.append(item.serial_number),
+                                   "depth")
+        for serial_number in range(1, 201):
+            callback(Item(serial_number))
+        callback(Item(10))  # Stale
+        assert dispatcher.join(timeout=2)
+    assert list(range(1, 201)) == got
+    stats = dispatcher.get_statistics()['depth']
+    assert 201 == stats['received']
+    assert 200 == stats['completed']
+    assert 1 == stats['stale']
+    assert 200 == stats['latency']['count']
+
+
+def test_copy():
+    frame = simulator.Frame(4, 1)
+    frame.serialNumber = 1
+    got = []
+    release = threading.Event()
+
+    def on_frame(item):
+        release.wait()
+        got.append(item.get_data().tolist())
+
+    for copy, expected in ((True, [1] * 4), (False, [9] * 4)):
+        got.clear()
+        release.clear()
+        with CallbackDispatcher(copy=copy) as dispatcher:
+            dispatcher.wrap(on_frame, "depth")(frame)
+            # The producer reuses the buffer after the callback returns.
+            frame.get_data()[:] = 9
+            release.set()
+        assert [expected] == got
+        frame.get_data()[:] = 1
+
+
+def test_drop_policy():
+    for policy, expected in ((CallbackDispatcher.DROP_OLDEST, [1, 5, 6]),
+                             (CallbackDispatcher.DROP_NEWEST, [1, 2, 3])):
+        release = threading.Event()
+        got = []
+
+        def slow(item):
+            release.wait()
+            got.append(item.serial_number)
+
+        dispatcher = CallbackDispatcher(workers=1, capacity=2, policy=policy)
+        callback = dispatcher.wrap(slow, "color")
+        callback(Item(1))
+        time.sleep(0.05)  # The first item is being called.
+        for serial_number in range(2, 7):
+            callback(Item(serial_number))
+        release.set()
+        dispatcher.shutdown()
+        assert expected == got
+        assert 3 == dispatcher.get_statistics()['color']['dropped']
+
+
+def test_failed_callback():
+    with CallbackDispatcher() as dispatcher:
+        dispatcher.wrap(lambda item: 1 / 0, "pc")(Item(1))
+    assert 1 == dispatcher.get_statistics()['pc']['failed']
+
+
+def test_dispatch_after_executor_shutdown():
+    dispatcher = CallbackDispatcher()
+    callback = dispatcher.wrap(lambda item: None, "depth")
+    # The frame comes between the check of closed and the shutdown of workers.
+    dispatcher._CallbackDispatcher__executor.shutdown(wait=False)
+    callback(Item(1))
+    assert dispatcher.join(timeout=1)
+    statistics = dispatcher.get_statistics()['depth']
+    assert (1, 0, 0) == (statistics['dropped'], statistics['completed'],
+                         statistics['queued'])
+    dispatcher.shutdown()
+
+
+def test_device_callbacks():
+    thread_names = set()
+    serial_numbers = []
+
+    def on_depth(frame):
+        thread_names.add(threading.current_thread().name)
+        serial_numbers.append(frame.get_serial_number())
+
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 1, 3)
+    dev = eys3d.Device(backend="sim")
+    dispatcher = CallbackDispatcher()
+    dev.open_device(conf, depthFrameCallback=on_depth, dispatcher=dispatcher)
+    dev.enable_stream()
+    time.sleep(0.3)
+    dev.close_stream()
+    dispatcher.shutdown()
+    assert serial_numbers and serial_numbers == sorted(serial_numbers)
+    assert all(name.startswith("eys3d-callback") for name in thread_names)
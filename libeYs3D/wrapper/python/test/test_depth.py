@@ -0,0 +1,169 @@
+import numpy as np
+import pytest
+
+import eys3d
+from eys3d import depth, simulator
+
+
+def make_z_map():
+    z_map = np.arange(1, 48 * 64 + 1, dtype=np.uint16).reshape(48, 64)
+    z_map[10:20, 10:20] = 0
+    return z_map
+
+
+def test_roi_stats():
+    z_map = make_z_map()
+    stats = depth.roi_stats(z_map, (30, 30), 10)
+    roi = z_map[25:35, 25:35].astype(np.float64)
+    assert (25, 25, 35, 35) == stats['bounds']
+    assert 100 == stats['valid_count'] == stats['count']
+    assert roi.mean() == stats['mean']
+    assert np.median(roi) == stats['median']
+    assert roi.std() == stats['stddev']
+    assert (roi.min(), roi.max()) == (stats['min'], stats['max'])
+
+
+def test_roi_stats_without_depth():
+    stats = depth.roi_stats(make_z_map(), (15, 15), 10)
+    assert 0 == stats['valid_count']
+    assert 0.0 == stats['mean']
+
+
+def test_roi_stats_on_border():
+    z_map = make_z_map()
+    stats = depth.roi_stats(z_map, (63, 0), (8, 4))
+    assert (56, 0, 64, 4) == stats['bounds']
+    assert z_map[0:4, 56:64].mean() == stats['mean']
+
+
+def test_roi_stats_on_flat_buffer():
+    z_map = make_z_map()
+    flat = z_map.reshape(-1)
+    assert np.shares_memory(flat, depth.as_z_map(flat, z_map.shape))
+    assert depth.roi_stats(z_map, (40, 8), 5) == depth.roi_stats(
+        flat, (40, 8), 5, shape=z_map.shape)
+
+
+def test_depth_integral():
+    z_map = make_z_map()
+    integral = depth.DepthIntegral(z_map)
+    boxes = np.array([[0, 0, 64, 48], [5, 5, 25, 25], [10, 10, 20, 20],
+                      [60, 40, 80, 80]])
+    stats = integral.box_stats(boxes)
+    for i, (x1, y1, x2, y2) in enumerate(boxes):
+        roi = z_map[y1:y2, x1:x2]
+        valid = roi[roi > 0].astype(np.float64)
+        assert valid.size == stats['valid_count'][i]
+        assert roi.size == stats['count'][i]
+        assert np.isclose(valid.mean() if valid.size else 0, stats['mean'][i])
+        assert np.isclose(valid.std() if valid.size else 0,
+                          stats['stddev'][i])
+    single = integral.roi_stats((30, 30), 10)
+    assert np.isclose(depth.roi_stats(z_map, (30, 30), 10)['mean'],
+                      single['mean'])
+
+
+def test_integral_image_cache():
+    cache = depth.IntegralImageCache(capacity=2)
+    z_map = make_z_map()
+    first = cache.get(z_map, serial_number=1)
+    assert first is cache.get(z_map, serial_number=1)
+    cache.get(z_map, serial_number=2)
+    cache.get(z_map, serial_number=3)
+    assert first is not cache.get(z_map, serial_number=1)  # Evicted.
+
+
+def test_depth_data_type():
+    assert (11, 2, True, False, False) == depth.get_depth_data_type(4)
+    assert (14, 2, False, True, False) == depth.get_depth_data_type(7 + 16)
+    assert (8, 1, True, False, True) == depth.get_depth_data_type(1 + 32)
+    assert (8, 2, False, False, False) == depth.get_depth_data_type(8)
+    with pytest.raises(ValueError):
+        depth.get_depth_data_type(10)
+
+
+def test_raw_to_z():
+    zd_table = np.arange(2048, dtype=np.uint16) * 3
+    raw = np.array([[0, 1, 2047], [0x0800 | 5, 7, 9]], dtype=np.uint16)
+    assert [[0, 3, 6141], [15, 21, 27]] == depth.raw_to_z(raw, zd_table).tolist()
+    # The 8 bits disparity is scaled to the index of 11 bits ZD table.
+    raw8 = np.array([[1, 255]], dtype=np.uint8)
+    assert [[24, 6120]] == depth.raw_to_z(raw8, zd_table, 6).tolist()
+    assert [[3, 765]] == depth.raw_to_z(raw8, zd_table[:256], 6).tolist()
+    # The 8 bits x80 uses the low byte of 2 bytes.
+    x80 = np.array([[0x8001]], dtype=np.uint16)
+    assert [[24]] == depth.raw_to_z(x80, zd_table, 3 + 16).tolist()
+    # The 14 bits is z value.
+    raw14 = np.array([[1000, 0xC000 | 2000]], dtype=np.uint16)
+    assert [[1000, 2000]] == depth.raw_to_z(raw14, zd_table, 2).tolist()
+    out = np.empty((2, 3), dtype=np.uint16)
+    assert out is depth.raw_to_z(raw, zd_table, 4, out=out)
+
+
+def test_zd_table_from_bytes():
+    assert [0x0102, 0xFF00] == depth.zd_table_from_bytes(
+        bytes([1, 2, 0xFF, 0])).tolist()
+
+
+def test_zd_table_of_frame():
+    # The binding without CameraDevice.get_zd_table, e.g. the native one, could get it from depth frame.
+    frame = simulator.Frame()
+    frame.nZDTable = (np.arange(2048, dtype=np.uint16) * 3).astype(
+        ">u2").tobytes()
+    device = eys3d.Device(backend="sim")  # Not opened
+    zd_table = device.get_zd_table(frame)
+    assert np.uint16 == zd_table.dtype
+    assert [0, 3, 6141] == zd_table[[0, 1, 2047]].tolist()
+    with pytest.raises(ValueError):
+        device.get_zd_table(simulator.Frame())  # The frame has no ZD table or depth.
+
+
+@pytest.mark.parametrize("depth_bits", [8, 11, 14])
+def test_zd_table_derived_from_frame(monkeypatch, depth_bits):
+    # The native binding provides neither the ZD table of device nor `nZDTable` of frame.
+    monkeypatch.delattr(simulator.CameraDevice, "get_zd_table")
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 1, 3)
+    conf.set_depth_data_type(depth_bits)
+    pipe = eys3d.Pipeline(backend="sim")
+    device = pipe.get_device()
+    pipe.start(conf)
+    ret, frame = pipe.wait_depth_frame()
+    with pytest.raises(ValueError):
+        device.get_zd_table()
+    zd_table = device.get_zd_table(frame)
+    pipe.stop()
+    assert ret
+    assert zd_table is device.get_zd_table()  # Cached
+    assert 1 << depth_bits == len(zd_table)
+    view = eys3d.FrameView(frame)
+    assert np.array_equal(view.get_depth_ZD_image(),
+                          depth.raw_to_z(view, zd_table))
+    if depth_bits != 14:
+        # The disparities not in the frame follow the ZD table of device.
+        expected = simulator._make_zd_table(depth_bits, 800)
+        assert np.allclose(zd_table, expected, rtol=1e-3, atol=1)
+
+
+@pytest.mark.parametrize("mode, depth_bits", [(1, 11), (1, 14), (2, 11),
+                                              (4, 14)])
+def test_raw_to_z_of_frame(mode, depth_bits):
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, mode, 3)
+    conf.set_depth_data_type(depth_bits)
+    pipe = eys3d.FrameSetPipeline(backend="sim")
+    with pytest.raises(ValueError):
+        pipe.get_device().get_zd_table()
+    pipe.start(conf)
+    ret, frameset = pipe.wait_frameset()
+    zd_table = pipe.get_device().get_zd_table()
+    pipe.stop()
+    assert ret
+    assert zd_table is pipe.get_device().get_zd_table()  # Cached
+    view = eys3d.FrameView(frameset.depth_frame)
+    assert (mode == 2) == depth.get_depth_data_type(
+        frameset.depth_frame.dataFormat).interleave
+    raw = depth.get_raw_depth(view)
+    assert view.get_shape() == raw.shape
+    assert np.array_equal(view.get_depth_ZD_image(),
+                          depth.raw_to_z(view, zd_table))
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from eys3d import DumpService
+
+
+def test_submit():
+    with DumpService(workers=2, capacity=4) as service:
+        futures = [service.submit(pow, 2, i) for i in range(8)]
+        assert [2**i for i in range(8)] == [f.result() for f in futures]
+    assert {
+        'submitted': 8,
+        'completed': 8,
+        'failed': 0,
+        'pending': 0
+    } == service.get_statistics()
+
+
+def test_backpressure():
+    release = threading.Event()
+    service = DumpService(workers=1, capacity=2)
+    futures = [service.submit(release.wait) for _ in range(2)]
+    with pytest.raises(TimeoutError):
+        service.submit(release.wait, submit_timeout=0.05)
+    release.set()
+    assert all(f.result(timeout=1) for f in futures)
+    service.shutdown()
+
+
+def test_failed_job():
+    with DumpService() as service:
+        future = service.submit(int, "x")
+        with pytest.raises(ValueError):
+            future.result()
+    assert 1 == service.get_statistics()['failed']
+
+
+def test_job_timeout():
+    with DumpService() as service:
+        # The timeout of job is passed to the job, not taken as the timeout of slot.
+        future = service.submit(threading.Event().wait, timeout=0.05)
+        assert future.result(timeout=1) is False
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import eys3d
+from eys3d import simulator
+
+
+def start_pipeline(realtime):
+    simulator.configure(realtime=realtime)
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 4, 3)  # Depth only
+    pipe = eys3d.Pipeline(backend="sim")
+    pipe.start(conf)
+    return pipe
+
+
+def test_no_frame_lost_or_duplicated():
+    pipe = start_pipeline(realtime=False)
+    handoff = eys3d.FrameHandoff(pipe.wait_depth_frame, capacity=4)
+    serial_numbers = []
+    lock = threading.Lock()
+    consuming = threading.Event()
+    consuming.set()
+
+    def consume():
+        while consuming.is_set():
+            ret, frame = handoff.get(timeout=0.1)
+            if ret:
+                with lock:
+                    serial_numbers.append(frame.get_serial_number())
+
+    consumers = [threading.Thread(target=consume) for _ in range(4)]
+    try:
+        handoff.start()
+        for consumer in consumers:
+            consumer.start()
+        time.sleep(0.5)
+        handoff.stop()
+    finally:
+        consuming.clear()
+        for consumer in consumers:
+            consumer.join()
+        pipe.stop()
+        simulator.configure(realtime=True)
+
+    statistics = handoff.get_statistics()
+    assert len(serial_numbers) == len(set(serial_numbers)) > 0
+    assert len(serial_numbers) == statistics['consumed']
+    assert statistics['published'] == (statistics['consumed'] +
+                                       statistics['dropped'] +
+                                       statistics['queued'])
+    assert 0 <= statistics['queued'] <= 4
+
+
+def test_capacity():
+    pipe = start_pipeline(realtime=True)
+    handoff = eys3d.FrameHandoff(pipe.wait_depth_frame, capacity=3)
+    try:
+        handoff.start()
+        deadline = time.monotonic() + 2.0
+        while (handoff.get_statistics()['published'] < 6
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        handoff.stop()
+    finally:
+        pipe.stop()
+
+    statistics = handoff.get_statistics()
+    assert 6 <= statistics['published']
+    # Nothing is consumed, so only the latest frames up to the capacity are kept.
+    assert 3 == statistics['queued']
+    assert statistics['published'] - 3 == statistics['dropped']
+    serial_numbers = [handoff.get(timeout=0)[1].get_serial_number()
+                      for _ in range(3)]
+    assert serial_numbers == sorted(serial_numbers)
+
+
+def test_failed_wait_is_not_retried_at_once():
+    calls = []
+
+    def wait_frame(timeout):
+        calls.append(timeout)
+        # Like the stopped pipeline, and like the waits of `logger.catch` after an exception.
+        return (False, None) if len(calls) % 2 else None
+
+    handoff = eys3d.FrameHandoff(wait_frame, timeout=100)
+    handoff.start()
+    assert (False, None) == handoff.get(timeout=0.35)
+    handoff.stop()
+    assert 3 <= len(calls) <= 5
+    assert {100} == set(calls)
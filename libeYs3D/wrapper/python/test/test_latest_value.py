@@ -0,0 +1,56 @@
+import threading
+
+from eys3d import LatestValueBuffer
+
+
+def test_latest_value():
+    buffer = LatestValueBuffer()
+    assert (False, None) == buffer.get()
+    buffer.publish(1)
+    buffer.publish(2)
+    assert buffer.has_new()
+    assert (True, 2) == buffer.get()
+    assert (False, 2) == buffer.get()
+    assert not buffer.has_new()
+    buffer.publish(3)
+    assert 3 == buffer.peek()
+    assert {
+        'published': 3,
+        'consumed': 1,
+        'overwritten': 1,
+        'pending': 1
+    } == buffer.get_statistics()
+
+
+def test_no_copy():
+    value = bytearray(16)
+    buffer = LatestValueBuffer()
+    buffer.publish(value)
+    assert buffer.get()[1] is value
+
+
+def test_concurrent_counters():
+    buffer = LatestValueBuffer()
+    count = 20000
+    done = threading.Event()
+    got = []
+
+    def produce():
+        for i in range(1, count + 1):
+            buffer.publish(i)
+        done.set()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while not done.is_set() or buffer.has_new():
+        is_new, value = buffer.get()
+        if is_new:
+            got.append(value)
+    producer.join()
+
+    assert got == sorted(got) and count == got[-1]
+    stats = buffer.get_statistics()
+    assert count == stats['published']
+    assert len(got) == stats['consumed']
+    assert count == stats['consumed'] + stats['overwritten']
+    assert 0 == stats['pending']
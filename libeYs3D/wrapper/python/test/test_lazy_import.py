@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+
+import eys3d
+
+PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(script, **env):
+    env = dict(dict(os.environ, PYTHONPATH=PATH, EYS3D_BACKEND="sim"), **env)
+    env = {k: v for k, v in env.items() if v is not None}  # None to unset
+    return subprocess.check_output([sys.executable, "-c", script],
+                                   env=env,
+                                   timeout=60).decode().split()
+
+
+def test_lazy_import():
+    loaded = run("import sys, eys3d; "
+                 "print(' '.join(m for m in sys.modules if m.startswith('eys3d') "
+                 "or m in ('numpy', 'loguru')))")
+    assert {"eys3d", "eys3d.utils"} == set(loaded)
+
+
+def test_lazy_attributes():
+    assert eys3d.Pipeline is eys3d.pipeline.Pipeline
+    assert eys3d.USB_PORT_TYPE is eys3d.load_backend().USB_PORT_TYPE
+    assert "depth" in dir(eys3d)
+    for name in eys3d.__all__:
+        assert getattr(eys3d, name) is not None
+    try:
+        eys3d.NotExist
+        assert False
+    except AttributeError:
+        pass
+
+
+def test_lazy_attribute_while_importing_submodule():
+    # The first access of eys3d.Pipeline imports eys3d.device, while the other thread imports it,
+    # which gets eys3d.logger during the import.
+    script = """
+import os, sys, threading
+import eys3d
+barrier = threading.Barrier(2)
+def get_pipeline():
+    barrier.wait()
+    eys3d.Pipeline
+def import_device():
+    barrier.wait()
+    import eys3d.device
+threads = [threading.Thread(target=f, daemon=True) for f in (get_pipeline, import_device)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join(10)
+print(not any(thread.is_alive() for thread in threads))
+sys.stdout.flush()
+os._exit(0)  # Do not wait for the deadlocked imports.
+"""
+    for _ in range(3):
+        assert ["True"] == run(script, EYS3D_LOG_FILE="0")
+
+
+def test_deferred_log_file(tmp_path):
+    logs = tmp_path / "logs"
+    script = "import os, eys3d; print(os.path.exists({!r})); eys3d.logger.info('x')".format(
+        str(logs))
+    assert ["False"] == run(script, EYS3D_HOME=str(tmp_path))
+    assert 1 == len(os.listdir(str(logs)))
+    run(script, EYS3D_HOME=str(tmp_path / "off"), EYS3D_LOG_FILE="0")
+    assert not (tmp_path / "off").exists()
+
+
+def test_backend_without_environment_variable():
+    # The default backend, eys3dPy, is not needed if the backend is given.
+    script = ("import eys3d; "
+              "conf = eys3d.Config(backend='sim'); "
+              "conf.set_preset_mode_config(0x162, 1, 3); "
+              "pipe = eys3d.Pipeline(backend='sim'); "
+              "print(pipe.start(conf)); "
+              "ret, frame = pipe.wait_depth_frame(); "
+              "print(ret, frame.get_width()); "
+              "print(pipe.get_cameraProperty().get_light_source_status()); "
+              "pipe.stop()")
+    assert ["True", "True", "1280", "1"] == run(script,
+                                                 EYS3D_BACKEND=None,
+                                                 EYS3D_LOG_FILE="0")
@@ -0,0 +1,83 @@
+import time
+import urllib.request
+
+import eys3d
+from eys3d import MetricsExporter, PipelineMetrics
+from eys3d import simulator
+
+
+class Item:
+    def __init__(self, ts, serial_number, transcoding=0):
+        self.tsUs = ts
+        self.serialNumber = serial_number
+        self.rgbTranscodingTimeUs = transcoding
+
+
+def test_record():
+    metrics = PipelineMetrics()
+    now = int(time.time() * 1000000)
+    for serial_number in (1, 2, 5):
+        metrics.record_frame("color", Item(now - 20000, serial_number, 3000))
+    metrics.record_result("color", simulator.PIPELINE_RESULT.TIMEOUT)
+    stats = metrics.get_snapshot()['streams']['color']
+    assert 3 == stats['frames']
+    assert 2 == stats['skipped']
+    assert not stats['latency_relative']
+    assert 0.02 <= stats['latency'] < 1
+    assert {'TIMEOUT': 1} == stats['results']
+    assert 3 == stats['transcoding_histogram']['count']
+    assert 0 == stats['filtering_histogram']['count']
+
+
+def test_relative_latency():
+    metrics = PipelineMetrics()
+    metrics.record_frame("depth", Item(1000, 1))  # The device clock
+    time.sleep(0.01)
+    metrics.record_frame("depth", Item(2000, 2))
+    stats = metrics.get_snapshot()['streams']['depth']
+    assert stats['latency_relative']
+    assert 0.005 < stats['latency'] < 1
+
+
+def test_polling_results():
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 4, 3)  # Depth only
+    pipe = eys3d.Pipeline(backend="sim")
+    pipe.start(conf)
+    polls = 0
+    while not pipe.get_depth_frame()[0]:
+        polls += 1
+        time.sleep(0.001)
+    pipe.wait_color_frame(50)
+    pipe.stop()
+    streams = pipe.get_metrics().get_snapshot()['streams']
+    # The empty queue of polling is not a failure, but the failures of waiting are counted.
+    assert 0 < polls
+    assert {} == streams['depth']['results']
+    assert 1 == sum(streams['color']['results'].values())
+
+
+def test_pipeline_and_exporter():
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 1, 3)
+    pipe = eys3d.Pipeline(backend="sim")
+    pipe.start(conf)
+    for _ in range(10):
+        pipe.wait_depth_frame()
+    stats = pipe.get_metrics().get_snapshot()['streams']['depth']
+    assert 10 == stats['frames']
+    assert stats['fps'] > 0
+
+    exporter = MetricsExporter(port=0)
+    exporter.register("camera0", pipe.get_metrics())
+    exporter.start()
+    try:
+        url = "http://127.0.0.1:{}/metrics".format(exporter.get_port())
+        text = urllib.request.urlopen(url, timeout=2).read().decode()
+    finally:
+        exporter.stop()
+        pipe.stop()
+    assert "# TYPE eys3d_frames_total counter" in text
+    assert 'eys3d_frames_total{pipeline="camera0",stream="depth"} 10' in text
+    assert 'eys3d_latency_seconds_bucket{pipeline="camera0",stream="depth",le="+Inf"} 10' in text
+    assert 'eys3d_latency_seconds_count{pipeline="camera0",stream="depth"} 10' in text
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+import eys3d
+from eys3d import ModeCatalog, get_mode_catalog
+from eys3d import simulator
+from eys3d.mode_catalog import _read_modes, clear_mode_catalogs
+
+
+def test_loaded_once(monkeypatch):
+    clear_mode_catalogs()
+    loads = []
+    load = ModeCatalog.load.__func__
+
+    def counted_load(cls, pid, usb_type, backend=None):
+        loads.append((pid, usb_type))
+        return load(cls, pid, usb_type, backend)
+
+    monkeypatch.setattr(ModeCatalog, "load", classmethod(counted_load))
+    threads = [
+        threading.Thread(target=get_mode_catalog, args=(0x162, 3))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    catalog = get_mode_catalog(0x162, 3)
+    assert catalog is eys3d.ModeConfig(0x162, 2, 3).get_catalog()
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 4, 3)
+    assert [(0x162, 3)] == loads
+    assert catalog is not get_mode_catalog(0x162, 2)
+    assert [(0x162, 3), (0x162, 2)] == loads
+
+
+def test_lookups():
+    catalog = get_mode_catalog(0x162, 3)
+    assert 5 == len(catalog)
+    assert (1, 2, 3, 4, 5) == catalog.get_indexes()
+    assert 4 in catalog and 6 not in catalog
+    mode_info = catalog.get_mode(1)
+    assert (1280, 720) == mode_info.L_Resolution
+    assert 60 == mode_info.vecColorFps[0]
+    assert catalog.get_mode(99) is None
+
+    assert (3, ) == tuple(m.iMode for m in catalog.find(
+        color_resolution=(1280, 720), fps=30))
+    assert (4, 5) == tuple(m.iMode for m in catalog.find(color_resolution=(0, 0)))
+    assert (1, 2, 3, 4, 5) == tuple(m.iMode for m in catalog.find(depth_bits=11))
+    assert () == catalog.find(fps=7)
+    assert catalog.get_modes() == catalog.find()
+    assert {
+        'color': [(1280, 720)],
+        'depth': [(1280, 720)]
+    } == catalog.get_resolutions()
+
+
+def test_immutable():
+    mode_info = get_mode_catalog(0x162, 3).get_mode(1)
+    with pytest.raises(AttributeError):
+        mode_info.iMode = 2
+    with pytest.raises(AttributeError):
+        mode_info.vecDepthType.append(8)
+
+
+def test_mode_config_get_modes():
+    modeConfig = eys3d.ModeConfig(0x162, 6, 2)
+    assert (6, 7) == tuple(m.iMode for m in modeConfig.get_modes())
+    assert 6 == modeConfig.get_current_index()
+    modeConfig.select_current_index(7)
+    assert 7 == modeConfig.get_current_mode_info().iMode
+    modeConfig.select_current_index(1)  # Not in the modes of USB 2. It is logged.
+    assert 7 == modeConfig.get_current_index()
+
+
+class IndexOptions:
+    # The ModeConfigOptions of binding without get_modes, which has only the modes of indexes.
+    def __init__(self, indexes, count=None):
+        self.__options = simulator.ModeConfigOptions(
+            simulator.USB_PORT_TYPE.USB_PORT_TYPE_3_0, 0x162)
+        self.__indexes = indexes
+        self.__count = len(indexes) if count is None else count
+
+    def get_mode_count(self):
+        return self.__count
+
+    def get_current_index(self):
+        return self.__options.get_current_index()
+
+    def select_current_index(self, index):
+        if index not in self.__indexes:
+            return -1
+        return self.__options.select_current_index(index)
+
+    def get_current_mode_info(self):
+        return self.__options.get_current_mode_info()
+
+
+def read_indexes(options):
+    return [mode.iMode for mode in _read_modes(options)]
+
+
+def test_read_modes_with_gaps():
+    assert [1, 2, 4, 5] == read_indexes(IndexOptions((1, 2, 4, 5)))
+    assert [1, 3] == read_indexes(IndexOptions((1, 3)))
+    # The probing is bounded if the count is more than the modes.
+    assert [1, 2] == read_indexes(IndexOptions((1, 2), count=3))
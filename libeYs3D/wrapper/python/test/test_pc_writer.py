@@ -0,0 +1,71 @@
+import gzip
+import os
+import time
+
+import numpy as np
+
+import eys3d
+from eys3d import pc_writer
+
+
+def make_cloud():
+    xyz = np.arange(30, dtype=np.float32).reshape(10, 3)
+    xyz[3] = 0  # No depth.
+    rgb = np.arange(30, dtype=np.uint8).reshape(10, 3)
+    return xyz, rgb
+
+
+def read_binary(path, compress=False):
+    with (gzip.open if compress else open)(path, "rb") as f:
+        data = f.read()
+    end = data.index(b"end_header\n") + len(
+        b"end_header\n") if data.startswith(b"ply") else data.index(
+            b"DATA binary\n") + len(b"DATA binary\n")
+    return data[:end].decode("ascii"), data[end:]
+
+
+def test_write_ply(tmp_path):
+    xyz, rgb = make_cloud()
+    path = str(tmp_path / "cloud.ply")
+    assert 9 == pc_writer.write_ply(path, xyz.reshape(-1), rgb.reshape(-1))
+    header, data = read_binary(path)
+    assert "element vertex 9" in header
+    records = np.frombuffer(data,
+                            dtype=[('xyz', '<f4', 3), ('rgb', 'u1', 3)])
+    valid = xyz[:, 2] != 0
+    assert np.array_equal(xyz[valid], records['xyz'])
+    assert np.array_equal(rgb[valid], records['rgb'])
+
+
+def test_write_pcd(tmp_path):
+    xyz, rgb = make_cloud()
+    path = str(tmp_path / "cloud.pcd.gz")
+    assert 10 == pc_writer.write_point_cloud(path, xyz, skip_invalid=False)
+    header, data = read_binary(path, compress=True)
+    assert "POINTS 10" in header and "FIELDS x y z\n" in header
+    assert np.array_equal(xyz, np.frombuffer(data, '<f4').reshape(-1, 3))
+
+    pc_writer.write_pcd(str(tmp_path / "color.pcd"), xyz, rgb)
+    _, data = read_binary(str(tmp_path / "color.pcd"))
+    packed = np.frombuffer(data, dtype=[('xyz', '<f4', 3), ('rgb', '<u4')])
+    r, g, b = (int(v) for v in rgb[0])
+    expected = (r << 16) | (g << 8) | b
+    assert expected == packed['rgb'][0]
+
+
+def test_pc_frame_writer(tmp_path):
+    writer = pc_writer.PCFrameWriter(str(tmp_path), every=2)
+    writer.start()
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 3, 3)
+    device = eys3d.Device(backend="sim")
+    device.open_device(conf, PCFrameCallback=writer)
+    device.enable_PC_stream()
+    deadline = time.monotonic() + 5
+    while writer.get_statistics()['received'] < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    device.close_stream()
+    writer.stop()
+    stats = writer.get_statistics()
+    assert stats['written'] + stats['dropped'] == (stats['received'] + 1) // 2
+    assert stats['written'] == len(os.listdir(str(tmp_path)))
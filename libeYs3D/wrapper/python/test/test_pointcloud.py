@@ -0,0 +1,107 @@
+import numpy as np
+
+import eys3d
+from eys3d import pointcloud
+
+
+def get_rect_log_data():
+    return eys3d.Device(backend="sim").get_rectify_mat_log_data()
+
+
+def test_intrinsics():
+    rect_log_data = get_rect_log_data()
+    assert (800, 800, 640, 360) == pointcloud.get_intrinsics(
+        rect_log_data, 1280, 720)
+    assert (400, 400, 320, 180) == pointcloud.get_intrinsics(
+        rect_log_data.get_dict(), 640, 360)
+
+
+def test_depth_to_points():
+    rect_log_data = get_rect_log_data()
+    z_map = np.full((360, 640), 1000, dtype=np.uint16)
+    z_map[0, :] = 0
+    z_map[1, :] = 9000
+    color = np.zeros((720, 1280, 3), dtype=np.uint8)
+    color[..., 0] = 7
+    xyz, rgb = pointcloud.depth_to_points(z_map,
+                                          rect_log_data,
+                                          color=color,
+                                          z_range={"Near": 300, "Far": 5000})
+    assert (358 * 640, 3) == xyz.shape == rgb.shape
+    assert np.all(xyz[:, 2] == 1000)
+    assert np.all(rgb[:, 0] == 7)
+    # The pixel (u, v) = (0, 2) is the first point.
+    assert np.allclose(xyz[0], [-320 * 1000 / 400.0, -178 * 1000 / 400.0, 1000])
+
+
+def test_depth_to_points_organized():
+    rect_log_data = get_rect_log_data()
+    z_map = np.full((360, 640), 1000, dtype=np.uint16)
+    z_map[100, 200] = 0
+    xyz, rgb = pointcloud.depth_to_points(z_map,
+                                          rect_log_data,
+                                          stride=2,
+                                          roi=(100, 50, 300, 150),
+                                          organized=True)
+    assert (50, 100, 3) == xyz.shape
+    assert rgb is None
+    assert np.all(xyz[25, 50] == 0)
+    assert np.allclose(xyz[0, 0], [-220 * 1000 / 400.0, -130 * 1000 / 400.0, 1000])
+
+
+def test_depth_to_points_same_color_shape():
+    rect_log_data = get_rect_log_data()
+    z_map = np.full((360, 640), 1000, dtype=np.uint16)
+    z_map[100, 200] = 0
+    color = np.arange(360 * 640 * 3, dtype=np.uint32).astype(np.uint8)
+    color = color.reshape((360, 640, 3))
+    expected = color.copy()
+    xyz, rgb = pointcloud.depth_to_points(z_map,
+                                          rect_log_data,
+                                          color=color,
+                                          stride=2,
+                                          roi=(100, 50, 300, 150),
+                                          organized=True)
+    assert (50, 100, 3) == xyz.shape == rgb.shape
+    assert np.all(rgb[25, 50] == 0)
+    rgb[25, 50] = expected[100, 200]
+    assert np.array_equal(expected[50:150:2, 100:300:2], rgb)
+    # The color of caller is not cleared with the invalid points.
+    assert np.array_equal(expected, color)
+
+
+def test_ray_table_cache():
+    cache = pointcloud.RayTableCache(max_bytes=640 * 360 * 3 * 4 * 2)
+    rect_log_data = get_rect_log_data()
+    first = cache.get_or_create(("SIM", 0, 640, 360), rect_log_data, 640, 360)
+    assert first is cache.get_or_create(("SIM", 0, 640, 360), None, 640, 360)
+    cache.get_or_create(("SIM", 1, 640, 360), rect_log_data, 640, 360)
+    cache.get(("SIM", 0, 640, 360))  # The first is used recently.
+    cache.get_or_create(("SIM", 2, 640, 360), rect_log_data, 640, 360)
+    assert 2 == len(cache)
+    assert cache.get(("SIM", 1, 640, 360)) is None
+    assert first is cache.get(("SIM", 0, 640, 360))
+
+
+def test_device_ray_table():
+    pointcloud.ray_table_cache.clear()
+    pipe = eys3d.Pipeline(backend="sim")
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 1, 3)
+    pipe.start(conf)
+    device = pipe.get_device()
+    device.get_rectify_mat_log_data()
+    assert 1 == len(pointcloud.ray_table_cache)
+    table = device.get_ray_table()
+    assert (720, 1280) == table.get_shape()
+    ret, dframe = pipe.wait_depth_frame()
+    pipe.stop()
+    xyz, _ = pointcloud.depth_to_points(dframe, table)
+    expected, _ = pointcloud.depth_to_points(dframe,
+                                             device.get_rectify_mat_log_data())
+    assert np.array_equal(expected, xyz)
+    # The device and depth_to_points share the table.
+    assert 1 == len(pointcloud.ray_table_cache)
+    key = pointcloud.get_ray_table_key(device.get_rectify_mat_log_data(),
+                                       1280, 720)
+    assert table is pointcloud.ray_table_cache.get(key)
@@ -0,0 +1,110 @@
+import numpy as np
+
+import eys3d
+from eys3d import FrameSetRecorder, FrameSetReader, FrameView
+from eys3d import recorder, simulator
+
+
+def record(path, count=5, step=1, **kwargs):
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 1, 3)
+    pipe = eys3d.FrameSetPipeline(backend="sim")
+    pipe.start(conf)
+    framesets = []
+    received = 0
+    with FrameSetRecorder(path, metadata={"mode": 1}, **kwargs) as rec:
+        while len(framesets) < count:
+            ret, frameset = pipe.wait_frameset()
+            if not ret:
+                continue
+            received += 1
+            if (received - 1) % step:  # Skip the frames to record the gaps.
+                continue
+            rec.write_frameset(frameset)
+            rec.write_imu(frameset.depth_frame.tsUs + 1, len(framesets),
+                          np.arange(6, dtype=np.float32))
+            framesets.append(frameset)
+    pipe.stop()
+    return framesets
+
+
+def test_record_and_read(tmp_path):
+    path = str(tmp_path / "capture.eys3d")
+    framesets = record(path, zd=True)
+    with FrameSetReader(path) as reader:
+        assert {"mode": 1} == reader.get_metadata()
+        assert 10 == len(reader)
+        for expected in framesets:
+            frameset = reader.read_at(expected.depth_frame.tsUs)
+            assert expected.depth_frame.serialNumber == frameset.depth_frame.get_serial_number()
+            assert np.array_equal(expected.color_frame.get_data(),
+                                  frameset.color_frame.get_data())
+            assert np.array_equal(expected.depth_frame.get_depth_ZD_value(),
+                                  FrameView(frameset.depth_frame).get_depth_ZD_image().reshape(-1))
+        sample = reader.read_at(framesets[2].depth_frame.tsUs + 1,
+                                recorder.ENTRY_IMU)
+        assert 2 == sample.get_serial_number()
+        assert [0, 1, 2, 3, 4, 5] == list(sample.get_data().view(np.float32))
+
+
+def test_read_without_index(tmp_path):
+    path = str(tmp_path / "capture.eys3d")
+    record(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:-recorder.INDEX_DTYPE.itemsize * 10])  # Truncate the index.
+    with FrameSetReader(path) as reader:
+        assert 10 == len(reader)
+        kinds = list(reader.get_index()['kind'])
+        assert [recorder.ENTRY_FRAMESET, recorder.ENTRY_IMU] * 5 == kinds
+
+
+def play(path, count, **kwargs):
+    simulator.configure(recording=path, **kwargs)
+    try:
+        conf = eys3d.Config()
+        conf.set_preset_mode_config(0x162, 1, 3)
+        pipe = eys3d.FrameSetPipeline(backend="sim")
+        pipe.start(conf)
+        played = []
+        for _ in range(count):
+            ret, frameset = pipe.wait_frameset(500)
+            if ret:
+                played.append((frameset.depth_frame.tsUs,
+                               frameset.depth_frame.get_serial_number(),
+                               frameset.depth_frame.get_depth_ZD_value()))
+        pipe.stop()
+    finally:
+        simulator.configure(recording=None, realtime=True, loop=True, speed=1.0)
+    return played
+
+
+def test_playback(tmp_path):
+    path = str(tmp_path / "capture.eys3d")
+    framesets = record(path, zd=True)
+    played = play(path, 6, loop=False, speed=4.0)
+    assert [f.depth_frame.tsUs for f in framesets] == [ts for ts, _, _ in played]
+    for frameset, (_, _, zd) in zip(framesets, played):
+        assert np.array_equal(frameset.depth_frame.get_depth_ZD_value(), zd)
+
+
+def test_playback_loop(tmp_path):
+    path = str(tmp_path / "capture.eys3d")
+    record(path)
+    timestamps = [ts for ts, _, _ in play(path, 20, realtime=False)]
+    assert 20 == len(timestamps)
+    assert sorted(set(timestamps)) == timestamps  # Increasing when looped.
+
+
+def test_playback_loop_serial_numbers(tmp_path):
+    path = str(tmp_path / "capture.eys3d")
+    framesets = record(path, step=3)
+    recorded = [f.depth_frame.get_serial_number() for f in framesets]
+    serial_numbers = [sn for _, sn, _ in play(path, 20, realtime=False)]
+    assert sorted(set(serial_numbers)) == serial_numbers
+    # The gaps are kept, and each loop is shifted by the range of recorded serial numbers.
+    span = recorded[-1] - recorded[0] + 1
+    cycles = [divmod(sn - recorded[0], span) for sn in serial_numbers]
+    assert all(recorded[0] + k in recorded for _, k in cycles)
+    assert 0 < cycles[-1][0]
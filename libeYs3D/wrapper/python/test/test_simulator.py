@@ -0,0 +1,180 @@
+import threading
+import time
+
+import numpy as np
+
+import eys3d
+from eys3d import simulator
+
+
+def get_config(pid=0x162, mode=1):
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(pid, mode, 3)
+    return conf
+
+
+def test_mode_config():
+    modeConfig = eys3d.ModeConfig(0x162, 1, 3)
+    assert 5 == modeConfig.get_mode_count()  # The modes of USB 3
+    mode_info = modeConfig.get_current_mode_info()
+    assert 1280 == mode_info.L_Resolution.Width
+    assert 720 == mode_info.D_Resolution.Height
+    assert (11, 14) == mode_info.vecDepthType
+    modeConfig.select_current_index(99)  # Not in database. It is logged.
+    assert 1 == modeConfig.get_current_index()
+
+
+def test_device():
+    dev = eys3d.Device(backend="sim")
+    assert simulator is dev.get_backend()
+    assert 3 == dev.get_usb_type()
+    assert "8062" in dev.get_device_info()['firmware_version']
+    dev.set_z_range(123, 998)
+    assert {"Near": 123, "Far": 998} == dev.get_z_range()
+    ir_property = dev.get_IRProperty()
+    ir_property.enable_extendIR()
+    assert 15 == ir_property.get_IR_max()
+    ir_property.set_IR_value(10)
+    assert 10 == ir_property.get_IR_value()
+
+
+def test_pipeline():
+    pipe = eys3d.Pipeline(backend="sim")
+    pipe.start(get_config())
+    cret, cframe = pipe.wait_color_frame()
+    dret, dframe = pipe.wait_depth_frame()
+    assert cret and dret
+    assert (720, 1280, 3) == eys3d.FrameView(cframe).get_rgb_image().shape
+    z_map = eys3d.FrameView(dframe).get_depth_ZD_image()
+    assert (720, 1280) == z_map.shape
+    assert 0 < z_map.max() <= 5000
+    assert 720 * 1280 * 2 == dframe.get_data().size  # 11 bits
+    pipe.stop()
+    assert (False, None) == pipe.wait_depth_frame(100)
+
+
+def test_pipeline_serial_numbers():
+    # The frames are produced as fast as possible, so the test does not depend on the timing of host.
+    simulator.configure(realtime=False)
+    try:
+        pipe = eys3d.Pipeline(backend="sim")
+        pipe.start(get_config(mode=3))
+        serial_numbers = []
+        for _ in range(20):
+            ret, frame = pipe.wait_depth_frame()
+            assert ret
+            serial_numbers.append(frame.get_serial_number())
+        pipe.stop()
+    finally:
+        simulator.configure(realtime=True)
+    assert serial_numbers == sorted(set(serial_numbers))
+    assert 0 < serial_numbers[0]
+
+
+def test_borrow_frames(monkeypatch):
+    sizes = []
+    base = simulator.Frame
+
+    class Frame(base):
+        def __init__(self, *args):
+            sizes.append(args)
+            base.__init__(self, *args)
+
+    monkeypatch.setattr(simulator, "Frame", Frame)
+    pipe = eys3d.Pipeline(backend="sim", pool_size=2)
+    pipe.start(get_config())
+    # The raw data of YUY2 and 11 bits depth is 2 bytes per pixel.
+    assert (1280 * 720 * 2, 0, 1280 * 720, 0, 1280 * 720 * 3, 0) in sizes
+    with pipe.borrow_color_frame() as frame:
+        assert 1280 * 720 * 3 == frame.rgbVec.size
+        color_frame = frame
+    with pipe.borrow_depth_frame() as frame:
+        assert 1280 * 720 == frame.zdDepthVec.size
+        depth_frame = frame
+    with pipe.borrow_color_frame() as frame:
+        assert frame is color_frame
+    with pipe.borrow_depth_frame(timeout=0) as frame:
+        assert frame is None or frame is depth_frame
+    pipe.stop()
+
+
+def test_borrow_timeout():
+    pipe = eys3d.Pipeline(backend="sim", pool_size=1)
+    pipe.start(get_config(mode=4))  # Depth only, so the color frame is never ready.
+
+    def borrow():
+        with pipe.borrow_color_frame(timeout=300):
+            pass
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    # The frame is borrowed after about 250 ms. The wait gets the time left, not another 300 ms.
+    with pipe.borrow_color_frame(timeout=300) as frame:
+        assert frame is None
+    elapsed = time.monotonic() - start
+    thread.join()
+    pipe.stop()
+    assert elapsed < 0.45
+
+
+def test_frameset_pipeline(monkeypatch):
+    sizes = []
+    base = simulator.Frame
+
+    class Frame(base):
+        def __init__(self, *args):
+            sizes.append(args)
+            base.__init__(self, *args)
+
+    monkeypatch.setattr(simulator, "Frame", Frame)
+    pipe = eys3d.FrameSetPipeline(backend="sim", pool_size=2)
+    pipe.start(get_config())
+    # The color and depth frames of pooled framesets are reserved too.
+    reserved = (1280 * 720 * 2, 0, 1280 * 720, 0, 1280 * 720 * 3, 0)
+    assert 4 == sizes.count(reserved)
+    ret, frameset = pipe.wait_frameset()
+    assert ret
+    assert frameset.color_frame.tsUs == frameset.depth_frame.tsUs
+    assert frameset.color_frame.get_serial_number(
+    ) == frameset.depth_frame.get_serial_number()
+    with pipe.borrow_frameset() as frameset:
+        assert 1280 == frameset.depth_frame.get_width()
+    pipe.stop()
+
+
+def test_recorded_frames():
+    depth_images = [
+        np.full((720, 1280), z, dtype=np.uint16) for z in (1000, 2000)
+    ]
+    simulator.configure(depth_images=depth_images)
+    try:
+        pipe = eys3d.Pipeline(backend="sim")
+        pipe.start(get_config(mode=4))  # Depth only
+        values = set()
+        for _ in range(4):
+            ret, dframe = pipe.wait_depth_frame()
+            values.add(int(np.median(dframe.get_depth_ZD_value())))
+        pipe.stop()
+    finally:
+        simulator.configure(depth_images=None)
+    # The z value is quantized by disparity of 11 bits.
+    assert 2 == len(values)
+    assert all(abs(v - z) < z * 0.02 for v, z in zip(sorted(values), (1000, 2000)))
+
+
+def test_multi_camera_pipeline():
+    simulator.configure(device_count=2)
+    try:
+        pipe = eys3d.MultiCameraPipeline(backend="sim")
+        pipe.start(get_config())
+        indexes = set()
+        for _ in range(20):
+            ret, index, frameset = pipe.wait_frameset()
+            assert ret
+            indexes.add(index)
+        pipe.stop()
+    finally:
+        simulator.configure(device_count=1)
+    assert {0, 1} == indexes
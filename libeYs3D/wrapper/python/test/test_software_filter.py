@@ -0,0 +1,146 @@
+import numpy as np
+
+import eys3d
+from eys3d.software_filter import (EdgePreServingFilter, HoleFill,
+                                   RemoveCurve, SoftwareDepthFilter, Subsample,
+                                   TemporalFilter)
+
+
+def make_z_map(height=48, width=64):
+    rng = np.random.RandomState(0)
+    return (1000 + rng.randint(-10, 10, (height, width))).astype(np.uint16)
+
+
+def test_subsample():
+    z_map = np.array([[0, 0, 0, 5], [0, 0, 7, 3], [4, 4, 1, 2],
+                      [0, 8, 1, 2]],
+                     dtype=np.uint16)
+    # The median and mean of valid values in each block. The block without values is 0.
+    assert [[0, 5], [4, 1]] == Subsample(0).apply(z_map).tolist()
+    z_map = make_z_map(50, 64)
+    assert (10, 12) == Subsample(3).apply(z_map).shape
+    blocks = z_map[:12, :16].reshape(3, 4, 4, 4).swapaxes(1, 2).reshape(
+        3, 4, 16)
+    assert (blocks.mean(axis=2).astype(np.uint16) == Subsample(2).apply(
+        z_map[:12, :16])).all()
+
+    subsample = Subsample(1)
+    restored = subsample.restore(subsample.apply(z_map), z_map.shape)
+    assert z_map.shape == restored.shape
+    assert (restored[48:] == 0).all() and (restored[:48, :63] > 0).all()
+
+
+def test_parameters_out_of_range():
+    # The setters log the error like DepthFilterOptions, and keep the value.
+    subsample = Subsample(0)
+    subsample.set(4)
+    assert {'mode_index': 0, 'factor': 2} == subsample.get()
+    edge = EdgePreServingFilter(11)
+    assert 1 == edge.get_edge_level()
+    temporal = TemporalFilter(alpha=1.0, history=4)
+    assert {'alpha': 0.4, 'history': 3} == temporal.get()
+    hole = HoleFill(kernel_size=0, level=4)
+    assert {'kernel_size': 1, 'level': 1} == hole.get()
+
+
+def test_edge_preserving_filter():
+    z_map = make_z_map()
+    z_map[:, 32:] += 1000
+    z_map[0, 0] = 0
+    result = EdgePreServingFilter(3).apply(z_map)
+    assert 0 == result[0, 0]
+    assert result[:, 1:31].std() < z_map[:, 1:31].std()
+    # The edge is kept.
+    assert (result[:, 31] < 1100).all() and (result[:, 32] > 1900).all()
+
+
+def test_hole_fill():
+    z_map = make_z_map()
+    z_map[10:16, 20:22] = 0
+    z_map[10:16, 19] = 3000
+    horizontal = HoleFill(kernel_size=1, horizontal=True).apply(z_map)
+    assert (horizontal[10:16, 20] == 3000).all()
+    assert (horizontal[10:16, 21] > 0).all()
+    vertical = HoleFill(kernel_size=1, level=2).apply(z_map)
+    assert (vertical[10:12, 20:22] > 0).all() and (vertical[14:16, 20:22] >
+                                                   0).all()
+    assert (vertical[12:14, 20:22] == 0).all()
+    assert (HoleFill(kernel_size=1, level=3).apply(z_map) > 0).all()
+
+
+def test_temporal_filter():
+    temporal = TemporalFilter(alpha=0.5, history=2)
+    z_map = np.full((4, 4), 1000, dtype=np.uint16)
+    assert (temporal.apply(z_map) == 1000).all()
+    assert (temporal.apply(z_map + 100) == 1050).all()
+    # The missing pixel keeps the average for the history frames.
+    empty = np.zeros_like(z_map)
+    assert (temporal.apply(empty) == 1050).all()
+    assert (temporal.apply(empty) == 1050).all()
+    assert (temporal.apply(empty) == 0).all()
+    assert (temporal.apply(z_map) == 1000).all()
+    temporal.reset()
+    assert (temporal.apply(z_map + 100) == 1100).all()
+
+
+def test_remove_curve():
+    z_map = make_z_map()
+    z_map[20, 20] = 1500
+    z_map[30:32, 30:32] = 2000
+    result = RemoveCurve().apply(z_map)
+    assert 0 == result[20, 20]
+    assert (result[30:32, 30:32] == 2000).all()
+    assert (result[:20] == z_map[:20]).all()
+
+
+def test_chain():
+    z_map = make_z_map()
+    z_map[5:8, 5:8] = 0
+    software_filter = SoftwareDepthFilter(Subsample(0),
+                                          holeFill=HoleFill(level=2),
+                                          temporalFilter=TemporalFilter())
+    assert not software_filter.edgePreServingFilter.is_enabled()
+    result = software_filter.apply(z_map)
+    assert z_map.shape == result.shape and np.uint16 == result.dtype
+    assert (result > 0).all()
+    assert 0 == z_map[6, 6]
+    software_filter.apply(z_map)
+    statistics = software_filter.get_statistics()
+    assert {"subsample", "holeFill", "temporalFilter", "restore",
+            "total"} == set(statistics)
+    assert 2 == statistics["total"]['count']
+
+    disabled = SoftwareDepthFilter()
+    result = disabled.apply(z_map)
+    assert (result == z_map).all() and result is not z_map
+    assert {"total"} == set(disabled.get_statistics())
+
+
+def test_from_options():
+    dev = eys3d.Device(backend="sim")
+    options = dev.get_depthFilter_options()
+    options.enable()
+    options.subsample.enable()
+    options.subsample.set(2)
+    options.holeFill.enable()
+    options.holeFill.set_kernel_size(2)
+    options.holeFill.enable_horizontal()
+    options.temporalFilter.set_alpha(0.6)
+    software_filter = SoftwareDepthFilter.from_options(options)
+    values = software_filter.get()
+    assert {'mode_index': 2, 'factor': 4, 'enabled': True} == values['subsample']
+    assert {
+        'kernel_size': 2,
+        'level': 1,
+        'horizontal': True,
+        'enabled': True
+    } == values['holeFill']
+    assert 0.6 == software_filter.temporalFilter.get_alpha()
+    assert not values['temporalFilter']['enabled']
+
+    # The dictionary creates the same filters, e.g. in another process.
+    assert values == SoftwareDepthFilter.from_options(values).get()
+
+    options.disable()
+    values = SoftwareDepthFilter.from_options(options).get()
+    assert not any(stage['enabled'] for stage in values.values())
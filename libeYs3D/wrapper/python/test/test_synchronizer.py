@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+
+import eys3d
+from eys3d import FrameSynchronizer
+
+
+class Item:
+    def __init__(self, ts):
+        self.ts = ts
+
+    def get_timestamp(self):
+        return self.ts
+
+
+def test_match():
+    sync = FrameSynchronizer(("color", "depth"), tolerance_us=5000)
+    for ts in (0, 33000, 66000, 99000):
+        sync.push_depth_frame(Item(ts + 1000))
+        if ts != 33000:  # The color frame is lost.
+            sync.push_color_frame(Item(ts))
+    matched = []
+    while True:
+        ret, frameset = sync.get(timeout=0)
+        if not ret:
+            break
+        matched.append((frameset.get_depth_frame().ts,
+                        frameset.get_color_frame().ts))
+    assert [(1000, 0), (67000, 66000), (100000, 99000)] == matched
+    stats = sync.get_statistics()
+    assert 3 == stats['matched']
+    assert 1 == stats['missed']
+    assert 0.25 == stats['miss_rate']
+
+
+def test_waiting_and_tolerance():
+    sync = FrameSynchronizer(("color", "depth"), tolerance_us=2000)
+    sync.push_depth_frame(Item(10000))
+    assert (False, None) == sync.get(timeout=0)
+    sync.push_color_frame(Item(4000))  # Out of tolerance, but a later one may match.
+    assert (False, None) == sync.get(timeout=0)
+    sync.push_color_frame(Item(11500))
+    ret, frameset = sync.get(timeout=0)
+    assert ret and 11500 == frameset.get_color_frame().ts
+    assert 1 == sync.get_statistics()['dropped']['color']
+
+
+def test_stalled_stream():
+    sync = FrameSynchronizer(("color", "depth"), capacity=4)
+    for ts in range(0, 8000 * 5, 8000):
+        sync.push_depth_frame(Item(ts))
+    assert 2 == sync.get_statistics()['missed']  # The 4th and 5th fill the buffer.
+
+
+def test_imu_interpolation():
+    got = []
+    sync = FrameSynchronizer(("depth",), imu=True, callback=got.append)
+    sync.push_imu(0, [0.0, 10.0])
+    sync.push_depth_frame(Item(2500))
+    assert not got  # Waiting for the IMU sample after the frame.
+    sync.push_imu(10000, [1.0, 20.0])
+    assert 1 == len(got)
+    assert np.allclose([0.25, 12.5], got[0].get_imu_data())
+    assert 2500 == got[0].get_timestamp()
+
+
+def test_pipeline():
+    conf = eys3d.Config()
+    conf.set_preset_mode_config(0x162, 1, 3)
+    pipe = eys3d.Pipeline(backend="sim")
+    pipe.start(conf)
+    sync = FrameSynchronizer()
+    count = 0
+    deadline = time.monotonic() + 2
+    while count < 5 and time.monotonic() < deadline:
+        sync.poll(pipe)
+        ret, frameset = sync.get(timeout=0.01)
+        if ret:
+            assert (frameset.get_color_frame().get_serial_number() ==
+                    frameset.get_depth_frame().get_serial_number())
+            count += 1
+    pipe.stop()
+    assert 5 == count